@@ -0,0 +1,244 @@
+// pages/api/search-nicus.js against the real data in data/ and public/tiles/:
+// ?k= and ?minLevel= validation, and every search path (k-d tree, grid and
+// static tiles) checked against a brute-force scan of the same records.
+const fs = require("fs");
+const path = require("path");
+
+const { loadNicuData } = require("../lib/nicu-snapshot");
+const { levelRank } = require("../lib/nicu-kdtree");
+
+// Downtown Chicago: plenty of NICUs within the default 60 miles
+const CHICAGO = { lat: 41.8781, lng: -87.6298 };
+
+function calculateDistance(lat1, lon1, lat2, lon2) {
+  const R = 3959;
+  const dLat = (lat2 - lat1) * Math.PI / 180;
+  const dLon = (lon2 - lon1) * Math.PI / 180;
+  const a =
+    Math.sin(dLat / 2) * Math.sin(dLat / 2) +
+    Math.cos(lat1 * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180) *
+    Math.sin(dLon / 2) * Math.sin(dLon / 2);
+  return R * 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
+}
+
+// Every located record with its distance from CHICAGO, nearest first
+function bruteForce(records) {
+  return records
+    .filter((nicu) => typeof nicu.lat === "number" && !Number.isNaN(nicu.lat))
+    .map((nicu) => ({ nicu, distance: calculateDistance(CHICAGO.lat, CHICAGO.lng, nicu.lat, nicu.lng) }))
+    .sort((a, b) => a.distance - b.distance);
+}
+
+// The records as the handler loads them (the snapshot stores float32 lat/lng)
+function loadedRecords() {
+  const db = loadNicuData();
+  const records = [];
+  for (let i = 0; i < db.count; i++) {
+    records.push({ name: db.name(i), nicuLevel: db.level(i), lat: db.lat[i], lng: db.lng[i] });
+  }
+  return records;
+}
+
+// The records the tiles were built from
+function jsonRecords() {
+  const file = path.join(__dirname, "..", "data", "nicu-database.json");
+  return JSON.parse(fs.readFileSync(file, "utf8")).nicus;
+}
+
+// A fresh copy of the handler; `mocks` replaces modules before it loads
+function loadHandler(mocks = {}) {
+  jest.resetModules();
+  jest.doMock("axios", () => ({
+    get: jest.fn().mockResolvedValue({
+      data: { results: [{ geometry: { location: CHICAGO }, address_components: [] }] },
+    }),
+  }));
+  for (const [name, factory] of Object.entries(mocks)) jest.doMock(name, factory);
+  return require("../pages/api/search-nicus").default;
+}
+
+async function search(handler, query, headers = { host: "localhost:3000" }) {
+  const req = { query: { location: "Chicago, IL", ...query }, headers };
+  const res = {
+    status(code) {
+      this.statusCode = code;
+      return this;
+    },
+    json(body) {
+      this.body = body;
+      return this;
+    },
+  };
+  await handler(req, res);
+  return res;
+}
+
+// Distances are compared at the handler's own precision, so ties and float
+// noise don't make the orders disagree
+const miles = (results) => results.map((r) => Number(r.distance));
+const roundedMiles = (found) => found.map(({ distance }) => Number(distance.toFixed(1)));
+
+beforeAll(() => {
+  process.env.GoogleMaps = "test-key";
+  jest.spyOn(console, "log").mockImplementation(() => {});
+});
+
+afterAll(() => {
+  delete process.env.GoogleMaps;
+  jest.restoreAllMocks();
+});
+
+describe("query validation", () => {
+  let handler;
+  beforeAll(() => {
+    handler = loadHandler();
+  });
+
+  test.each(["0", "101", "2.5", "-3", "abc", ""])("rejects k=%p", async (k) => {
+    const res = await search(handler, { k });
+    expect(res.statusCode).toBe(400);
+    expect(res.body.error).toBe("k must be a whole number from 1 to 100");
+  });
+
+  test.each([["1", 1], ["100", 100]])("accepts k=%p", async (k, count) => {
+    const res = await search(handler, { k });
+    expect(res.statusCode).toBe(200);
+    expect(res.body.results).toHaveLength(count);
+  });
+
+  test.each(["V", "0", "5", "Level", "high"])("rejects minLevel=%p", async (minLevel) => {
+    const res = await search(handler, { minLevel });
+    expect(res.statusCode).toBe(400);
+    expect(res.body.error).toBe("minLevel must be a NICU level: I, II, III or IV");
+  });
+
+  test.each(["III", "3", "Level III", "level iii"])("accepts minLevel=%p", async (minLevel) => {
+    const res = await search(handler, { minLevel });
+    expect(res.statusCode).toBe(200);
+  });
+});
+
+describe("database search", () => {
+  let handler;
+  let nearest;
+  beforeAll(() => {
+    handler = loadHandler();
+    nearest = bruteForce(loadedRecords());
+  });
+
+  test("radius search returns every NICU within the radius", async () => {
+    const res = await search(handler, { radius: "60" });
+    const expected = nearest.filter(({ distance }) => distance <= 60);
+    expect(res.body.results.length).toBeGreaterThan(0);
+    expect(res.body.results.map((r) => r.name).sort()).toEqual(expected.map(({ nicu }) => nicu.name).sort());
+    expect(miles(res.body.results)).toEqual(roundedMiles(expected));
+  });
+
+  test("minLevel leaves out lower-level NICUs", async () => {
+    const res = await search(handler, { radius: "60", minLevel: "III" });
+    const expected = nearest.filter(({ nicu, distance }) => distance <= 60 && levelRank(nicu.nicuLevel) >= 3);
+    expect(res.body.results.length).toBeGreaterThan(0);
+    expect(res.body.results.every((r) => levelRank(r.nicuLevel) >= 3)).toBe(true);
+    expect(res.body.results.map((r) => r.name).sort()).toEqual(expected.map(({ nicu }) => nicu.name).sort());
+  });
+
+  test("k returns the k nearest NICUs nationally, nearest first", async () => {
+    const res = await search(handler, { k: "25" });
+    expect(miles(res.body.results)).toEqual(roundedMiles(nearest.slice(0, 25)));
+  });
+
+  test("k with minLevel returns the nearest NICUs of that level or higher", async () => {
+    const res = await search(handler, { k: "10", minLevel: "IV" });
+    const expected = nearest.filter(({ nicu }) => levelRank(nicu.nicuLevel) === 4).slice(0, 10);
+    expect(res.body.results.every((r) => levelRank(r.nicuLevel) === 4)).toBe(true);
+    expect(miles(res.body.results)).toEqual(roundedMiles(expected));
+  });
+
+  test("k with radius stops at the radius", async () => {
+    const res = await search(handler, { k: "100", radius: "10" });
+    const expected = nearest.filter(({ distance }) => distance <= 10);
+    expect(expected.length).toBeLessThan(100);
+    expect(miles(res.body.results)).toEqual(roundedMiles(expected));
+  });
+});
+
+describe("static tile fallback", () => {
+  const tilesDir = path.join(__dirname, "..", "public", "tiles");
+  // No data/ directory, as on Cloudflare Workers
+  const noDatabase = {
+    "../lib/nicu-snapshot": () => ({
+      loadNicuData: () => {
+        throw new Error("ENOENT: no such file or directory");
+      },
+    }),
+  };
+  let handler;
+  let nearest;
+  let fetched;
+
+  beforeAll(() => {
+    process.env.NICU_TILES_URL = "https://tiles.example.com/tiles";
+    fetched = [];
+    global.fetch = jest.fn(async (url) => {
+      fetched.push(url);
+      const file = path.join(tilesDir, url.replace(process.env.NICU_TILES_URL, ""));
+      if (!fs.existsSync(file)) return { ok: false, status: 404 };
+      return { ok: true, status: 200, json: async () => JSON.parse(fs.readFileSync(file, "utf8")) };
+    });
+    jest.spyOn(console, "error").mockImplementation(() => {});
+
+    handler = loadHandler(noDatabase);
+    nearest = bruteForce(jsonRecords());
+  });
+
+  afterAll(() => {
+    delete process.env.NICU_TILES_URL;
+    delete global.fetch;
+  });
+
+  test("radius search matches the brute-force scan", async () => {
+    const res = await search(handler, { radius: "60" });
+    const expected = nearest.filter(({ distance }) => distance <= 60);
+    expect(res.statusCode).toBe(200);
+    expect(res.body.results.map((r) => r.name).sort()).toEqual(expected.map(({ nicu }) => nicu.name).sort());
+    expect(miles(res.body.results)).toEqual(roundedMiles(expected));
+  });
+
+  test("only the manifest and the tiles around the search are fetched", async () => {
+    const manifest = JSON.parse(fs.readFileSync(path.join(tilesDir, "manifest.json"), "utf8"));
+    expect(fetched[0]).toBe(`${process.env.NICU_TILES_URL}/manifest.json`);
+    expect(fetched.length).toBeGreaterThan(1);
+    expect(fetched.length).toBeLessThan(Object.keys(manifest.tiles).length);
+  });
+
+  test("k without radius widens the search to the k nearest nationally", async () => {
+    const res = await search(handler, { k: "100" });
+    expect(nearest.filter(({ distance }) => distance <= 60).length).toBeLessThan(100);
+    expect(miles(res.body.results)).toEqual(roundedMiles(nearest.slice(0, 100)));
+  });
+
+  test("k and minLevel pick the nearest within the radius", async () => {
+    const res = await search(handler, { radius: "60", k: "5", minLevel: "III" });
+    const expected = nearest
+      .filter(({ nicu, distance }) => distance <= 60 && levelRank(nicu.nicuLevel) >= 3)
+      .slice(0, 5);
+    expect(res.body.results).toHaveLength(5);
+    expect(miles(res.body.results)).toEqual(roundedMiles(expected));
+  });
+
+  test("without NICU_TILES_URL the request's Host is never fetched", async () => {
+    const tilesUrl = process.env.NICU_TILES_URL;
+    delete process.env.NICU_TILES_URL;
+    try {
+      const unconfigured = loadHandler(noDatabase);
+      fetched.length = 0;
+      const spoofed = await search(unconfigured, {}, { host: "tiles.attacker.example", "x-forwarded-proto": "http" });
+      const next = await search(unconfigured, {});
+      expect(spoofed.statusCode).toBe(500);
+      expect(next.statusCode).toBe(500);
+      expect(fetched).toEqual([]);
+    } finally {
+      process.env.NICU_TILES_URL = tilesUrl;
+    }
+  });
+});
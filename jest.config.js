@@ -0,0 +1,9 @@
+// next/jest compiles pages/ and lib/ with Next's SWC setup, so tests can
+// require the ES-module API routes directly
+const nextJest = require("next/jest");
+
+const createJestConfig = nextJest({ dir: "./" });
+
+module.exports = createJestConfig({
+  testEnvironment: "node",
+});
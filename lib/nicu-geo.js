@@ -0,0 +1,40 @@
+// Bounding-box helpers shared by the snapshot grid (nicu-snapshot.js) and the
+// static tiles (nicu-tiles.js): which lat/lng cells a search circle can touch.
+const EARTH_RADIUS_MILES = 3959;
+
+// Bounding box of a circle on the sphere (the same one the haversine uses).
+// dLng is the longitude half-width; allLongitudes when the circle reaches a
+// pole, since every longitude is then in range.
+function circleBounds(lat, lng, miles) {
+  const angular = miles / EARTH_RADIUS_MILES;
+  const dLat = (angular * 180) / Math.PI;
+  const minLat = lat - dLat;
+  const maxLat = lat + dLat;
+  const cosLat = Math.cos((lat * Math.PI) / 180);
+  const allLongitudes = minLat <= -90 || maxLat >= 90 || Math.sin(angular) >= cosLat;
+  const dLng = allLongitudes ? 180 : (Math.asin(Math.sin(angular) / cosLat) * 180) / Math.PI;
+  return { minLat, maxLat, dLng, allLongitudes };
+}
+
+// Whether a point is inside circleBounds(lat, lng, ...), longitude wrapped
+function inBounds(bounds, lng, pointLat, pointLng) {
+  if (pointLat < bounds.minLat || pointLat > bounds.maxLat) return false;
+  return bounds.allLongitudes || Math.abs(((pointLng - lng + 540) % 360) - 180) <= bounds.dLng;
+}
+
+// Cell index ranges [from, to] within [0, cells) covering longitudes
+// lng ± dLng on a grid of `cells` columns from -180°, split at ±180°
+function columnRanges(bounds, lng, cells) {
+  const width = 360 / cells;
+  let first = Math.floor((lng - bounds.dLng + 180) / width);
+  let last = Math.floor((lng + bounds.dLng + 180) / width);
+  if (bounds.allLongitudes || last - first + 1 >= cells) {
+    first = 0;
+    last = cells - 1;
+  }
+  const from = ((first % cells) + cells) % cells;
+  const to = from + (last - first);
+  return to < cells ? [[from, to]] : [[from, cells - 1], [0, to - cells]];
+}
+
+module.exports = { EARTH_RADIUS_MILES, circleBounds, inBounds, columnRanges };
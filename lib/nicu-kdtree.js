@@ -0,0 +1,203 @@
+// Nearest-K NICU search: one k-d tree per NICU level over the located records.
+//
+// Points are stored as 3-D unit vectors, where straight-line (chord) distance
+// orders points exactly like great-circle distance, so there is no special
+// case at the poles or at ±180°. Each tree is implicit: the records' ids are
+// arranged so the median of every range is that subtree's root, and the split
+// axis of each node is kept alongside. A query walks the trees of the levels
+// it asks for with one bounded max-heap of the K best so far, skipping any
+// subtree that can't beat the current K-th distance, and sorts only those K
+// at the end. A Level IV query never reads the Level I-III trees.
+const { EARTH_RADIUS_MILES } = require('./nicu-geo');
+
+// Level name -> rank; minLevel=3, minLevel=III and minLevel=Level%20III all work
+const LEVEL_RANKS = { I: 1, II: 2, III: 3, IV: 4 };
+const UNKNOWN_LEVEL = 0;
+
+function levelRank(level) {
+  if (level === null || level === undefined || level === '') return null;
+  const text = String(level).trim().toUpperCase().replace(/^LEVEL\s*/, '');
+  if (LEVEL_RANKS[text]) return LEVEL_RANKS[text];
+  const number = parseInt(text, 10);
+  return number >= 1 && number <= 4 && String(number) === text ? number : null;
+}
+
+function toUnitVector(lat, lng, out, offset) {
+  const phi = (lat * Math.PI) / 180;
+  const lambda = (lng * Math.PI) / 180;
+  out[offset] = Math.cos(phi) * Math.cos(lambda);
+  out[offset + 1] = Math.cos(phi) * Math.sin(lambda);
+  out[offset + 2] = Math.sin(phi);
+}
+
+// Squared chord length of a great-circle distance in miles
+function chord2(miles) {
+  const angular = Math.min(miles / EARTH_RADIUS_MILES, Math.PI);
+  const chord = 2 * Math.sin(angular / 2);
+  return chord * chord;
+}
+
+// Max-heap of the `capacity` smallest keys offered, with a record id per key
+class BoundedHeap {
+  constructor(capacity) {
+    this.capacity = capacity;
+    this.keys = new Float64Array(capacity);
+    this.ids = new Uint32Array(capacity);
+    this.size = 0;
+  }
+
+  full() {
+    return this.size === this.capacity;
+  }
+
+  top() {
+    return this.keys[0];
+  }
+
+  offer(key, id) {
+    if (this.size < this.capacity) {
+      let i = this.size++;
+      while (i > 0) {
+        const parent = (i - 1) >> 1;
+        if (this.keys[parent] >= key) break;
+        this.keys[i] = this.keys[parent];
+        this.ids[i] = this.ids[parent];
+        i = parent;
+      }
+      this.keys[i] = key;
+      this.ids[i] = id;
+    } else if (key < this.keys[0]) {
+      let i = 0;
+      for (;;) {
+        let child = 2 * i + 1;
+        if (child >= this.size) break;
+        if (child + 1 < this.size && this.keys[child + 1] > this.keys[child]) child++;
+        if (this.keys[child] <= key) break;
+        this.keys[i] = this.keys[child];
+        this.ids[i] = this.ids[child];
+        i = child;
+      }
+      this.keys[i] = key;
+      this.ids[i] = id;
+    }
+  }
+
+  // Record ids, nearest first
+  sorted() {
+    const order = Array.from({ length: this.size }, (_, i) => i);
+    order.sort((a, b) => this.keys[a] - this.keys[b]);
+    return order.map((i) => this.ids[i]);
+  }
+}
+
+class KdTree {
+  // `ids` are record ids, `points` the unit vectors of all records (3 per id)
+  constructor(ids, points) {
+    this.ids = Uint32Array.from(ids);
+    this.axes = new Uint8Array(this.ids.length);
+    this.points = points;
+    this.build(0, this.ids.length);
+  }
+
+  build(lo, hi) {
+    if (hi - lo < 2) return;
+    const { ids, points } = this;
+
+    // Split on the axis the range is widest along
+    const min = [Infinity, Infinity, Infinity];
+    const max = [-Infinity, -Infinity, -Infinity];
+    for (let j = lo; j < hi; j++) {
+      for (let a = 0; a < 3; a++) {
+        const v = points[3 * ids[j] + a];
+        if (v < min[a]) min[a] = v;
+        if (v > max[a]) max[a] = v;
+      }
+    }
+    let axis = 0;
+    for (let a = 1; a < 3; a++) {
+      if (max[a] - min[a] > max[axis] - min[axis]) axis = a;
+    }
+
+    const mid = (lo + hi) >> 1;
+    this.select(lo, hi - 1, mid, axis);
+    this.axes[mid] = axis;
+    this.build(lo, mid);
+    this.build(mid + 1, hi);
+  }
+
+  // Quickselect: put the id whose coordinate on `axis` is k-th smallest at k,
+  // smaller ones before it and larger ones after
+  select(left, right, k, axis) {
+    const { ids, points } = this;
+    const value = (j) => points[3 * ids[j] + axis];
+    const swap = (a, b) => {
+      const t = ids[a];
+      ids[a] = ids[b];
+      ids[b] = t;
+    };
+    while (right > left) {
+      const pivot = value(k);
+      let i = left;
+      swap(k, right);
+      for (let n = left; n < right; n++) {
+        if (value(n) < pivot) swap(n, i++);
+      }
+      swap(i, right);
+      if (i === k) return;
+      if (i < k) left = i + 1;
+      else right = i - 1;
+    }
+  }
+
+  search(query, heap, limit2, lo = 0, hi = this.ids.length) {
+    if (lo >= hi) return;
+    const { ids, points } = this;
+    const mid = (lo + hi) >> 1;
+    const id = ids[mid];
+    const dx = points[3 * id] - query[0];
+    const dy = points[3 * id + 1] - query[1];
+    const dz = points[3 * id + 2] - query[2];
+    const d2 = dx * dx + dy * dy + dz * dz;
+    if (d2 <= limit2) heap.offer(d2, id);
+
+    const axis = this.axes[mid];
+    const diff = query[axis] - points[3 * id + axis];
+    const [near, far] = diff < 0 ? [[lo, mid], [mid + 1, hi]] : [[mid + 1, hi], [lo, mid]];
+    this.search(query, heap, limit2, near[0], near[1]);
+    const bound = heap.full() ? Math.min(heap.top(), limit2) : limit2;
+    if (diff * diff <= bound) this.search(query, heap, limit2, far[0], far[1]);
+  }
+}
+
+// Trees by level rank over a database from loadNicuData() (lat/lng arrays and
+// level(i)); unknown levels go in rank 0, searched only without a minLevel
+function buildLevelTrees(db) {
+  const points = new Float64Array(3 * db.count);
+  const byRank = new Map();
+  for (let i = 0; i < db.count; i++) {
+    if (Number.isNaN(db.lat[i]) || Number.isNaN(db.lng[i])) continue;
+    toUnitVector(db.lat[i], db.lng[i], points, 3 * i);
+    const rank = levelRank(db.level(i)) || UNKNOWN_LEVEL;
+    if (!byRank.has(rank)) byRank.set(rank, []);
+    byRank.get(rank).push(i);
+  }
+  const trees = new Map();
+  for (const [rank, ids] of byRank) trees.set(rank, new KdTree(ids, points));
+  return trees;
+}
+
+// Record ids of the `k` NICUs nearest (lat, lng), nearest first, of level
+// `minRank` or higher (any level when null), no more than `maxMiles` away
+function nearestNicus(trees, lat, lng, k, { minRank = null, maxMiles = Infinity } = {}) {
+  if (!(k > 0)) return [];
+  const query = new Float64Array(3);
+  toUnitVector(lat, lng, query, 0);
+  const heap = new BoundedHeap(k);
+  const limit2 = Number.isFinite(maxMiles) ? chord2(maxMiles) : Infinity;
+  // The heap is shared, so each tree prunes against the hits of those before it
+  const ranks = [...trees.keys()].filter((rank) => minRank === null || rank >= minRank).sort((a, b) => b - a);
+  for (const rank of ranks) trees.get(rank).search(query, heap, limit2);
+  return heap.sorted();
+}
+
+module.exports = { BoundedHeap, KdTree, buildLevelTrees, nearestNicus, levelRank };
@@ -0,0 +1,255 @@
+// Loader for data/nicu-snapshot.bin, the columnar snapshot of the NICU
+// database built by scripts/nicu_snapshot.py.
+//
+// Columns are typed-array views onto one buffer, so a cold start does no
+// per-record parsing and keeps no per-record objects: the search loop reads
+// lat/lng from Float32Arrays and only the NICUs it returns are turned into
+// objects (record(i)). The string bytes, the bulk of the file, are read on
+// first use and each string is decoded once.
+//
+// forEachNear(lat, lng, miles, visit) walks the lat/lng grid index built with
+// the snapshot: only the cells the search circle touches are visited, and
+// visit(i) is called for the records inside the circle's bounding box, so the
+// handler's haversine check runs on nearby NICUs only.
+//
+// loadNicuData() prefers the snapshot and falls back to nicu-database.json
+// when the snapshot is missing or was built from a different JSON file (its
+// header records the JSON's SHA-256); both return the same shape:
+// { total, count, lat, lng, name(i), level(i), record(i), forEachNear(), source }.
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { circleBounds, inBounds, columnRanges } = require('./nicu-geo');
+
+const MAGIC = 'NICUSNP1';
+const VERSION = 2;
+const GRID_DEGREES = 0.5;
+const NO_BEDS = 0xffff;
+const ARRAY_TYPES = { f32: Float32Array, u32: Uint32Array, u16: Uint16Array, u8: Uint8Array };
+const DICT_COLUMNS = ['state', 'nicuLevel', 'county'];
+
+function cellColumns(degrees) {
+  return Math.round(360 / degrees);
+}
+
+// Same cell ids as nicu_snapshot.grid_cell()
+function gridCell(lat, lng, degrees) {
+  const columns = cellColumns(degrees);
+  const row = Math.min(Math.floor((lat + 90) / degrees), Math.round(180 / degrees) - 1);
+  const column = ((Math.floor((lng + 180) / degrees) % columns) + columns) % columns;
+  return row * columns + column;
+}
+
+function buildGrid(lat, lng, degrees = GRID_DEGREES) {
+  const byCell = new Map();
+  for (let i = 0; i < lat.length; i++) {
+    if (Number.isNaN(lat[i]) || Number.isNaN(lng[i])) continue;
+    const cell = gridCell(lat[i], lng[i], degrees);
+    if (!byCell.has(cell)) byCell.set(cell, []);
+    byCell.get(cell).push(i);
+  }
+  const sorted = [...byCell.keys()].sort((a, b) => a - b);
+  const cells = Uint32Array.from(sorted);
+  const starts = new Uint32Array(sorted.length + 1);
+  const ids = new Uint32Array(sorted.reduce((n, cell) => n + byCell.get(cell).length, 0));
+  sorted.forEach((cell, k) => {
+    ids.set(byCell.get(cell), starts[k]);
+    starts[k + 1] = starts[k] + byCell.get(cell).length;
+  });
+  return { degrees, cells, starts, ids };
+}
+
+// First index in the sorted `cells` whose value is >= `cell`
+function lowerBound(cells, cell) {
+  let lo = 0;
+  let hi = cells.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (cells[mid] < cell) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+function searchGrid(grid, lat, lng, lats, lngs, miles, visit) {
+  const { degrees, cells, starts, ids } = grid;
+  const columns = cellColumns(degrees);
+  const rows = Math.round(180 / degrees);
+  const bounds = circleBounds(lat, lng, miles);
+  const { minLat, maxLat } = bounds;
+
+  const firstRow = Math.max(0, Math.floor((minLat + 90) / degrees));
+  const lastRow = Math.min(rows - 1, Math.floor((maxLat + 90) / degrees));
+  const ranges = columnRanges(bounds, lng, columns);
+
+  for (let row = firstRow; row <= lastRow; row++) {
+    for (const [start, end] of ranges) {
+      const last = row * columns + end;
+      for (let k = lowerBound(cells, row * columns + start); k < cells.length && cells[k] <= last; k++) {
+        for (let j = starts[k]; j < starts[k + 1]; j++) {
+          const i = ids[j];
+          if (inBounds(bounds, lng, lats[i], lngs[i])) visit(i);
+        }
+      }
+    }
+  }
+}
+
+function readAt(fd, position, length) {
+  // Buffer.alloc never comes from the shared pool, so byteOffset is 0 and the
+  // 4-byte aligned sections can be viewed as typed arrays directly
+  const buffer = Buffer.alloc(length);
+  let read = 0;
+  while (read < length) {
+    const n = fs.readSync(fd, buffer, read, length - read, position + read);
+    if (n === 0) throw new Error('NICU snapshot is truncated');
+    read += n;
+  }
+  return buffer;
+}
+
+// `fd` stays open so the string bytes can be read later even if the file is
+// replaced meanwhile (the writer renames a new file over it)
+function openSnapshot(fd, jsonSha256 = null) {
+  const prefix = readAt(fd, 0, 12);
+  if (prefix.toString('latin1', 0, 8) !== MAGIC) {
+    throw new Error('not a NICU snapshot');
+  }
+  const headerLength = prefix.readUInt32LE(8);
+  const header = JSON.parse(readAt(fd, 12, headerLength).toString('utf8'));
+  const bodyStart = 12 + headerLength;
+  if (header.version !== VERSION) {
+    throw new Error(`unsupported NICU snapshot version ${header.version}`);
+  }
+  if (jsonSha256 !== null && header.json_sha256 !== jsonSha256) {
+    throw new Error('snapshot is out of date with nicu-database.json');
+  }
+
+  const dataSpec = header.sections['strings.data'];
+  const body = readAt(fd, bodyStart, dataSpec.offset);
+  const section = (name) => {
+    const spec = header.sections[name];
+    return new ARRAY_TYPES[spec.type](body.buffer, spec.offset, spec.length);
+  };
+
+  const lat = section('lat');
+  const lng = section('lng');
+  const beds = section('beds');
+  const stringIds = {};
+  for (const name of ['name', 'formatted_address', 'phone', 'url']) {
+    stringIds[name] = section(name);
+  }
+  const codes = {};
+  const dictionaries = {};
+  for (const name of DICT_COLUMNS) {
+    codes[name] = section(name);
+    dictionaries[name] = section(`dict.${name}`);
+  }
+
+  const grid = {
+    degrees: header.grid.degrees,
+    cells: section('grid.cells'),
+    starts: section('grid.starts'),
+    ids: section('grid.ids'),
+  };
+
+  const offsets = section('strings.offsets');
+  const decoded = new Array(offsets.length);
+  let stringData = null;
+
+  const string = (id) => {
+    if (id === 0) return null;
+    let value = decoded[id];
+    if (value === undefined) {
+      if (stringData === null) {
+        stringData = readAt(fd, bodyStart + dataSpec.offset, dataSpec.length);
+        fs.closeSync(fd);
+      }
+      value = stringData.toString('utf8', offsets[id - 1], offsets[id]);
+      decoded[id] = value;
+    }
+    return value;
+  };
+  const dictionaryValue = (name, i) => {
+    const code = codes[name][i];
+    return code === 0 ? null : string(dictionaries[name][code - 1]);
+  };
+
+  return {
+    source: 'snapshot',
+    total: header.count,
+    count: header.count,
+    lat,
+    lng,
+    name: (i) => string(stringIds.name[i]),
+    level: (i) => dictionaryValue('nicuLevel', i),
+    forEachNear: (atLat, atLng, miles, visit) => searchGrid(grid, atLat, atLng, lat, lng, miles, visit),
+    record(i) {
+      const located = !Number.isNaN(lat[i]);
+      return {
+        name: string(stringIds.name[i]),
+        state: dictionaryValue('state', i),
+        county: dictionaryValue('county', i),
+        nicuLevel: dictionaryValue('nicuLevel', i),
+        url: string(stringIds.url[i]),
+        beds: beds[i] === NO_BEDS ? null : beds[i],
+        // float32 carries ~1 m of precision; drop the noise digits
+        lat: located ? Math.round(lat[i] * 1e5) / 1e5 : null,
+        lng: located ? Math.round(lng[i] * 1e5) / 1e5 : null,
+        formatted_address: string(stringIds.formatted_address[i]),
+        phone: string(stringIds.phone[i]),
+      };
+    },
+  };
+}
+
+function fromJson(database) {
+  const nicus = database.nicus || [];
+  const lat = new Float64Array(nicus.length);
+  const lng = new Float64Array(nicus.length);
+  nicus.forEach((nicu, i) => {
+    const located = typeof nicu.lat === 'number' && typeof nicu.lng === 'number';
+    lat[i] = located ? nicu.lat : NaN;
+    lng[i] = located ? nicu.lng : NaN;
+  });
+  const grid = buildGrid(lat, lng);
+  return {
+    source: 'json',
+    total: database.total || nicus.length,
+    count: nicus.length,
+    lat,
+    lng,
+    name: (i) => nicus[i].name,
+    level: (i) => nicus[i].nicuLevel || null,
+    forEachNear: (atLat, atLng, miles, visit) => searchGrid(grid, atLat, atLng, lat, lng, miles, visit),
+    record: (i) => nicus[i],
+  };
+}
+
+function loadNicuData(dataDir = path.join(process.cwd(), 'data')) {
+  const snapshotPath = path.join(dataDir, 'nicu-snapshot.bin');
+  const jsonPath = path.join(dataDir, 'nicu-database.json');
+
+  // Hashing the bytes (~1 ms) catches edits that keep the file's size
+  let json = null;
+  let jsonSha256 = null;
+  try {
+    json = fs.readFileSync(jsonPath);
+    jsonSha256 = crypto.createHash('sha256').update(json).digest('hex');
+  } catch (err) {
+    // Deployed with the snapshot only
+  }
+
+  if (fs.existsSync(snapshotPath)) {
+    const fd = fs.openSync(snapshotPath, 'r');
+    try {
+      return openSnapshot(fd, jsonSha256);
+    } catch (err) {
+      fs.closeSync(fd);
+      console.error('Failed to load NICU snapshot, using JSON:', err.message);
+    }
+  }
+  return fromJson(JSON.parse((json || fs.readFileSync(jsonPath)).toString('utf8')));
+}
+
+module.exports = { loadNicuData, openSnapshot, fromJson };
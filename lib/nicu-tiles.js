@@ -0,0 +1,116 @@
+// Reader for the static geo-tiles built by scripts/nicu_tiles.py, for
+// deployments without a filesystem (Cloudflare Workers).
+//
+// The database is sharded by geohash prefix into public/tiles/v/*.json, with
+// public/tiles/manifest.json listing the tiles that exist. near() fetches only
+// the tiles a search circle touches and returns the NICUs inside its bounding
+// box; the handler runs its haversine on those. Tile names carry a content
+// hash, so a fetched tile never changes and stays cached for the life of the
+// instance (up to MAX_TILES); the manifest is re-fetched every MANIFEST_TTL_MS.
+const { circleBounds, inBounds, columnRanges } = require('./nicu-geo');
+
+const MANIFEST_TTL_MS = 5 * 60 * 1000;
+const MAX_TILES = 200;
+const BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz';
+
+// Geohash of the cell in `row` (from -90°) and `column` (from -180°) of the
+// grid of `precision`-character geohashes: their bits interleaved, lng first
+function cellGeohash(row, column, lngBits, latBits) {
+  let hash = '';
+  let value = 0;
+  let bits = 0;
+  let lngBit = lngBits;
+  let latBit = latBits;
+  for (let n = 0; n < lngBits + latBits; n++) {
+    const bit = n % 2 === 0 ? (column >> --lngBit) & 1 : (row >> --latBit) & 1;
+    value = (value << 1) | bit;
+    if (++bits === 5) {
+      hash += BASE32[value];
+      value = 0;
+      bits = 0;
+    }
+  }
+  return hash;
+}
+
+// Geohash prefixes of every cell a circle's bounding box touches
+function coveringGeohashes(lat, lng, miles, precision) {
+  const lngBits = Math.ceil((5 * precision) / 2);
+  const latBits = Math.floor((5 * precision) / 2);
+  const rows = 2 ** latBits;
+  const bounds = circleBounds(lat, lng, miles);
+  const height = 180 / rows;
+  const firstRow = Math.max(0, Math.floor((bounds.minLat + 90) / height));
+  const lastRow = Math.min(rows - 1, Math.floor((bounds.maxLat + 90) / height));
+
+  const hashes = [];
+  for (let row = firstRow; row <= lastRow; row++) {
+    for (const [from, to] of columnRanges(bounds, lng, 2 ** lngBits)) {
+      for (let column = from; column <= to; column++) {
+        hashes.push(cellGeohash(row, column, lngBits, latBits));
+      }
+    }
+  }
+  return hashes;
+}
+
+function createTileSource(baseUrl, fetchImpl = fetch) {
+  const base = baseUrl.replace(/\/$/, '');
+  const tiles = new Map();
+  let manifest = null;
+  let manifestAt = 0;
+
+  const getJson = async (url) => {
+    const res = await fetchImpl(url);
+    if (!res.ok) throw new Error(`GET ${url}: ${res.status}`);
+    return res.json();
+  };
+
+  const getManifest = async () => {
+    if (!manifest || Date.now() - manifestAt > MANIFEST_TTL_MS) {
+      manifest = getJson(`${base}/manifest.json`);
+      manifestAt = Date.now();
+      manifest.catch(() => {
+        manifest = null;
+      });
+    }
+    return manifest;
+  };
+
+  const getTile = (file) => {
+    let tile = tiles.get(file);
+    if (tile) {
+      // Most recently used last, so the oldest is evicted first
+      tiles.delete(file);
+    } else {
+      tile = getJson(`${base}/${file}`);
+      tile.catch(() => tiles.delete(file));
+    }
+    tiles.set(file, tile);
+    if (tiles.size > MAX_TILES) tiles.delete(tiles.keys().next().value);
+    return tile;
+  };
+
+  return {
+    // NICUs in the tiles around (lat, lng) that fall inside the circle's bounding box
+    async near(lat, lng, miles) {
+      const { precision, tiles: index } = await getManifest();
+      const files = coveringGeohashes(lat, lng, miles, precision)
+        .filter((prefix) => index[prefix])
+        .map((prefix) => index[prefix].file);
+      const bounds = circleBounds(lat, lng, miles);
+      const found = [];
+      for (const tile of await Promise.all(files.map(getTile))) {
+        for (const nicu of tile.nicus) {
+          if (inBounds(bounds, lng, nicu.lat, nicu.lng)) found.push(nicu);
+        }
+      }
+      return found;
+    },
+    async total() {
+      return (await getManifest()).total;
+    },
+  };
+}
+
+module.exports = { createTileSource, coveringGeohashes };
@@ -1,16 +1,41 @@
 import axios from "axios";
-import fs from "fs";
-import path from "path";
+import { loadNicuData } from "../../lib/nicu-snapshot";
+import { createTileSource } from "../../lib/nicu-tiles";
+import { BoundedHeap, buildLevelTrees, levelRank, nearestNicus } from "../../lib/nicu-kdtree";
 
-// Load NICU database
+// Most results a nearest-K query (?k=) returns
+const MAX_K = 100;
+
+// Half the Earth's circumference: a nearest-K tile search without ?radius=
+// widens up to this, i.e. to every tile
+const MAX_SEARCH_MILES = 12450;
+
+// Load NICU database (columnar snapshot, or the JSON if there is none)
 let nicuDatabase = null;
 try {
-  const dbPath = path.join(process.cwd(), 'data', 'nicu-database.json');
-  const dbData = fs.readFileSync(dbPath, 'utf8');
-  nicuDatabase = JSON.parse(dbData);
-  console.log(`Loaded NICU database with ${nicuDatabase.total} entries`);
+  nicuDatabase = loadNicuData();
+  console.log(`Loaded NICU database with ${nicuDatabase.total} entries (${nicuDatabase.source})`);
 } catch (err) {
-  console.error('Failed to load NICU database:', err.message);
+  console.error('Failed to load NICU database, using static tiles:', err.message);
+}
+
+// Without a filesystem (Cloudflare Workers), search the static geo-tiles in
+// public/tiles/ instead, from NICU_TILES_URL. The origin is configured, never
+// taken from the request's Host header: the source is cached for every later
+// request, so one spoofed header would serve another site's tiles to everyone.
+let nicuTiles = null;
+function getTileSource() {
+  if (!nicuTiles && process.env.NICU_TILES_URL) {
+    nicuTiles = createTileSource(process.env.NICU_TILES_URL);
+  }
+  return nicuTiles;
+}
+
+// Per-level k-d trees for ?k= queries, built on the first one
+let levelTrees = null;
+function getLevelTrees() {
+  if (!levelTrees) levelTrees = buildLevelTrees(nicuDatabase);
+  return levelTrees;
 }
 
 // Calculate distance between two points using Haversine formula
@@ -29,7 +54,7 @@ function calculateDistance(lat1, lon1, lat2, lon2) {
 
 // Function to match a hospital name with NICU database
 function matchNicuData(hospitalName, state) {
-  if (!nicuDatabase || !nicuDatabase.nicus) return null;
+  if (!nicuDatabase) return null;
 
   // Clean the hospital name for matching - be more aggressive
   const cleanName = (name) => name
@@ -47,7 +72,8 @@ function matchNicuData(hospitalName, state) {
   let bestScore = 0;
 
   // Try to find best match in the database
-  for (const nicu of nicuDatabase.nicus) {
+  for (let i = 0; i < nicuDatabase.count; i++) {
+    const nicu = nicuDatabase.record(i);
     const dbName = cleanName(nicu.name);
     const dbWords = dbName.split(' ').filter(w => w.length > 2);
 
@@ -116,9 +142,18 @@ async function handler(req, res) {
   const radius = req.query.radius || 60;
   const apiKey = process.env.GoogleMaps;
 
+  // ?k=N returns the N nearest NICUs (within ?radius= only if one is given);
+  // ?minLevel=III (or 3) leaves out lower-level NICUs
+  const k = req.query.k === undefined ? null : Number(req.query.k);
+  const minRank = req.query.minLevel === undefined ? null : levelRank(req.query.minLevel);
+
   if (!apiKey) return res.status(500).json({ error: "API key not configured" });
   if (!location)
     return res.status(400).json({ error: "Location parameter is required" });
+  if (k !== null && !(Number.isInteger(k) && k >= 1 && k <= MAX_K))
+    return res.status(400).json({ error: `k must be a whole number from 1 to ${MAX_K}` });
+  if (req.query.minLevel !== undefined && minRank === null)
+    return res.status(400).json({ error: "minLevel must be a NICU level: I, II, III or IV" });
 
   try {
     // Try Google Maps Geocoding first
@@ -185,7 +220,7 @@ async function handler(req, res) {
     // This prevents dialysis centers and other non-NICU facilities from appearing
     const preliminary = [];
 
-    console.log(`Searching ${nicuDatabase.nicus.length} NICUs from curated database (Google Maps search disabled)`);
+    console.log(`Searching ${nicuDatabase ? nicuDatabase.count : 'tiled'} NICUs from curated database (Google Maps search disabled)`);
 
     // Skip Google Maps matching entirely
     if (false) {
@@ -261,42 +296,87 @@ async function handler(req, res) {
     const radiusMiles = parseFloat(radius);
     const alreadyAdded = new Set(preliminary.map(p => p.databaseName?.toLowerCase()));
 
-    for (const nicu of nicuDatabase.nicus) {
-      // Skip if already added from Google Maps
-      if (alreadyAdded.has(nicu.name.toLowerCase())) {
-        continue;
+    const addNicu = (nicu, distance) => {
+      preliminary.push({
+        name: nicu.name,
+        address: nicu.formatted_address || `${nicu.county}, ${nicu.state}`,
+        distance: distance.toFixed(1),
+        distanceValue: distance * 1609.34,
+        rating: null,
+        reviews: null,
+        placeId: null,
+        phone: nicu.phone || null,
+        website: nicu.url,
+        nicuLevel: nicu.nicuLevel,
+        beds: nicu.beds,
+        hasNicU: true,
+        state: nicu.state,
+        county: nicu.county,
+        databaseName: nicu.name,
+        lat: nicu.lat,
+        lng: nicu.lng,
+        source: 'database' // Mark as from database directly
+      });
+    };
+
+    if (nicuDatabase && k !== null) {
+      // Nearest K from the level trees; only levels >= minLevel are searched
+      const maxMiles = req.query.radius ? radiusMiles : Infinity;
+      for (const i of nearestNicus(getLevelTrees(), lat, lng, k, { minRank, maxMiles })) {
+        if (!alreadyAdded.has(nicuDatabase.name(i).toLowerCase())) {
+          const nicu = nicuDatabase.record(i);
+          addNicu(nicu, calculateDistance(lat, lng, nicu.lat, nicu.lng));
+        }
       }
+    } else if (nicuDatabase) {
+      const nicuLats = nicuDatabase.lat;
+      const nicuLngs = nicuDatabase.lng;
+
+      // Only NICUs in the grid cells (and bounding box) of the search circle are visited
+      nicuDatabase.forEachNear(lat, lng, radiusMiles, (i) => {
+        // Calculate distance
+        const distance = calculateDistance(lat, lng, nicuLats[i], nicuLngs[i]);
+
+        // Skip if out of range, below minLevel or already added from Google Maps
+        if (distance > radiusMiles || alreadyAdded.has(nicuDatabase.name(i).toLowerCase())) {
+          return;
+        }
+        if (minRank !== null && !(levelRank(nicuDatabase.level(i)) >= minRank)) {
+          return;
+        }
 
-      // Skip if no coordinates
-      if (!nicu.lat || !nicu.lng) {
-        continue;
+        // Only NICUs in range are turned into objects
+        addNicu(nicuDatabase.record(i), distance);
+      });
+    } else {
+      const tiles = getTileSource();
+      if (!tiles) {
+        console.error("No NICU database and NICU_TILES_URL is not set");
+        return res.status(500).json({ error: "NICU database not available" });
       }
 
-      // Calculate distance
-      const distance = calculateDistance(lat, lng, nicu.lat, nicu.lng);
-
-      if (distance <= radiusMiles) {
-        preliminary.push({
-          name: nicu.name,
-          address: nicu.formatted_address || `${nicu.county}, ${nicu.state}`,
-          distance: distance.toFixed(1),
-          distanceValue: distance * 1609.34,
-          rating: null,
-          reviews: null,
-          placeId: null,
-          phone: nicu.phone || null,
-          website: nicu.url,
-          nicuLevel: nicu.nicuLevel,
-          beds: nicu.beds,
-          hasNicU: true,
-          state: nicu.state,
-          county: nicu.county,
-          databaseName: nicu.name,
-          lat: nicu.lat,
-          lng: nicu.lng,
-          source: 'database' // Mark as from database directly
-        });
+      // Only the tiles around the search circle are fetched. For ?k= without
+      // ?radius= the circle doubles until it holds K NICUs (the K nearest are
+      // then all inside it), so K means the nearest K nationally here too
+      const maxMiles = k !== null && !req.query.radius ? MAX_SEARCH_MILES : radiusMiles;
+      let searchMiles = Math.min(radiusMiles, maxMiles);
+      let nearby;
+      let nearest;
+      for (;;) {
+        nearby = [];
+        nearest = k !== null ? new BoundedHeap(k) : null;
+        for (const nicu of await tiles.near(lat, lng, searchMiles)) {
+          const distance = calculateDistance(lat, lng, nicu.lat, nicu.lng);
+          if (distance > searchMiles || alreadyAdded.has(nicu.name.toLowerCase())) continue;
+          if (minRank !== null && !(levelRank(nicu.nicuLevel) >= minRank)) continue;
+          nearby.push({ nicu, distance });
+          if (nearest) nearest.offer(distance, nearby.length - 1);
+        }
+        if (k === null || nearby.length >= k || searchMiles >= maxMiles) break;
+        searchMiles = Math.min(searchMiles * 2, maxMiles);
       }
+      const picked = nearest ? nearest.sorted().map((j) => nearby[j]) : nearby;
+      for (const { nicu, distance } of picked) addNicu(nicu, distance);
     }
 
     console.log(`Added ${preliminary.filter(p => p.source === 'database').length} additional NICUs from database`);
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """
 Add hospitals from major states to expand coverage
+
+Saved through nicu_store, so with the SQLite store only the new hospitals
+are inserted.
 """
 
-import json
+from nicu_store import load_database, write_database
 
 # New Jersey hospitals
 nj_hospitals = [
@@ -38,8 +41,7 @@ nj_hospitals = [
 ]
 
 # Load existing database
-with open('data/nicu-database.json', 'r') as f:
-    data = json.load(f)
+data = load_database('data/nicu-database.json')
 
 # Add New Jersey hospitals
 print(f"Current total: {len(data['nicus'])} hospitals")
@@ -59,8 +61,7 @@ data['nicus'] = unique_nicus
 data['total'] = len(unique_nicus)
 
 # Save
-with open('data/nicu-database.json', 'w') as f:
-    json.dump(data, f, indent=2)
+write_database('data/nicu-database.json', data)
 
 print(f"New total: {len(unique_nicus)} hospitals")
 print(f"\nStates now covered:")
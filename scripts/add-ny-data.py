@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """
 Manually add New York NICU data to the database
+
+Saved through nicu_store, so with the SQLite store only the new hospitals
+are inserted.
 """
 
-import json
+from nicu_store import load_database, write_database
 
 # New York NICU data manually extracted
 ny_nicus = [
@@ -76,16 +79,14 @@ ny_nicus = [
 ]
 
 # Load existing database
-with open('data/nicu-database.json', 'r') as f:
-    data = json.load(f)
+data = load_database('data/nicu-database.json')
 
 # Add New York hospitals
 data['nicus'].extend(ny_nicus)
 data['total'] = len(data['nicus'])
 
 # Save updated database
-with open('data/nicu-database.json', 'w') as f:
-    json.dump(data, f, indent=2)
+write_database('data/nicu-database.json', data)
 
 print(f"Added {len(ny_nicus)} New York NICUs to the database")
 print(f"Total NICUs now: {data['total']}")
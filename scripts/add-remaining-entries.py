@@ -3,9 +3,10 @@
 Manually add the 17 problematic entries that couldn't be parsed automatically
 """
 
-import json
 from pathlib import Path
 
+from nicu_store import load_database, write_database
+
 # Manually parsed entries from the problematic lines
 manual_entries = [
     {
@@ -151,8 +152,7 @@ def main():
     db_path = base_dir / 'data' / 'nicu-database.json'
 
     # Load existing database
-    with open(db_path, 'r', encoding='utf-8') as f:
-        database = json.load(f)
+    database = load_database(db_path)
 
     existing_nicus = database.get('nicus', [])
 
@@ -182,8 +182,7 @@ def main():
     database['total'] = len(existing_nicus)
 
     # Save updated database
-    with open(db_path, 'w', encoding='utf-8') as f:
-        json.dump(database, f, indent=2, ensure_ascii=False)
+    write_database(db_path, database)
 
     print(f"\nDatabase updated successfully!")
     print(f"Total entries: {database['total']}")
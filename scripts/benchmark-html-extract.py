@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming listing extractor against the old BeautifulSoup walk
+
+The old approach (extract-from-html-v2.py before it streamed) builds a full
+html.parser soup and calls find_next() up to 20 times per heading. Both are
+timed on the same page and peak memory is measured with tracemalloc.
+
+The two do not produce the same output. The old walk emits a record for every
+heading it can find a state after, county and level headings included (5,477
+records for 1,432 cards on the synthetic page); the streaming extractor emits
+one record per card and adds the card's entry url. The check at the end only
+compares name, state, county and level of the old records whose name is a
+card title, record for record.
+
+Without a path, a synthetic page with the listing's markup is generated from
+data/nicu-database.json. The timings quoted for this change (6-8x faster, 1.1 MB
+against 48.5 MB peak) are from that synthetic page, not the real one; pass a
+saved "Database – NICU Data.html" to measure and check that.
+
+Usage:
+    python scripts/benchmark-html-extract.py                          # synthetic 1,432-card page
+    python scripts/benchmark-html-extract.py "Database – NICU Data.html"
+"""
+
+import argparse
+import html
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from nicudata_html import iter_listing
+from us_states import state_abbrev
+
+LEVEL_DIGITS = {'Level I': '1', 'Level II': '2', 'Level III': '3', 'Level IV': '4'}
+
+CARD_TEMPLATE = '''<div class="jet-listing-grid__item jet-listing-dynamic-post-{post_id}" data-post-id="{post_id}">
+<div data-elementor-type="jet-listing-items" data-elementor-id="1919" class="elementor elementor-1919">
+<div class="elementor-element e-flex e-con-boxed e-con e-parent"><div class="e-con-inner">
+<div class="elementor-element elementor-widget elementor-widget-heading"><div class="elementor-widget-container">
+<h2 class="elementor-heading-title elementor-size-default">{name}</h2></div></div>
+<div class="elementor-element elementor-widget elementor-widget-heading"><div class="elementor-widget-container">
+<h2 class="elementor-heading-title elementor-size-default">{state}</h2></div></div>
+<div class="elementor-element elementor-widget elementor-widget-heading"><div class="elementor-widget-container">
+<h2 class="elementor-heading-title elementor-size-default">{county}</h2></div></div>
+<div class="elementor-element elementor-widget elementor-widget-heading"><div class="elementor-widget-container">
+<h2 class="elementor-heading-title elementor-size-default">{level}</h2></div></div>
+<div class="elementor-element elementor-widget elementor-widget-button"><div class="elementor-widget-container">
+<a class="elementor-button elementor-button-link elementor-size-sm" href="{url}"><span class="elementor-button-text">View</span></a>
+</div></div>
+</div></div></div></div>
+'''
+
+
+def write_synthetic_page(path, cards):
+    """Write a listing page with `cards` cards built from the database"""
+    base_dir = Path(__file__).parent.parent
+    with open(base_dir / 'data' / 'nicu-database.json', 'r', encoding='utf-8') as f:
+        nicus = json.load(f)['nicus']
+
+    with open(path, 'w', encoding='utf-8') as out:
+        out.write('<!DOCTYPE html><html><head><title>Database – NICU Data</title></head><body>\n')
+        out.write('<div class="jet-listing-grid jet-listing"><div class="jet-listing-grid__items grid-col-desk-1">\n')
+        for i in range(cards):
+            nicu = nicus[i % len(nicus)]
+            out.write(CARD_TEMPLATE.format(
+                post_id=1000 + i,
+                name=html.escape(nicu['name']),
+                state=state_abbrev(nicu['state']) or nicu['state'],
+                county=html.escape(nicu.get('county') or ''),
+                level=LEVEL_DIGITS.get(nicu.get('nicuLevel'), ''),
+                url=html.escape(nicu.get('url') or ''),
+            ))
+        out.write('</div></div></body></html>\n')
+
+
+def extract_with_soup(html_file):
+    """The old extract-from-html-v2.py walk, unchanged apart from returning the records"""
+    with open(html_file, 'r', encoding='utf-8') as f:
+        html_content = f.read()
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    nicus = []
+
+    for title_elem in soup.find_all('h2', class_='elementor-heading-title'):
+        hospital_name = title_elem.get_text(strip=True)
+        state = None
+        county = None
+        level = None
+
+        current = title_elem
+        for _ in range(20):
+            current = current.find_next()
+            if not current:
+                break
+
+            text = current.get_text(strip=True)
+
+            if not state and len(text) == 2 and text.isupper() and text.isalpha():
+                state = text
+
+            if not level and text.isdigit() and text in ['1', '2', '3', '4']:
+                level_map = {'1': 'I', '2': 'II', '3': 'III', '4': 'IV'}
+                level = f"Level {level_map[text]}"
+
+            if state and not county and not level:
+                if 3 < len(text) < 50 and not text.isdigit():
+                    county = text
+
+            if state and level:
+                break
+
+        if hospital_name and state:
+            nicus.append({
+                'name': hospital_name,
+                'state': state,
+                'county': county or '',
+                'nicuLevel': level or '',
+                'beds': None
+            })
+
+    return nicus
+
+
+def measure(label, fn):
+    """Time fn, then run it again under tracemalloc for peak memory; returns (result, seconds)"""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<28} {elapsed:8.3f}s   peak {peak / 1e6:8.1f} MB   {len(result)} records")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark listing page extractors')
+    parser.add_argument('html_file', nargs='?', help='saved listing page (default: synthetic page)')
+    parser.add_argument('--cards', type=int, default=1432,
+                        help='cards in the synthetic page (default: 1432)')
+    args = parser.parse_args()
+
+    path = args.html_file
+    tmp = None
+    if not path:
+        tmp = tempfile.NamedTemporaryFile(suffix='.html', delete=False)
+        tmp.close()
+        path = tmp.name
+        write_synthetic_page(path, args.cards)
+        print(f"Synthetic page: {args.cards} cards")
+
+    print(f"Page: {path} ({os.path.getsize(path) / 1e6:.1f} MB)\n")
+
+    try:
+        streamed, new_time = measure('streaming (html.parser)', lambda: list(iter_listing(path)))
+        old, old_time = measure('BeautifulSoup + find_next', lambda: extract_with_soup(path))
+    finally:
+        if tmp:
+            os.unlink(tmp.name)
+
+    # The old walk emits one record per heading; keep the ones that are card titles
+    fields = ('name', 'state', 'county', 'nicuLevel')
+    titles = {r['name'] for r in streamed}
+    old_cards = Counter(tuple(r[k] for k in fields) for r in old if r['name'] in titles)
+    new_cards = Counter(tuple(r[k] for k in fields) for r in streamed)
+
+    print(f"\nSpeedup: {old_time / new_time:.1f}x")
+    print(f"Output: old walk {len(old)} records (one per heading), "
+          f"streaming {len(streamed)} (one per card, with url)")
+    if old_cards == new_cards:
+        print(f"✓ Card-title records agree on {', '.join(fields)}: "
+              f"{sum(new_cards.values())} of them; the old walk's other "
+              f"{len(old) - sum(old_cards.values())} records are dropped")
+    else:
+        missing = old_cards - new_cards
+        extra = new_cards - old_cards
+        print(f"✗ Records differ: {len(missing)} only in old, {len(extra)} only in streaming")
+        for record in list(missing)[:5]:
+            print(f"  old only: {record}")
+        for record in list(extra)[:5]:
+            print(f"  new only: {record}")
+
+
+if __name__ == '__main__':
+    main()
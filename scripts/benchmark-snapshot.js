@@ -0,0 +1,71 @@
+// Cold-start benchmark: JSON database vs columnar snapshot (lib/nicu-snapshot.js)
+//
+// Each load runs in a fresh node process, like a serverless cold start, and
+// reports the time to a searchable database plus the heap it keeps alive.
+// The first search, which also reads the strings, is timed too.
+//
+//   python scripts/build-snapshot.py
+//   node --expose-gc scripts/benchmark-snapshot.js [runs]
+const { execFileSync } = require("child_process");
+const path = require("path");
+
+const root = path.join(__dirname, "..");
+const runs = parseInt(process.argv[2] || "10", 10);
+
+const child = (mode) => `
+  const fs = require("fs");
+  const path = require("path");
+  const { fromJson, openSnapshot } = require(${JSON.stringify(path.join(root, "lib", "nicu-snapshot.js"))});
+  const dataDir = ${JSON.stringify(path.join(root, "data"))};
+  global.gc();
+  const heapBefore = process.memoryUsage().heapUsed;
+  const start = process.hrtime.bigint();
+  const db = ${mode === "json"
+    ? 'fromJson(JSON.parse(fs.readFileSync(path.join(dataDir, "nicu-database.json"), "utf8")))'
+    : 'openSnapshot(fs.openSync(path.join(dataDir, "nicu-snapshot.bin"), "r"))'};
+  const loadMs = Number(process.hrtime.bigint() - start) / 1e6;
+  global.gc();
+  const heapKept = process.memoryUsage().heapUsed - heapBefore;
+  const external = process.memoryUsage().arrayBuffers;
+
+  // One search: the grid cells around New York, materialize the NICUs within 60 miles
+  const searchStart = process.hrtime.bigint();
+  let found = 0;
+  db.forEachNear(40.7128, -74.006, 60, (i) => {
+    const dLat = (db.lat[i] - 40.7128) * 69;
+    const dLng = (db.lng[i] + 74.006) * 52.4;
+    if (dLat * dLat + dLng * dLng <= 3600) { db.record(i); found++; }
+  });
+  const searchMs = Number(process.hrtime.bigint() - searchStart) / 1e6;
+  console.log(JSON.stringify({ loadMs, heapKept, external, searchMs, found, source: db.source }));
+`;
+
+function measure(mode) {
+  const samples = [];
+  for (let i = 0; i < runs; i++) {
+    const out = execFileSync(process.execPath, ["--expose-gc", "-e", child(mode)], { encoding: "utf8" });
+    samples.push(JSON.parse(out.trim().split("\n").pop()));
+  }
+  const median = (key) => samples.map((s) => s[key]).sort((a, b) => a - b)[Math.floor(samples.length / 2)];
+  return {
+    loadMs: median("loadMs"),
+    heapKept: median("heapKept"),
+    external: median("external"),
+    searchMs: median("searchMs"),
+    found: samples[0].found,
+  };
+}
+
+const json = measure("json");
+const snapshot = measure("snapshot");
+const kb = (bytes) => `${(bytes / 1024).toFixed(0)} KB`;
+
+console.log(`Median of ${runs} cold starts\n`);
+console.log("                     load      heap kept   buffers    search");
+for (const [label, r] of [["JSON.parse", json], ["columnar snapshot", snapshot]]) {
+  console.log(
+    `  ${label.padEnd(18)} ${r.loadMs.toFixed(2).padStart(6)} ms  ${kb(r.heapKept).padStart(9)}  ${kb(r.external).padStart(8)}  ${r.searchMs.toFixed(2).padStart(6)} ms  (${r.found} found)`
+  );
+}
+console.log(`\nLoad ${(json.loadMs / snapshot.loadMs).toFixed(1)}x faster, ` +
+  `${(json.heapKept / Math.max(snapshot.heapKept + snapshot.external, 1)).toFixed(1)}x less memory kept`);
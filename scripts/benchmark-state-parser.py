@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the neonatologysolutions state page parser
+
+Runs the line classifier / state machine (neonatology_pages.parse_lines) and the
+original per-line loop over the text lines of every state page archived in the
+snapshot store, checks they find the same hospitals, and reports the time per
+full pass. HTML-to-text extraction is done once up front and not timed, so the
+numbers are for the line parsing alone.
+
+If no state pages have been fetched yet (scrape-nicu-data-v3.py --stage fetch),
+synthetic pages are generated from data/nicu-database.json.
+
+Usage:
+    python scripts/benchmark-state-parser.py
+    python scripts/benchmark-state-parser.py --repeat 200
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from neonatology_pages import STATES, page_lines, parse_lines
+from snapshot_store import SnapshotStore
+
+
+def parse_lines_reference(state_name, lines):
+    """The original scrape_state_nicus() loop, kept as the baseline"""
+    nicus = []
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        if any(skip in line.lower() for skip in ['practice type', 'md contact', 'nicu level iv', 'nicu level iii', 'nicu level ii', 'level iv nicus', 'level iii nicus', 'level ii nicus', 'total', 'summary']):
+            i += 1
+            continue
+
+        match1 = re.match(r'^(.+?)\s+Level\s+(IV|III|II|I)\s*\|?\s*(\d+)\s*Beds?', line, re.IGNORECASE)
+        if match1:
+            nicus.append({
+                'name': match1.group(1).strip(),
+                'state': state_name,
+                'nicuLevel': f'Level {match1.group(2).upper()}',
+                'beds': int(match1.group(3))
+            })
+            i += 1
+            continue
+
+        if i + 1 < len(lines):
+            next_line = lines[i + 1]
+            match2 = re.match(r'^Level\s+(IV|III|II|I)\s*\|?\s*(\d+)\s*Beds?', next_line, re.IGNORECASE)
+
+            if match2 and len(line) > 3 and not any(skip in line.lower() for skip in ['practice', 'contact', 'type', 'level']):
+                nicus.append({
+                    'name': line.strip(),
+                    'state': state_name,
+                    'nicuLevel': f'Level {match2.group(1).upper()}',
+                    'beds': int(match2.group(2))
+                })
+                i += 2
+                continue
+
+        i += 1
+
+    seen = set()
+    unique_nicus = []
+    for nicu in nicus:
+        if nicu['name'] not in seen:
+            seen.add(nicu['name'])
+            unique_nicus.append(nicu)
+
+    return unique_nicus
+
+
+def archived_pages():
+    """{state: lines} for every state page in the snapshot store"""
+    store = SnapshotStore()
+    pages = {}
+    for state_name, url in STATES.items():
+        html = store.get(url)
+        if html is not None:
+            lines = page_lines(html)
+            if lines:
+                pages[state_name] = lines
+    return pages
+
+
+def synthetic_pages(seed=0):
+    """State pages in the site's mix of layouts, built from the database"""
+    base_dir = Path(__file__).parent.parent
+    with open(base_dir / 'data' / 'nicu-database.json', 'r', encoding='utf-8') as f:
+        nicus = json.load(f)['nicus']
+
+    rng = random.Random(seed)
+    pages = {}
+    for nicu in nicus:
+        lines = pages.setdefault(nicu['state'], ['Level IV NICUs', 'Summary', 'Total: 0'])
+        level = (nicu.get('nicuLevel') or 'Level II').replace('Level ', '')
+        beds = nicu.get('beds') or rng.randint(4, 80)
+        if rng.random() < 0.5:
+            lines.append(f"{nicu['name']} Level {level} | {beds} Beds")
+        else:
+            lines.append(nicu['name'])
+            lines.append(f"Level {level} | {beds} Beds")
+        lines.append('Practice Type: Private')
+        lines.append('MD Contact: Dr. Example')
+        if rng.random() < 0.3:
+            lines.append(f"{nicu.get('county') or 'Unknown'} County")
+    return pages
+
+
+def time_parser(parse, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for state_name, lines in pages.items():
+            parse(state_name, lines)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the state page line parser')
+    parser.add_argument('--repeat', type=int, default=50, help='passes over all pages (default: 50)')
+    args = parser.parse_args()
+
+    pages = archived_pages()
+    source = 'archived'
+    if not pages:
+        pages = synthetic_pages()
+        source = 'synthetic'
+
+    total_lines = sum(len(lines) for lines in pages.values())
+    print(f"{len(pages)} {source} state pages, {total_lines:,} lines\n")
+
+    mismatches = [s for s, lines in pages.items() if parse_lines(s, lines) != parse_lines_reference(s, lines)]
+    found = sum(len(parse_lines(s, lines)) for s, lines in pages.items())
+
+    old = time_parser(parse_lines_reference, pages, args.repeat)
+    new = time_parser(parse_lines, pages, args.repeat)
+
+    print(f"  original loop        {old * 1000:8.2f} ms/pass   {total_lines / old / 1e6:6.2f} M lines/s")
+    print(f"  classifier + FSM     {new * 1000:8.2f} ms/pass   {total_lines / new / 1e6:6.2f} M lines/s")
+    print(f"\nSpeedup: {old / new:.1f}x, {found} hospitals found")
+
+    if mismatches:
+        print(f"✗ Output differs from the original loop for: {', '.join(mismatches)}")
+    else:
+        print("✓ Same hospitals as the original loop for every state")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Build the bundled offline gazetteer (data/us-gazetteer.tsv.gz) from a US ZIP
+code table.
+
+Input is the zips.json(.bz2) file shipped with the MIT-licensed `zipcodes`
+package (https://pypi.org/project/zipcodes/), one object per ZIP with
+city/county/state and a lat/long centroid. ZIP centroids are kept as-is;
+place (city), county and state centroids are the mean of their ZIPs.
+
+Usage: python scripts/build-gazetteer.py path/to/zips.json.bz2
+"""
+
+import bz2
+import gzip
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from us_states import STATE_ABBREVIATIONS
+
+
+def load_zips(path):
+    opener = bz2.open if str(path).endswith('.bz2') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+
+    base_dir = Path(__file__).parent.parent
+    out_path = base_dir / 'data' / 'us-gazetteer.tsv.gz'
+
+    zips = load_zips(sys.argv[1])
+    print(f"Loaded {len(zips)} ZIP codes from {sys.argv[1]}")
+
+    rows = []
+    places = defaultdict(list)
+    counties = defaultdict(list)
+    states = defaultdict(list)
+
+    for z in zips:
+        state = z.get('state')
+        if state not in STATE_ABBREVIATIONS or not z.get('active', True):
+            continue
+        # Military and unique (single-building) ZIPs don't describe an area
+        if z.get('zip_code_type') not in ('STANDARD', 'PO BOX'):
+            continue
+
+        try:
+            lat, lng = float(z['lat']), float(z['long'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if lat == 0 and lng == 0:
+            continue
+
+        rows.append(('zip', state, z['zip_code'], lat, lng))
+        if z.get('city'):
+            places[(state, z['city'])].append((lat, lng))
+        if z.get('county'):
+            counties[(state, z['county'])].append((lat, lng))
+        states[state].append((lat, lng))
+
+    def centroid(points):
+        return (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+    for kind, groups in (('place', places), ('county', counties)):
+        for (state, name), points in sorted(groups.items()):
+            lat, lng = centroid(points)
+            rows.append((kind, state, name, lat, lng))
+
+    for state, points in sorted(states.items()):
+        lat, lng = centroid(points)
+        rows.append(('state', state, STATE_ABBREVIATIONS[state], lat, lng))
+
+    with gzip.open(out_path, 'wt', encoding='utf-8') as f:
+        f.write('kind\tstate\tname\tlat\tlng\n')
+        for kind, state, name, lat, lng in rows:
+            f.write(f"{kind}\t{state}\t{name}\t{lat:.4f}\t{lng:.4f}\n")
+
+    counts = defaultdict(int)
+    for row in rows:
+        counts[row[0]] += 1
+
+    print(f"Wrote {len(rows)} centroids to {out_path}")
+    for kind in ('zip', 'place', 'county', 'state'):
+        print(f"  {kind}: {counts[kind]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Build data/nicu-snapshot.bin, the columnar snapshot the API loads on cold
+start (see nicu_snapshot.py for the format).
+
+Scripts that save through nicu_store.write_database() rebuild it
+automatically; run this after editing nicu-database.json any other way.
+
+Usage:
+    python scripts/build-snapshot.py
+"""
+
+import json
+from pathlib import Path
+
+from nicu_snapshot import json_digest, snapshot_path, write_snapshot
+
+
+def main():
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+    path = snapshot_path(db_path)
+
+    # Built from the JSON file itself: the snapshot stands in for exactly that file
+    with open(db_path, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    size = write_snapshot(path, database, json_digest(db_path))
+
+    print(f"✓ Wrote {path.name}: {len(database['nicus'])} records, {size / 1024:.0f} KB "
+          f"(JSON: {db_path.stat().st_size / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
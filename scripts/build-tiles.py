@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Build public/tiles/, the geohash-sharded static tiles the API fetches when it
+runs without a filesystem (see nicu_tiles.py for the layout).
+
+Scripts that save through nicu_store.write_database() rebuild them
+automatically; run this after editing nicu-database.json any other way.
+
+Usage:
+    python scripts/build-tiles.py
+"""
+
+import json
+from pathlib import Path
+
+from nicu_tiles import MANIFEST_NAME, tiles_dir, write_tiles
+
+
+def main():
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+    directory = tiles_dir(db_path)
+
+    with open(db_path, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    written, kept, removed = write_tiles(directory, database)
+
+    with open(directory / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    counts = [tile['count'] for tile in manifest['tiles'].values()]
+    located = sum(counts)
+
+    print(f"✓ {len(counts)} tiles for {located}/{manifest['total']} located NICUs "
+          f"(largest: {max(counts, default=0)}) in {directory.relative_to(base_dir.resolve())}")
+    print(f"  {written} written, {kept} unchanged, {removed} removed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Append-only checkpoint journal for the enrichment scripts.
+
+Instead of rewriting the whole nicu-database.json every N rows, each result is
+appended as one JSON line next to the database. On start-up the journal is
+replayed over the database (so an interrupted run resumes where it stopped),
+and at the end everything is compacted back into the database with an atomic
+rename before the journal is removed.
+
+Once the SQLite store exists (nicu_store.py), it is the system of record:
+each result is committed to its row in its own transaction instead of the
+journal, the database is loaded from the store, and compact() re-exports the
+JSON from the store rather than writing back this process's copy, so other
+scripts' updates made in the meantime are kept.
+
+Records are identified by key (nicu_store.record_keys): the nicudata URL,
+numbered #2, #3, ... for the few entries that share one, so each copy's
+results go to that copy. key() is the key a loaded record is journalled and
+stored under; the scripts' side files (not-found list, re-geocode queue)
+use it too.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from enrichment_meta import META_KEY, stamp
+from nicu_store import open_store, record_key, record_keys, write_database  # noqa: F401  (re-exported)
+
+
+class CheckpointJournal:
+    """JSONL journal of per-record field updates for one database file"""
+
+    def __init__(self, db_path, journal_path=None, source=None):
+        self.db_path = Path(db_path)
+        self.journal_path = Path(journal_path) if journal_path else self.db_path.with_suffix('.journal.jsonl')
+        self.source = source or Path(sys.argv[0]).name
+        self.file = None
+        self.appended = 0
+        self.replayed = 0
+        self.store = open_store(self.db_path)
+        # id() of each loaded record -> its key
+        self.keys = {}
+
+    def load(self):
+        """Load the database and replay any journal left over from an earlier run"""
+        if self.store is not None:
+            database, baseline = self.store.load_with_baseline()
+            self.keys = baseline.keys
+        else:
+            with open(self.db_path, 'r', encoding='utf-8') as f:
+                database = json.load(f)
+            self._key_records(database)
+
+        self.replayed = self.replay(database)
+        if self.replayed:
+            print(f"Resumed {self.replayed} checkpointed updates from {self.journal_path.name}")
+
+        return database
+
+    def _key_records(self, database):
+        nicus = database.get('nicus', [])
+        self.keys = {id(nicu): key for nicu, key in zip(nicus, record_keys(nicus))}
+
+    def key(self, nicu):
+        """The key a record from load() is journalled and stored under"""
+        return self.keys.get(id(nicu)) or record_key(nicu)
+
+    def replay(self, database):
+        """Apply journal entries to `database` in place; returns the number applied"""
+        if not self.journal_path.exists():
+            return 0
+
+        by_key = {self.key(n): n for n in database.get('nicus', [])}
+        applied = 0
+
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append; everything before it is intact
+                    continue
+
+                nicu = by_key.get(entry.get('key'))
+                if nicu is not None:
+                    nicu.update(entry.get('fields', {}))
+                    if entry.get('meta'):
+                        nicu.setdefault(META_KEY, {}).update(entry['meta'])
+                    if self.store is not None:
+                        # A journal left from before the store existed
+                        self.store.update(entry['key'], entry.get('fields', {}), entry.get('meta'), META_KEY)
+                    applied += 1
+
+        return applied
+
+    def record(self, nicu, fields, source=None, confidence=None, meta=None):
+        """
+        Apply `fields` to the record and append them to the journal (or commit
+        them to the store). Each field is stamped with enrichment metadata
+        (when, `source`, `confidence`); `meta` adds entries of its own, e.g. a
+        failed attempt (enrichment_meta.attempt_meta) with no fields at all.
+        """
+        key = self.key(nicu)
+        nicu.update(fields)
+        extra = meta or {}
+        meta = stamp(nicu, fields, source or self.source, confidence)
+        if extra:
+            nicu.setdefault(META_KEY, {}).update(extra)
+            meta.update(extra)
+
+        if self.store is not None:
+            # A new URL or name gives the row a new key
+            key = self.store.update(key, fields, meta, META_KEY)
+            if key is not None:
+                self.keys[id(nicu)] = key
+            self.appended += 1
+            return
+
+        if self.file is None:
+            self.file = open(self.journal_path, 'a', encoding='utf-8')
+
+        entry = {'key': key, 'fields': fields, 'meta': meta, 'source': self.source, 'at': time.time()}
+        self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.file.flush()
+        self.appended += 1
+
+    def remove(self, nicu):
+        """Drop a record from the store; without one, removing it from the database list is enough"""
+        if self.store is not None:
+            self.store.delete(self.key(nicu))
+
+    def compact(self, database):
+        """Fold everything into the database file atomically and drop the journal"""
+        if self.file is not None:
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
+
+        if self.store is not None:
+            # The store already has every update; export it as it is now
+            self.store.export_json(self.db_path)
+        else:
+            write_database(self.db_path, database)
+            # The journal starts over from the file as written, so key records as they are now
+            self._key_records(database)
+
+        if self.journal_path.exists():
+            self.journal_path.unlink()
@@ -1,18 +1,22 @@
 #!/usr/bin/env python3
 """
 Clean the NICU database to remove metadata from hospital names
+
+Records are cleaned in place (their geocodes, phones and URLs are kept) and
+saved through nicu_store, so only the records whose name, level or beds
+changed are written.
 """
 
-import json
 import re
 
+from nicu_store import load_database, write_database
+
 # Load the database
-with open('data/nicu-database.json', 'r') as f:
-    data = json.load(f)
+data = load_database('data/nicu-database.json')
 
-cleaned_nicus = []
+cleaned_nicus = data['nicus']
 
-for nicu in data['nicus']:
+for nicu in cleaned_nicus:
     # Extract clean hospital name (everything before "NICU Level" or similar markers)
     name = nicu['name']
 
@@ -34,23 +38,17 @@ for nicu in data['nicus']:
     if beds_match and not beds:
         beds = int(beds_match.group(1))
 
-    cleaned_nicus.append({
+    nicu.update({
         'name': clean_name,
-        'state': nicu['state'],
         'nicuLevel': nicu_level,
         'beds': beds
     })
 
 # Save cleaned data
-cleaned_data = {
-    'nicus': cleaned_nicus,
-    'total': len(cleaned_nicus),
-    'scraped_at': data.get('scraped_at'),
-    'cleaned_at': '2025-10-12'
-}
-
-with open('data/nicu-database.json', 'w') as f:
-    json.dump(cleaned_data, f, indent=2)
+data['total'] = len(cleaned_nicus)
+data['cleaned_at'] = '2025-10-12'
+
+write_database('data/nicu-database.json', data)
 
 print(f"Cleaned {len(cleaned_nicus)} NICU entries")
 print("\nSample cleaned entries:")
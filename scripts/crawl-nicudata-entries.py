@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Crawl every nicudata.com entry page in the database and backfill bed counts,
+street addresses and phone numbers.
+
+Each page is parsed once (nicudata_entry.parse_entry_page) for all three
+fields. Pages are fetched on a bounded thread pool over one pooled session,
+rate limited across threads, and kept in the snapshot store. Pages already in
+the store are revalidated with conditional GETs, so a refresh of unchanged
+pages is mostly 304s.
+
+The crawl is resumable: the frontier (URLs this crawl will visit) and the
+done-set are saved to data/entry-crawl-state.json as it goes, and an
+interrupted run picks up where it stopped. A page that fails for good (a 4xx
+other than 429) is marked done with its error; timeouts, 429s and 5xx are
+left out and retried by the resumed run. Once a crawl completes, the next run
+starts a fresh one over every URL.
+
+A few entries are shared by more than one record (the #2 keys of
+nicu_store.record_keys); each page's fields go to every record with its URL.
+
+Fields written:
+    beds            from the page (nicudata is the source of bed counts)
+    street_address  the street address on the page (used by geocode-all-hospitals.py)
+    phone           only filled in when the record has none
+
+Usage:
+    python scripts/crawl-nicudata-entries.py
+    python scripts/crawl-nicudata-entries.py --concurrency 8 --rate 4
+    python scripts/crawl-nicudata-entries.py --restart     # drop a half-finished crawl
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+
+from checkpoint_journal import CheckpointJournal
+from nicudata_entry import NICUDATA_RATE, make_session, parse_entry_page
+from rate_limit import get_limiter
+from snapshot_store import SnapshotStore
+
+STATE_PATH = 'data/entry-crawl-state.json'
+SAVE_EVERY = 50
+
+
+def load_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'frontier': [], 'done': {}}
+
+
+def save_state(path, state):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def is_permanent(status_code):
+    """Whether an HTTP error won't go away by retrying within this crawl"""
+    return 400 <= status_code < 500 and status_code != 429
+
+
+def fetch_entry(session, store, url, rate):
+    """
+    Fetch one entry page (conditionally if stored) and parse it.
+    Returns (status, fields or None) with status 'fetched', 'not-modified', or
+    'failed: ...' (permanent) or 'error: ...' (worth retrying) with no fields.
+    """
+    get_limiter('nicudata', rate).acquire()
+    try:
+        response = session.get(url, headers=store.conditional_headers(url), timeout=15)
+    except requests.RequestException as e:
+        return f"error: {e.__class__.__name__}", None
+
+    if response.status_code == 304:
+        store.touch(url)
+        status = 'not-modified'
+    elif response.status_code == 200:
+        store.put(url, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        status = 'fetched'
+    elif is_permanent(response.status_code):
+        return f"failed: HTTP {response.status_code}", None
+    else:
+        return f"error: HTTP {response.status_code}", None
+
+    html = store.get(url)
+    if html is None:
+        return 'error: missing snapshot', None
+    return status, parse_entry_page(html)
+
+
+def changed_fields(nicu, page):
+    """The record updates a parsed page calls for"""
+    fields = {}
+    if page['beds'] and page['beds'] != nicu.get('beds'):
+        fields['beds'] = page['beds']
+    if page['street_address'] and page['street_address'] != nicu.get('street_address'):
+        fields['street_address'] = page['street_address']
+    if page['phone'] and not nicu.get('phone'):
+        fields['phone'] = page['phone']
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill beds, addresses and phones from nicudata.com entry pages')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='pages fetched at once (default: 8)')
+    parser.add_argument('--rate', type=float, default=NICUDATA_RATE,
+                        help=f'requests per second to nicudata.com (default: {NICUDATA_RATE})')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='stop after this many pages (the rest stay in the frontier)')
+    parser.add_argument('--restart', action='store_true',
+                        help='discard an unfinished crawl and start over')
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+    state_path = base_dir / STATE_PATH
+
+    journal = CheckpointJournal(db_path)
+    database = journal.load()
+    by_url = {}
+    for nicu in database['nicus']:
+        if nicu.get('url'):
+            by_url.setdefault(nicu['url'], []).append(nicu)
+
+    state = {'frontier': [], 'done': {}} if args.restart else load_state(state_path)
+    if state['frontier'] and not args.restart:
+        print(f"Resuming crawl: {len(state['done'])}/{len(state['frontier'])} pages done")
+    else:
+        state = {'frontier': sorted(by_url), 'done': {}, 'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+        print(f"Starting crawl of {len(state['frontier'])} entry pages")
+
+    todo = [url for url in state['frontier'] if url not in state['done'] and url in by_url]
+    if args.limit is not None:
+        todo = todo[:args.limit]
+
+    store = SnapshotStore()
+    session = make_session(args.concurrency)
+    counts = {'fetched': 0, 'not-modified': 0, 'failed': 0, 'error': 0, 'updated': 0}
+    start = time.perf_counter()
+
+    print(f"Crawling {len(todo)} pages ({args.concurrency} at a time, {args.rate}/s)...\n")
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+            futures = {pool.submit(fetch_entry, session, store, url, args.rate): url for url in todo}
+
+            for i, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                nicus = by_url[url]
+                status, page = future.result()
+
+                if page is None:
+                    print(f"[{i}/{len(todo)}] ✗ {nicus[0]['name'][:50]}: {status}")
+                    if status.startswith('failed'):
+                        counts['failed'] += 1
+                        state['done'][url] = status
+                    else:
+                        # Left out of the done-set so a resumed crawl retries it
+                        counts['error'] += 1
+                    continue
+
+                counts[status] += 1
+                for nicu in nicus:
+                    fields = changed_fields(nicu, page)
+                    if fields:
+                        journal.record(nicu, fields, 'nicudata-entry')
+                        counts['updated'] += 1
+                        print(f"[{i}/{len(todo)}] ✓ {nicu['name'][:50]}: {', '.join(sorted(fields))}")
+
+                state['done'][url] = status
+
+                if i % SAVE_EVERY == 0:
+                    save_state(state_path, state)
+                    store.save()
+                    rate = i / (time.perf_counter() - start)
+                    print(f"  {i}/{len(todo)} pages, {rate:.1f} pages/s")
+    finally:
+        session.close()
+        store.save()
+        save_state(state_path, state)
+
+    finished = all(url in state['done'] for url in state['frontier'] if url in by_url)
+    if finished:
+        # Next run starts a fresh crawl
+        state['frontier'] = []
+        save_state(state_path, state)
+
+    print("\n💾 Saving database...")
+    journal.compact(database)
+
+    elapsed = time.perf_counter() - start
+    print(f"\nDone in {elapsed:.0f}s: {counts['fetched']} fetched, {counts['not-modified']} not modified, "
+          f"{counts['failed']} failed, {counts['error']} errors to retry, {counts['updated']} records updated")
+    if not finished:
+        print(f"Crawl not finished ({len(state['done'])}/{len(state['frontier'])}); run again to resume")
+    print(f"With beds: {sum(1 for n in database['nicus'] if n.get('beds'))}/{len(database['nicus'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,41 +1,34 @@
 #!/usr/bin/env python3
 """
-Remove duplicate hospitals with the same address.
-For each address, keep the hospital with the highest NICU level.
+Remove duplicate hospitals.
+For each group of duplicates, keep the hospital with the highest NICU level.
+
+Two records are duplicates when they have the same formatted_address (or, with
+no address, the same coordinates to 4 decimal places), or when they are within
+--radius meters of each other and their names are similar enough
+(name_match.name_similarity >= --threshold). A name that only adds
+words to the other's isn't enough ("Methodist Hospital - Henderson" is not
+"Methodist Hospital"), and, as in entity_resolution.py, a children's or
+women's unit is never a duplicate of a hospital without that qualifier
+("Norton Children's Hospital" vs "Norton Hospital").
+
+The fuzzy pass is blocked on a lat/lng grid whose cells are --radius wide:
+each record is only compared with the records in its own and neighbouring
+cells, so the number of comparisons grows with the number of nearby records,
+not with the square of the database size.
+
+Usage:
+    python scripts/deduplicate-by-address.py
+    python scripts/deduplicate-by-address.py --radius 300 --threshold 0.75 --dry-run
 """
 
-import json
+import argparse
+import math
 from collections import defaultdict
+from pathlib import Path
 
-# Load database
-with open('data/nicu-database.json', 'r') as f:
-    db = json.load(f)
-
-print(f'Starting with {len(db["nicus"])} hospitals\n')
-
-# Group by formatted_address OR coordinates
-by_location = defaultdict(list)
-
-for nicu in db['nicus']:
-    addr = nicu.get('formatted_address')
-    lat = nicu.get('lat')
-    lng = nicu.get('lng')
-
-    # Use address if available, otherwise use coordinates
-    if addr:
-        key = f'addr:{addr}'
-    elif lat and lng:
-        # Round to 4 decimal places (~11 meters precision)
-        key = f'coord:{round(lat, 4)},{round(lng, 4)}'
-    else:
-        # No location info at all
-        key = f'no-location:{nicu.get("name", "unknown")}'
-
-    by_location[key].append(nicu)
-
-# Deduplicate
-kept = []
-removed = []
+from name_match import name_similarity, qualifier_mismatch, variant_tokens
+from nicu_store import load_database, write_database
 
 # Level ranking (higher is better)
 level_rank = {
@@ -45,45 +38,198 @@ level_rank = {
     'Level I': 1,
 }
 
-for location_key, hospitals in by_location.items():
-    if len(hospitals) == 1:
-        # No duplicates, keep it
-        kept.append(hospitals[0])
-    else:
-        # Multiple hospitals at same location - keep the one with highest level
-        # Sort by level (highest first), then by name length (shorter first)
-        sorted_hospitals = sorted(
-            hospitals,
-            key=lambda h: (
-                -level_rank.get(h.get('nicuLevel', ''), 0),  # Higher level first
-                len(h.get('name', ''))  # Shorter name first (likely parent hospital)
+METERS_PER_DEGREE = 111320.0
+
+
+def location_key(nicu):
+    """The exact-match key: address if available, otherwise coordinates"""
+    addr = nicu.get('formatted_address')
+    lat = nicu.get('lat')
+    lng = nicu.get('lng')
+
+    if addr:
+        return f'addr:{addr}'
+    if lat and lng:
+        # Round to 4 decimal places (~11 meters precision)
+        return f'coord:{round(lat, 4)},{round(lng, 4)}'
+    # No location info at all
+    return None
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+
+class DisjointSet:
+    """Union-find over record indexes"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+            return True
+        return False
+
+
+def grid_blocks(nicus, radius_m):
+    """{(row, col): [index, ...]} for every record with coordinates, in cells radius_m tall"""
+    cell = radius_m / METERS_PER_DEGREE
+    blocks = defaultdict(list)
+    for i, nicu in enumerate(nicus):
+        if nicu.get('lat') and nicu.get('lng'):
+            blocks[(math.floor(nicu['lat'] / cell), math.floor(nicu['lng'] / cell))].append(i)
+    return blocks, cell
+
+
+def fuzzy_pairs(nicus, radius_m, threshold):
+    """
+    ([(i, j, distance_m, similarity)], comparisons) for nearby records with
+    similar names, comparing each record only with those in neighbouring cells
+    """
+    blocks, cell = grid_blocks(nicus, radius_m)
+    tokens = [variant_tokens(n.get('name')) for n in nicus]
+    comparisons = 0
+    pairs = []
+
+    for (row, col), members in blocks.items():
+        # A degree of longitude shrinks with latitude, so reach further east/west
+        lat = (row + 0.5) * cell
+        reach = int(math.ceil(1 / max(math.cos(math.radians(min(abs(lat) + cell, 89.0))), 1e-6)))
+
+        for d_row in (-1, 0, 1):
+            for d_col in range(-reach, reach + 1):
+                other = (row + d_row, col + d_col)
+                # Each pair of cells is visited once, from the lower one
+                if other < (row, col) or other not in blocks:
+                    continue
+                same_cell = other == (row, col)
+
+                for i in members:
+                    a = nicus[i]
+                    for j in blocks[other]:
+                        if same_cell and j <= i:
+                            continue
+                        comparisons += 1
+                        b = nicus[j]
+                        distance = haversine_m(a['lat'], a['lng'], b['lat'], b['lng'])
+                        if distance > radius_m or qualifier_mismatch(tokens[i][0], tokens[j][0]):
+                            continue
+                        similarity = name_similarity(tokens[i], tokens[j])
+                        if similarity >= threshold:
+                            pairs.append((i, j, distance, similarity))
+
+    return pairs, comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove duplicate hospitals')
+    parser.add_argument('--radius', type=float, default=250.0,
+                        help='max distance in meters between fuzzy duplicates (default: 250)')
+    parser.add_argument('--threshold', type=float, default=0.8,
+                        help='min name token-set similarity, 0-1 (default: 0.8)')
+    parser.add_argument('--dry-run', action='store_true', help="report duplicates without saving")
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+
+    # Load database
+    db = load_database(db_path)
+    nicus = db['nicus']
+
+    print(f'Starting with {len(nicus)} hospitals\n')
+
+    groups = DisjointSet(len(nicus))
+    reasons = {}
+
+    # Exact: same formatted_address OR coordinates
+    first_at = {}
+    for i, nicu in enumerate(nicus):
+        key = location_key(nicu)
+        if key is None:
+            continue
+        if key in first_at:
+            groups.union(first_at[key], i)
+            reasons[i] = key.split(':', 1)[1]
+        else:
+            first_at[key] = i
+
+    # Fuzzy: nearby with similar names
+    pairs, comparisons = fuzzy_pairs(nicus, args.radius, args.threshold)
+    for i, j, distance, similarity in pairs:
+        if groups.union(i, j):
+            reasons[j] = f'{distance:.0f} m apart, name similarity {similarity:.2f}'
+
+    all_pairs = len(nicus) * (len(nicus) - 1) // 2
+    print(f'Fuzzy pass: {comparisons:,} comparisons in grid blocks (all-pairs would be {all_pairs:,})\n')
+
+    by_group = defaultdict(list)
+    for i, nicu in enumerate(nicus):
+        by_group[groups.find(i)].append(i)
+
+    # Deduplicate
+    kept = []
+    removed = []
+
+    for members in by_group.values():
+        if len(members) == 1:
+            # No duplicates, keep it
+            kept.append(nicus[members[0]])
+            continue
+
+        # Keep the one with highest level, then the shorter name (likely parent hospital)
+        ranked = sorted(
+            members,
+            key=lambda i: (
+                -level_rank.get(nicus[i].get('nicuLevel', ''), 0),  # Higher level first
+                len(nicus[i].get('name', ''))  # Shorter name first
             )
         )
 
-        # Keep the best one
-        best = sorted_hospitals[0]
+        best = nicus[ranked[0]]
         kept.append(best)
 
         # Track what we're removing
-        for h in sorted_hospitals[1:]:
+        for i in ranked[1:]:
+            h = nicus[i]
             removed.append(h)
-            location_info = location_key.split(':', 1)[1] if ':' in location_key else location_key
-            print(f'Removing: {h["name"]} (Level {h.get("nicuLevel", "N/A")})')
-            print(f'  Keeping: {best["name"]} (Level {best.get("nicuLevel", "N/A")})')
-            print(f'  Location: {location_info}')
+            print(f'Removing: {h["name"]} ({h.get("nicuLevel") or "N/A"})')
+            print(f'  Keeping: {best["name"]} ({best.get("nicuLevel") or "N/A"})')
+            print(f'  Match: {reasons.get(i) or reasons.get(ranked[0]) or "same group"}')
             print()
 
-print(f'\n\nSummary:')
-print(f'Started with: {len(db["nicus"])} hospitals')
-print(f'Removed: {len(removed)} duplicates')
-print(f'Remaining: {len(kept)} hospitals')
+    print(f'\n\nSummary:')
+    print(f'Started with: {len(nicus)} hospitals')
+    print(f'Removed: {len(removed)} duplicates')
+    print(f'Remaining: {len(kept)} hospitals')
+
+    if args.dry_run:
+        print('\nDry run, database not changed')
+        return
+
+    if not removed:
+        return
+
+    # Update database, keeping the original order
+    kept_ids = {id(n) for n in kept}
+    db['nicus'] = [n for n in nicus if id(n) in kept_ids]
+    db['total'] = len(db['nicus'])
+
+    write_database(db_path, db)
 
-# Update database
-db['nicus'] = kept
-db['total'] = len(kept)
+    print(f'\nDatabase updated!')
 
-# Save
-with open('data/nicu-database.json', 'w') as f:
-    json.dump(db, f, indent=2)
 
-print(f'\nDatabase updated!')
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Enrich hospitals with coordinates, address, phone and place_id in ONE Places
+call each, instead of a Geocoding call (geocode-simple.py) plus two more calls
+(findplacefromtext + place/details in fetch-phone-numbers.py).
+
+Records that already have a place_id are refreshed with a single Place Details
+call. Results go through the checkpoint journal, so an interrupted run resumes.
+
+Usage:
+    python scripts/enrich-places.py              # only rows missing a field
+    python scripts/enrich-places.py --refresh    # every row
+"""
+
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from checkpoint_journal import CheckpointJournal
+from enrichment_meta import location_confidence
+from places_api import ENRICHED_FIELDS, lookup_hospital
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enrich hospitals with one Places call each')
+    parser.add_argument('--refresh', action='store_true',
+                        help='re-fetch every hospital, not just ones missing a field')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='number of requests in flight at once (default: 8)')
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+
+    api_key = os.environ.get('GoogleMaps') or os.environ.get('GOOGLE_MAPS_API_KEY')
+    if not api_key:
+        print("ERROR: GoogleMaps API key not found!")
+        print("Please set the GoogleMaps environment variable")
+        return
+
+    journal = CheckpointJournal(db_path)
+    database = journal.load()
+    nicus = database.get('nicus', [])
+
+    if args.refresh:
+        todo = list(nicus)
+    else:
+        todo = [n for n in nicus if not all(n.get(field) for field in ENRICHED_FIELDS)]
+
+    by_details = sum(1 for n in todo if n.get('place_id'))
+    print(f"Loaded {len(nicus)} hospitals")
+    print(f"Need enrichment: {len(todo)} ({by_details} via Place Details, {len(todo) - by_details} via Text Search)\n")
+
+    enriched = 0
+    not_found = 0
+    errors = 0
+    calls = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {pool.submit(lookup_hospital, nicu, api_key): nicu for nicu in todo}
+
+        for done, future in enumerate(as_completed(futures), 1):
+            nicu = futures[future]
+            place, error, used = future.result()
+            calls += used
+
+            if place:
+                fields = {k: v for k, v in place.items() if v is not None}
+                journal.record(nicu, fields, 'google-places', location_confidence(place.get('formatted_address')))
+                enriched += 1
+            elif error:
+                errors += 1
+                print(f"  ! {nicu['name'][:45]}: {error}")
+            else:
+                not_found += 1
+                print(f"  ✗ Not found: {nicu['name']}")
+
+            if done % 50 == 0:
+                print(f"[{done}/{len(todo)}] {enriched} enriched, {not_found} not found, {errors} errors")
+
+    print("\n💾 Saving final results...")
+    journal.compact(database)
+
+    print(f"\n✓ Enrichment complete!")
+    print(f"  Enriched: {enriched}")
+    print(f"  Not found: {not_found}")
+    print(f"  Errors (retry later): {errors}")
+    print(f"  Places calls: {calls} (vs ~{len(todo) * 3} with geocode + find place + details)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Per-field enrichment metadata.
+
+Every enriched field gets an entry under the record's `enriched` key:
+    "enriched": {"lat": {"at": "2025-10-20T14:03:11Z", "source": "google-places", "confidence": 0.9}, ...}
+refresh-stale.py uses it to pick the stalest / least trusted records first.
+Records written before this existed have no entry and count as stalest.
+
+A lookup that found nothing (or failed) is stamped under ATTEMPT_KEY with how
+many times in a row that has happened, and the record is left alone until
+retry_delay() has passed, so the same unfindable rows don't use up every run.
+Any field enriched after the attempt makes it obsolete.
+"""
+
+import re
+import time
+from datetime import datetime, timezone
+
+META_KEY = 'enriched'
+
+# Entry under META_KEY for the last failed lookup of the record as a whole
+ATTEMPT_KEY = '_attempt'
+
+# A failed lookup is retried a week later, doubling per failed attempt up to ~3 months
+RETRY_AFTER = 7 * 24 * 3600
+RETRY_AFTER_MAX = 90 * 24 * 3600
+
+# Confidence of a location by what the provider actually resolved
+PRECISION_CONFIDENCE = {
+    'street': 0.9,
+    'zip': 0.5,
+    'place': 0.4,
+    'county': 0.3,
+    'state': 0.1,
+}
+
+_street_number_re = re.compile(r'\d')
+
+
+def now_iso():
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+def stamp(nicu, fields, source, confidence=None, at=None):
+    """Record when/where each of `fields` came from; returns the metadata that was applied"""
+    entry = {'at': at or now_iso(), 'source': source}
+    if confidence is not None:
+        entry['confidence'] = confidence
+
+    meta = {field: dict(entry) for field in fields if field != META_KEY}
+    nicu.setdefault(META_KEY, {}).update(meta)
+    return meta
+
+
+def retry_delay(attempts):
+    """Seconds to wait before looking a record up again after `attempts` failures in a row"""
+    return min(RETRY_AFTER * 2 ** (attempts - 1), RETRY_AFTER_MAX)
+
+
+def _last_attempt(nicu):
+    # The failed attempt, unless a field has been enriched since
+    meta = nicu.get(META_KEY, {})
+    attempt = meta.get(ATTEMPT_KEY)
+    if not attempt:
+        return None
+    if any(entry['at'] > attempt['at'] for field, entry in meta.items() if field != ATTEMPT_KEY and entry):
+        return None
+    return attempt
+
+
+def attempt_meta(nicu, result, at=None):
+    """Metadata for a failed lookup (`result` is e.g. 'not_found' or 'error'), counting repeats"""
+    previous = _last_attempt(nicu) or {}
+    return {ATTEMPT_KEY: {'at': at or now_iso(), 'result': result, 'attempts': previous.get('attempts', 0) + 1}}
+
+
+def retry_after(nicu):
+    """Epoch seconds before which a record whose last lookup failed shouldn't be tried again, or None"""
+    attempt = _last_attempt(nicu)
+    if not attempt:
+        return None
+    at = datetime.strptime(attempt['at'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    return at.timestamp() + retry_delay(attempt['attempts'])
+
+
+def location_confidence(formatted_address, precision=None):
+    """Estimate how trustworthy a geocode is from its precision tag or its formatted address"""
+    if precision in PRECISION_CONFIDENCE:
+        return PRECISION_CONFIDENCE[precision]
+    if not formatted_address:
+        return PRECISION_CONFIDENCE['county']
+
+    parts = formatted_address.split(',')
+    if _street_number_re.search(parts[0]) or len(parts) > 3:
+        return PRECISION_CONFIDENCE['street']
+    if len(parts) <= 2:
+        return PRECISION_CONFIDENCE['state']
+    return PRECISION_CONFIDENCE['place']
+
+
+def field_age_days(nicu, field, now=None):
+    """Days since `field` was enriched, or None if it never was (or predates metadata)"""
+    entry = nicu.get(META_KEY, {}).get(field)
+    if not entry:
+        return None
+    at = datetime.strptime(entry['at'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return (now - at).total_seconds() / 86400
+
+
+def field_confidence(nicu, field):
+    entry = nicu.get(META_KEY, {}).get(field)
+    if entry and 'confidence' in entry:
+        return entry['confidence']
+    return None
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Match records from one source (neonatologysolutions bed counts) to the
+nicudata records in the database that describe the same hospital.
+
+Candidates come from an inverted index over normalized name tokens
+(name_match.name_tokens), kept per state, so a record is only scored against
+the hospitals in its state that share at least one distinguishing token.
+Tokens are weighted by rarity within the state (IDF), so a shared "Inspira"
+counts for more than a shared "Saint". The score blends the weighted overlap
+(subset names score high) with the weighted Jaccard (extra words cost), taking
+the best of the target's name and its parenthetical aliases ("Grace Hospital
+(Sinai Grace Hospital)"), and is cut when only one side is a children's or
+women's unit. A hit on an alias alone scores below the same hit on the name:
+"Northshore University Hospital at Forest Hills (Long Island Jewish)" is not
+Long Island Jewish Medical Center. A match must clear a threshold and beat the
+runner-up by a margin.
+
+Names alone aren't enough ("Beth Israel Deaconess Medical Center" is a
+different hospital from "Beth Israel Deaconess Plymouth"), so when both
+records have coordinates a candidate more than MAX_DISTANCE_KM away is never
+a match, however well its name scores.
+
+Decisions are kept in a match table (data/entity-matches.json). A record
+whose name, state and coordinates are unchanged reuses its stored match; a
+stored non-match is only re-scored when the nicudata records of its state
+change.
+"""
+
+import hashlib
+import json
+import math
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from enrichment_meta import now_iso
+from name_match import ALIAS_FACTOR, name_tokens, name_variants, qualifier_mismatch
+from nicu_upsert import match_key
+
+MATCH_TABLE_PATH = Path(__file__).parent.parent / 'data' / 'entity-matches.json'
+
+THRESHOLD = 0.85
+MARGIN = 0.1
+
+# Score multiplier when only one of the names is a children's / women's unit
+QUALIFIER_PENALTY = 0.8
+
+# Two records with coordinates further apart than this are different hospitals
+MAX_DISTANCE_KM = 5.0
+
+TABLE_VERSION = 2
+
+
+def fingerprint(*parts):
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def source_fingerprint(record):
+    """Changes whenever the fields matching depends on change"""
+    return fingerprint(record.get('name') or '', record.get('state') or '',
+                       str(record.get('lat')), str(record.get('lng')))
+
+
+def coordinates(record):
+    """(lat, lng) of a record, or None"""
+    lat, lng = record.get('lat'), record.get('lng')
+    if isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+        return lat, lng
+    return None
+
+
+def distance_km(a, b):
+    """Great-circle distance between two (lat, lng) pairs"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+def too_far(a, b, max_km=MAX_DISTANCE_KM):
+    """True when both records have coordinates and they're more than max_km apart"""
+    point_a, point_b = coordinates(a), coordinates(b)
+    return point_a is not None and point_b is not None and distance_km(point_a, point_b) > max_km
+
+
+class StateTokenIndex:
+    """Per-state inverted index of target name tokens"""
+
+    def __init__(self, targets):
+        self.targets = targets
+        # Token sets of each target's name variants (name, and each parenthetical alias)
+        self.variants = [[name_tokens(v) for v in name_variants(t.get('name'))] for t in targets]
+        self.postings = defaultdict(lambda: defaultdict(list))   # state -> token -> [target index]
+        by_state = defaultdict(list)
+
+        for i, target in enumerate(targets):
+            state = target.get('state') or ''
+            by_state[state].append(i)
+            for token in frozenset().union(*self.variants[i]):
+                self.postings[state][token].append(i)
+
+        self.sizes = {state: len(ids) for state, ids in by_state.items()}
+        self.versions = {
+            state: fingerprint(*sorted(
+                f"{match_key(targets[i])}={targets[i].get('name')}@{coordinates(targets[i])}" for i in ids
+            ))
+            for state, ids in by_state.items()
+        }
+
+    def version(self, state):
+        """Fingerprint of a state's targets; changes when one is added, removed or renamed"""
+        return self.versions.get(state or '', '')
+
+    def _weight(self, state, token):
+        # Tokens no target has get the highest weight
+        df = len(self.postings[state].get(token, ()))
+        return math.log(1 + (self.sizes[state] + 1) / (df + 1))
+
+    def similarity(self, state, a, b):
+        """Blend of IDF-weighted overlap (shared / smaller name) and Jaccard (shared / union)"""
+        shared = sum(self._weight(state, t) for t in a & b)
+        if not shared:
+            return 0.0
+        weight_a = sum(self._weight(state, t) for t in a)
+        weight_b = sum(self._weight(state, t) for t in b)
+        overlap = shared / min(weight_a, weight_b)
+        jaccard = shared / (weight_a + weight_b - shared)
+        return 0.5 * overlap + 0.5 * jaccard
+
+    def score(self, state, tokens, i):
+        """Best similarity of `tokens` to target i's name, or (discounted) one of its aliases"""
+        name, *aliases = self.variants[i]
+        best = self.similarity(state, tokens, name)
+        for alias in aliases:
+            best = max(best, ALIAS_FACTOR * self.similarity(state, tokens, alias))
+        if qualifier_mismatch(tokens, name):
+            best *= QUALIFIER_PENALTY
+        return best
+
+    def best_match(self, record, threshold=THRESHOLD, margin=MARGIN):
+        """
+        (target, score) for the best-scoring target in the record's state, or
+        (None, best score) when nothing clears the threshold or it's a near tie
+        """
+        state = record.get('state') or ''
+        postings = self.postings.get(state)
+        if not postings:
+            return None, 0.0
+
+        tokens = name_tokens(record.get('name'))
+        candidates = {
+            i for token in tokens for i in postings.get(token, ())
+            if not too_far(record, self.targets[i])
+        }
+
+        ranked = sorted(
+            ((self.score(state, tokens, i), i) for i in candidates),
+            reverse=True
+        )
+        if not ranked:
+            return None, 0.0
+
+        best_score, best = ranked[0]
+        if best_score < threshold:
+            return None, best_score
+        if len(ranked) > 1 and best_score - ranked[1][0] < margin:
+            return None, best_score
+        return self.targets[best], best_score
+
+
+class MatchTable:
+    """Persisted source-record -> target decisions"""
+
+    def __init__(self, path=MATCH_TABLE_PATH):
+        self.path = Path(path)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        # Decisions made under older matching rules are re-scored
+        self.matches = data.get('matches', {}) if data.get('version') == TABLE_VERSION else {}
+        self.dirty = False
+
+    def lookup(self, key, record, index):
+        """
+        The stored decision for a source record if it still holds, else None.
+        Returns {'target': match_key or None, 'score': ...}.
+        """
+        entry = self.matches.get(key)
+        if entry is None or entry.get('fingerprint') != source_fingerprint(record):
+            return None
+        if entry.get('target') is None and entry.get('targets_version') != index.version(record.get('state')):
+            return None
+        return entry
+
+    def store(self, key, record, index, target, score):
+        self.matches[key] = {
+            'fingerprint': source_fingerprint(record),
+            'target': match_key(target) if target is not None else None,
+            'score': round(score, 3),
+            'targets_version': index.version(record.get('state')),
+            'at': now_iso(),
+        }
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': TABLE_VERSION, 'matches': self.matches}, f, indent=1, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
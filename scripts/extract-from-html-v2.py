@@ -1,75 +1,31 @@
 #!/usr/bin/env python3
 """
 Extract hospital data from downloaded HTML - Version 2
-"""
-
-from bs4 import BeautifulSoup
-import json
-import re
-
-html_file = '/Users/ruthellis/Downloads/00. ALCEA/NICUNEARBY/Database – NICU Data.html'
-
-print("Reading HTML file...")
-with open(html_file, 'r', encoding='utf-8') as f:
-    html_content = f.read()
-
-print("Parsing HTML...")
-soup = BeautifulSoup(html_content, 'html.parser')
-
-nicus = []
 
-# Find all h2 tags with hospital names
-hospital_titles = soup.find_all('h2', class_='elementor-heading-title')
-print(f"Found {len(hospital_titles)} hospital title elements")
+Streams the page through nicudata_html.ListingParser (one card in memory at a
+time). Unlike the old BeautifulSoup find_next() walk, which emitted a record
+for every heading (state, county and level headings too), it writes one
+record per card and includes the card's entry url.
+scripts/benchmark-html-extract.py times the two and compares the card records.
 
-# Also find all the data rows
-# Pattern: h2 with hospital name, followed by divs with state, county, level
-for i, title_elem in enumerate(hospital_titles):
-    hospital_name = title_elem.get_text(strip=True)
-
-    # Try to find associated data
-    # Look in the parent and sibling elements for state, county, level info
-    parent = title_elem.find_parent()
-
-    # Search for state (2-letter abbreviation)
-    state = None
-    county = None
-    level = None
-
-    # Search siblings and nearby elements
-    current = title_elem
-    for _ in range(20):  # Check next 20 elements
-        current = current.find_next()
-        if not current:
-            break
-
-        text = current.get_text(strip=True)
-
-        # State (2 capital letters)
-        if not state and len(text) == 2 and text.isupper() and text.isalpha():
-            state = text
+Usage:
+    python scripts/extract-from-html-v2.py "Database – NICU Data.html"
+"""
 
-        # Level (single digit 1-4)
-        if not level and text.isdigit() and text in ['1', '2', '3', '4']:
-            level_map = {'1': 'I', '2': 'II', '3': 'III', '4': 'IV'}
-            level = f"Level {level_map[text]}"
+import argparse
+import json
 
-        # County (any text that's not too short or long)
-        if state and not county and not level:
-            if 3 < len(text) < 50 and not text.isdigit():
-                county = text
+from nicudata_html import iter_listing
 
-        if state and level:
-            break
+parser = argparse.ArgumentParser(description='Extract hospitals from a saved "Database – NICU Data" page')
+parser.add_argument('html_file', help='path to the saved page, e.g. "Database – NICU Data.html"')
+parser.add_argument('--output', default='data/nicudata-hospitals.json',
+                    help='where to write the records (default: data/nicudata-hospitals.json)')
+args = parser.parse_args()
 
-    if hospital_name and state:
-        nicus.append({
-            'name': hospital_name,
-            'state': state,
-            'county': county or '',
-            'nicuLevel': level or '',
-            'beds': None
-        })
+# Stream the page one listing card at a time instead of building a full soup
+print(f"Streaming {args.html_file}...")
+nicus = list(iter_listing(args.html_file))
 
 print(f"\nExtracted {len(nicus)} hospitals")
 
@@ -82,10 +38,10 @@ if nicus:
         'scraped_at': '2025-10-12'
     }
 
-    with open('data/nicudata-hospitals.json', 'w') as f:
+    with open(args.output, 'w') as f:
         json.dump(output, f, indent=2)
 
-    print(f"Saved to data/nicudata-hospitals.json")
+    print(f"Saved to {args.output}")
 
     # Show sample
     print("\nFirst 20 entries:")
@@ -2,34 +2,80 @@
 """
 Fetch phone numbers for all hospitals using Google Places API
 One-time operation to add phone numbers to database
+
+Lookups run on a bounded worker pool and back off on OVER_QUERY_LIMIT.
+The place_id found for each hospital is stored on the record, so later runs
+skip the Find Place call; a place_id Google no longer knows is cleared so the
+next run searches again. Hospitals Google has no phone for are remembered in
+data/phone-not-found.json with a retry-after time (saved every SAVE_EVERY
+results, so an interrupted run keeps them), so reruns only touch rows that
+actually need it.
 """
 
-import json
+import argparse
+import random
 import requests
 import os
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def search_place_and_get_phone(name, address, api_key):
-    """Search for a place and get its phone number"""
-    try:
-        # First, search for the place to get place_id
-        search_query = f"{name}, {address}"
-        search_url = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
-        search_params = {
-            'input': search_query,
-            'inputtype': 'textquery',
-            'fields': 'place_id',
-            'key': api_key
-        }
+from checkpoint_journal import CheckpointJournal
+from enrichment_meta import retry_delay
+from phone_not_found import is_deferred, load_not_found, save_not_found
+from rate_limit import get_limiter
+
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 2.0
+
+# Results between saves of the not-found list
+SAVE_EVERY = 25
+
+
+class QuotaExceeded(Exception):
+    """Still OVER_QUERY_LIMIT after all retries"""
+
+
+def get_places_json(url, params):
+    """GET a legacy Places endpoint, retrying with exponential backoff on OVER_QUERY_LIMIT"""
+    for attempt in range(MAX_RETRIES):
+        get_limiter('google').acquire()
+        data = requests.get(url, params=params, timeout=10).json()
+
+        if data.get('status') != 'OVER_QUERY_LIMIT':
+            return data
 
-        search_resp = requests.get(search_url, params=search_params, timeout=10)
-        search_data = search_resp.json()
+        time.sleep(BACKOFF_SECONDS * (2 ** attempt) + random.uniform(0, 1))
 
-        if search_data.get('status') != 'OK' or not search_data.get('candidates'):
-            return None
+    raise QuotaExceeded(url)
 
-        place_id = search_data['candidates'][0]['place_id']
+
+def search_place_and_get_phone(name, address, api_key, place_id=None):
+    """
+    Search for a place and get its phone number.
+    Returns (phone, place_id, status) where status is 'found', 'not_found',
+    'stale_place_id' (the stored place_id no longer exists) or 'error'.
+    """
+    try:
+        if not place_id:
+            # First, search for the place to get place_id
+            search_query = f"{name}, {address}"
+            search_url = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
+            search_params = {
+                'input': search_query,
+                'inputtype': 'textquery',
+                'fields': 'place_id',
+                'key': api_key
+            }
+
+            search_data = get_places_json(search_url, search_params)
+
+            if search_data.get('status') == 'ZERO_RESULTS':
+                return None, None, 'not_found'
+            if search_data.get('status') != 'OK' or not search_data.get('candidates'):
+                return None, None, 'error'
+
+            place_id = search_data['candidates'][0]['place_id']
 
         # Now get phone number using place_id
         details_url = "https://maps.googleapis.com/maps/api/place/details/json"
@@ -39,19 +85,30 @@ def search_place_and_get_phone(name, address, api_key):
             'key': api_key
         }
 
-        details_resp = requests.get(details_url, params=details_params, timeout=10)
-        details_data = details_resp.json()
+        details_data = get_places_json(details_url, details_params)
 
         if details_data.get('status') == 'OK' and details_data.get('result'):
-            return details_data['result'].get('formatted_phone_number')
+            phone = details_data['result'].get('formatted_phone_number')
+            return phone, place_id, 'found' if phone else 'not_found'
+
+        if details_data.get('status') in ('NOT_FOUND', 'INVALID_REQUEST'):
+            # place_id went stale; drop it so the next run searches again
+            return None, None, 'stale_place_id'
 
-        return None
+        return None, place_id, 'error'
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
-        return None
+        return None, place_id, 'error'
 
 def main():
+    parser = argparse.ArgumentParser(description='Fetch phone numbers using Google Places API')
+    parser.add_argument('--concurrency', type=int, default=6,
+                        help='hospitals looked up at once (default: 6)')
+    parser.add_argument('--retry-not-found', action='store_true',
+                        help='ignore retry-after times in the not-found list')
+    args = parser.parse_args()
+
     # Load API key
     api_key = os.environ.get('GoogleMaps')
     if not api_key:
@@ -60,53 +117,89 @@ def main():
 
     # Load database
     db_path = 'data/nicu-database.json'
-    with open(db_path, 'r') as f:
-        db = json.load(f)
+    journal = CheckpointJournal(db_path)
+    db = journal.load()
 
     print(f"Loaded database with {len(db['nicus'])} hospitals")
 
-    # Find hospitals that need phone numbers
-    need_phone = [n for n in db['nicus'] if not n.get('phone')]
-    print(f"Need to fetch phone numbers for {len(need_phone)} hospitals\n")
+    # Find hospitals that need phone numbers, minus ones that recently came back empty
+    now = time.time()
+    not_found = load_not_found()
+    need_phone = []
+    deferred = 0
+    for n in db['nicus']:
+        if n.get('phone'):
+            continue
+        if is_deferred(not_found, journal.key(n), now) and not args.retry_not_found:
+            deferred += 1
+            continue
+        need_phone.append(n)
+
+    print(f"Need to fetch phone numbers for {len(need_phone)} hospitals")
+    print(f"Deferred (not found recently): {deferred}\n")
 
     # Fetch phone numbers
     success_count = 0
     fail_count = 0
+    stale_count = 0
+    error_count = 0
 
-    for i, nicu in enumerate(need_phone, 1):
+    def lookup(nicu):
         # Build address string
         if nicu.get('formatted_address'):
             address = nicu['formatted_address']
         else:
             address = f"{nicu.get('county', '')}, {nicu.get('state', '')}"
-
-        print(f"[{i}/{len(need_phone)}] {nicu['name'][:45]}", end=' ', flush=True)
-
-        phone = search_place_and_get_phone(nicu['name'], address, api_key)
-
-        if phone:
-            nicu['phone'] = phone
-            success_count += 1
-            print(f"-> {phone}")
-        else:
-            fail_count += 1
-            print("-> Not found")
-
-        # Save progress every 50 hospitals
-        if i % 50 == 0:
-            print("Saving progress...")
-            with open(db_path, 'w') as f:
-                json.dump(db, f, indent=2)
-
-        # Rate limiting - 0.05 seconds between requests
-        time.sleep(0.05)
+        return search_place_and_get_phone(nicu['name'], address, api_key, nicu.get('place_id'))
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {pool.submit(lookup, nicu): nicu for nicu in need_phone}
+
+        try:
+            for i, future in enumerate(as_completed(futures), 1):
+                nicu = futures[future]
+                key = journal.key(nicu)
+                phone, place_id, status = future.result()
+
+                fields = {}
+                if place_id != nicu.get('place_id'):
+                    fields['place_id'] = place_id
+                if phone:
+                    fields['phone'] = phone
+                if fields:
+                    journal.record(nicu, fields, 'google-places')
+
+                if status == 'found':
+                    not_found.pop(key, None)
+                    success_count += 1
+                    print(f"[{i}/{len(need_phone)}] {nicu['name'][:45]} -> {phone}")
+                elif status == 'not_found':
+                    attempts = not_found.get(key, {}).get('attempts', 0) + 1
+                    not_found[key] = {'name': nicu['name'], 'attempts': attempts,
+                                      'retry_after': now + retry_delay(attempts)}
+                    fail_count += 1
+                    print(f"[{i}/{len(need_phone)}] {nicu['name'][:45]} -> Not found")
+                elif status == 'stale_place_id':
+                    # place_id cleared above; not a miss, so the next run searches again
+                    stale_count += 1
+                    print(f"[{i}/{len(need_phone)}] {nicu['name'][:45]} -> Stale place_id (will search again)")
+                else:
+                    # Transient failure: leave it out of the not-found list so the next run retries
+                    error_count += 1
+                    print(f"[{i}/{len(need_phone)}] {nicu['name'][:45]} -> Error (will retry)")
+
+                if i % SAVE_EVERY == 0:
+                    save_not_found(not_found)
+        finally:
+            # Also on Ctrl-C / a crash, so the misses found so far aren't looked up again
+            save_not_found(not_found)
 
     # Save final results
     print("\nSaving final...")
-    with open(db_path, 'w') as f:
-        json.dump(db, f, indent=2)
+    journal.compact(db)
 
-    print(f"\nDONE! Success: {success_count}, Failed: {fail_count}")
+    print(f"\nDONE! Success: {success_count}, Not found: {fail_count}, Stale place_id: {stale_count}, "
+          f"Errors: {error_count}")
 
 if __name__ == '__main__':
     main()
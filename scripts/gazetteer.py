@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Offline geocoder backed by the bundled US gazetteer (data/us-gazetteer.tsv.gz).
+
+Resolves ZIP, place (city), county and state names to centroids from an
+in-memory index, with no network and no rate limit. Results are approximate
+(area centroids, not buildings), so they are tagged with their precision and
+best used as the first pass of a bulk import or the last resort of the
+provider chain. Regenerate the table with scripts/build-gazetteer.py.
+"""
+
+import gzip
+import re
+from pathlib import Path
+
+from us_states import state_abbrev
+
+DEFAULT_PATH = Path(__file__).parent.parent / 'data' / 'us-gazetteer.tsv.gz'
+
+_zip_re = re.compile(r'\b([A-Z]{2})\s+(\d{5})(?:-\d{4})?\b')
+_county_suffix_re = re.compile(r'\s+(county|parish|borough|census area|municipality|city and borough)$')
+_punct_re = re.compile(r'[^\w\s]')
+_whitespace_re = re.compile(r'\s+')
+
+
+def normalize_name(name):
+    """Lowercase, drop punctuation and "County"/"Parish" suffixes"""
+    name = _punct_re.sub(' ', name.lower().replace('saint ', 'st '))
+    name = _whitespace_re.sub(' ', name).strip()
+    return _county_suffix_re.sub('', name)
+
+
+class Gazetteer:
+    """In-memory ZIP/place/county/state centroid index"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.zips = {}
+        self.places = {}
+        self.counties = {}
+        self.states = {}
+
+        indexes = {'zip': self.zips, 'place': self.places, 'county': self.counties}
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            next(f)  # header
+            for line in f:
+                kind, state, name, lat, lng = line.rstrip('\n').split('\t')
+                point = (float(lat), float(lng), name)
+
+                if kind == 'state':
+                    self.states[state] = point
+                elif kind == 'zip':
+                    self.zips[name] = point + (state,)
+                else:
+                    indexes[kind][(state, normalize_name(name))] = point
+
+    def _result(self, lat, lng, formatted_address, precision):
+        return {
+            'lat': lat,
+            'lng': lng,
+            'formatted_address': formatted_address,
+            'precision': precision,
+        }
+
+    def geocode(self, address):
+        """
+        Resolve "{name}, {county}, {state}, USA" style queries (or any address
+        carrying a ZIP code). Returns None if nothing in the table matches.
+        """
+        # A ZIP code is the most precise thing we can resolve offline
+        match = _zip_re.search(address)
+        if match and match.group(2) in self.zips:
+            lat, lng, name, state = self.zips[match.group(2)]
+            return self._result(lat, lng, f"{state} {name}, USA", 'zip')
+
+        parts = [p.strip() for p in address.split(',') if p.strip()]
+        if parts and parts[-1].upper() in ('USA', 'US', 'UNITED STATES'):
+            parts = parts[:-1]
+
+        # The state is the last part we recognise
+        state = None
+        while parts and not state:
+            state = state_abbrev(parts.pop())
+        if not state:
+            return None
+
+        # Remaining parts are "{name}, {county}" - the county may itself be
+        # "Cook, DuPage" or "Adams/Jefferson", so take the first one we know.
+        candidates = []
+        for part in reversed(parts):
+            candidates.extend(p for p in part.split('/') if p.strip())
+
+        for candidate in candidates:
+            key = (state, normalize_name(candidate))
+            if key in self.counties:
+                lat, lng, name = self.counties[key]
+                return self._result(lat, lng, f"{name}, {state}, USA", 'county')
+
+        for candidate in candidates:
+            key = (state, normalize_name(candidate))
+            if key in self.places:
+                lat, lng, name = self.places[key]
+                return self._result(lat, lng, f"{name}, {state}, USA", 'place')
+
+        if state in self.states:
+            lat, lng, name = self.states[state]
+            return self._result(lat, lng, f"{name}, USA", 'state')
+
+        return None
@@ -1,98 +1,178 @@
 #!/usr/bin/env python3
 """
 Geocode all hospitals in the NICU database and add latitude/longitude coordinates.
-Strategy: Try to get address from nicudata.com URL first, then fall back to name+county+state.
+Strategy: Use the street address crawled from nicudata.com (crawl-nicudata-entries.py),
+else scrape it from the record's URL, then fall back to name+county+state.
+
+--gazetteer first|last adds the offline gazetteer (scripts/gazetteer.py) to the
+provider chain. "first" resolves ZIP, place and county-level coordinates
+with no network at all (and skips URL scraping); a state centroid is too
+coarse, so those addresses still go to Google / Nominatim and only fall back
+to it. "last" only uses the gazetteer when every provider fails.
+
+--queue re-geocodes only the rows listed in data/regeocode-queue.json (written
+by validate-geocodes.py), even though they already have coordinates.
 """
 
+import argparse
 import json
-import time
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import requests
-from bs4 import BeautifulSoup
-import re
 
-def scrape_address_from_url(url):
+from checkpoint_journal import CheckpointJournal
+from enrichment_meta import location_confidence
+from gazetteer import Gazetteer
+from geocode_cache import GeocodeCache
+from nicudata_entry import NICUDATA_RATE, SCRAPE_HEADERS, make_session, parse_entry_page
+from rate_limit import get_limiter
+
+# Gazetteer precisions good enough to skip the online providers with --gazetteer first
+FIRST_PASS_PRECISIONS = ('zip', 'place', 'county')
+
+
+def scrape_address_from_url(url, session=None, cache=None):
     """Scrape the actual hospital address from nicudata.com"""
     if not url:
         return None
 
+    if cache:
+        hit, cached = cache.get('nicudata-scrape', url)
+        if hit:
+            return cached
+
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        get_limiter('nicudata', NICUDATA_RATE).acquire()
+        response = (session or requests).get(url, headers=SCRAPE_HEADERS, timeout=10)
 
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Try to find address in common HTML patterns
-            text = soup.get_text()
+            address = parse_entry_page(response.text)['street_address']
 
-            # Pattern: Street address with number
-            address_pattern = r'\d+\s+[\w\s]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Way|Court|Ct|Circle|Cir|Parkway|Pkwy)[,\s]+[\w\s]+,\s*[A-Z]{2}\s+\d{5}'
-            match = re.search(address_pattern, text, re.IGNORECASE)
-
-            if match:
-                return match.group(0).strip()
+            if cache:
+                cache.put('nicudata-scrape', url, address)
+            return address
 
         return None
     except Exception as e:
         return None
 
-def geocode_address(address, api_key=None):
-    """Geocode an address using Google Maps or Nominatim"""
+
+def scrape_addresses(urls, concurrency, cache=None):
+    """Scrape many entry pages in parallel over one pooled session; returns {url: address}"""
+    session = make_session(concurrency)
+    addresses = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(scrape_address_from_url, url, session, cache): url for url in urls}
+        for done, future in enumerate(as_completed(futures), 1):
+            addresses[futures[future]] = future.result()
+            if done % 100 == 0:
+                print(f"  Scraped {done}/{len(urls)} pages...")
+
+    session.close()
+    return addresses
+
+def geocode_address(address, api_key=None, cache=None, gazetteer=None, gazetteer_position='last'):
+    """Geocode an address using Google Maps or Nominatim (and optionally the offline gazetteer)"""
+
+    fallback = None
+    if gazetteer and gazetteer_position == 'first':
+        result = gazetteer.geocode(address)
+        if result and result.get('precision') in FIRST_PASS_PRECISIONS:
+            return dict(result, source='gazetteer')
+        # A state centroid is kept only in case every provider fails
+        fallback = result
 
     # Try Google Maps first if API key is available
     if api_key:
+        hit, cached = cache.get('google', address) if cache else (False, None)
+        if cached:
+            return dict(cached, source='google')
+
+        if not hit:
+            try:
+                url = f"https://maps.googleapis.com/maps/api/geocode/json"
+                params = {
+                    'address': address,
+                    'key': api_key
+                }
+                get_limiter('google').acquire()
+                response = requests.get(url, params=params, timeout=10)
+                data = response.json()
+
+                result = None
+                if data.get('results'):
+                    location = data['results'][0]['geometry']['location']
+                    result = {
+                        'lat': location['lat'],
+                        'lng': location['lng'],
+                        'formatted_address': data['results'][0].get('formatted_address')
+                    }
+
+                if cache and data.get('status') in ('OK', 'ZERO_RESULTS'):
+                    cache.put('google', address, result)
+
+                if result:
+                    return dict(result, source='google')
+            except Exception as e:
+                print(f"    Google geocoding error: {e}")
+
+    # Fallback to Nominatim (free, but rate-limited)
+    hit, cached = cache.get('nominatim', address) if cache else (False, None)
+    if cached:
+        return dict(cached, source='nominatim')
+
+    if not hit:
         try:
-            url = f"https://maps.googleapis.com/maps/api/geocode/json"
+            url = "https://nominatim.openstreetmap.org/search"
             params = {
-                'address': address,
-                'key': api_key
+                'format': 'json',
+                'q': address,
+                'limit': 1
             }
-            response = requests.get(url, params=params, timeout=10)
+            headers = {
+                'User-Agent': 'NICU-Finder-App/1.0'
+            }
+
+            get_limiter('nominatim').acquire()
+            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response.raise_for_status()
             data = response.json()
 
-            if data.get('results'):
-                location = data['results'][0]['geometry']['location']
-                return {
-                    'lat': location['lat'],
-                    'lng': location['lng'],
-                    'source': 'google',
-                    'formatted_address': data['results'][0].get('formatted_address')
+            result = None
+            if data:
+                result = {
+                    'lat': float(data[0]['lat']),
+                    'lng': float(data[0]['lon']),
+                    'formatted_address': data[0].get('display_name')
                 }
+
+            if cache:
+                cache.put('nominatim', address, result)
+
+            if result:
+                return dict(result, source='nominatim')
         except Exception as e:
-            print(f"    Google geocoding error: {e}")
+            print(f"    Nominatim geocoding error: {e}")
 
-    # Fallback to Nominatim (free, but rate-limited)
-    try:
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            'format': 'json',
-            'q': address,
-            'limit': 1
-        }
-        headers = {
-            'User-Agent': 'NICU-Finder-App/1.0'
-        }
-
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        data = response.json()
-
-        if data:
-            return {
-                'lat': float(data[0]['lat']),
-                'lng': float(data[0]['lon']),
-                'source': 'nominatim',
-                'formatted_address': data[0].get('display_name')
-            }
-    except Exception as e:
-        print(f"    Nominatim geocoding error: {e}")
+    if gazetteer and gazetteer_position == 'last':
+        fallback = gazetteer.geocode(address)
+    if fallback:
+        return dict(fallback, source='gazetteer')
 
     return None
 
 def main():
+    parser = argparse.ArgumentParser(description='Geocode hospitals in the NICU database')
+    parser.add_argument('--gazetteer', choices=['first', 'last'],
+                        help='use the offline gazetteer as the first or last provider')
+    parser.add_argument('--queue', action='store_true',
+                        help='re-geocode only the suspect rows in data/regeocode-queue.json')
+    parser.add_argument('--scrape-concurrency', type=int, default=4,
+                        help='nicudata.com pages fetched in parallel (default: 4)')
+    args = parser.parse_args()
+
     base_dir = Path(__file__).parent.parent
     db_path = base_dir / 'data' / 'nicu-database.json'
 
@@ -106,19 +186,32 @@ def main():
 
     # Load database
     print(f"\nLoading database from {db_path}")
-    with open(db_path, 'r', encoding='utf-8') as f:
-        database = json.load(f)
+    journal = CheckpointJournal(db_path)
+    database = journal.load()
 
     nicus = database.get('nicus', [])
     print(f"Found {len(nicus)} hospitals to geocode")
 
+    queued = set()
+    if args.queue:
+        with open(base_dir / 'data' / 'regeocode-queue.json', 'r', encoding='utf-8') as f:
+            queued = {item['key'] for item in json.load(f)['queue']}
+        print(f"Re-geocoding {len(queued)} queued suspect rows")
+
+    def needs_geocode(nicu):
+        if args.queue:
+            return journal.key(nicu) in queued
+        return not (nicu.get('lat') and nicu.get('lng'))
+
     # Count how many already have coordinates
-    already_geocoded = sum(1 for n in nicus if n.get('lat') and n.get('lng'))
+    already_geocoded = sum(1 for n in nicus if not needs_geocode(n))
     print(f"Already geocoded: {already_geocoded}")
     print(f"Need to geocode: {len(nicus) - already_geocoded}")
 
     if already_geocoded == len(nicus):
         print(f"\n✓ All hospitals already have coordinates!")
+        if journal.replayed:
+            journal.compact(database)
         return
 
     # Geocode each hospital
@@ -127,10 +220,25 @@ def main():
     skipped_count = 0
     from_url_count = 0
     from_fallback_count = 0
+    cache = GeocodeCache()
+
+    gazetteer = None
+    if args.gazetteer:
+        gazetteer = Gazetteer()
+        print(f"✓ Offline gazetteer loaded ({len(gazetteer.counties)} counties) as {args.gazetteer} provider")
+
+    # Strategy 1 (prefetch): scrape every needed address up front, in parallel
+    scraped = {}
+    if args.gazetteer != 'first':
+        urls = sorted({n['url'] for n in nicus if n.get('url') and not n.get('street_address') and needs_geocode(n)})
+        if urls:
+            print(f"\nScraping {len(urls)} nicudata.com pages ({args.scrape_concurrency} at a time)...")
+            scraped = scrape_addresses(urls, max(1, args.scrape_concurrency), cache)
+            print(f"  Found street addresses for {sum(1 for a in scraped.values() if a)}/{len(urls)} pages")
 
     for i, nicu in enumerate(nicus):
-        # Skip if already has coordinates
-        if nicu.get('lat') and nicu.get('lng'):
+        # Skip if already has coordinates (or isn't queued)
+        if not needs_geocode(nicu):
             skipped_count += 1
             if (i + 1) % 100 == 0:
                 print(f"[{i+1}/{len(nicus)}] Progress check...")
@@ -138,62 +246,58 @@ def main():
 
         print(f"\n[{i+1}/{len(nicus)}] {nicu['name']} ({nicu['state']})")
 
-        # Strategy 1: Try to scrape address from URL
-        address_from_url = None
-        if nicu.get('url'):
-            print(f"  Trying to scrape address from URL...")
-            address_from_url = scrape_address_from_url(nicu['url'])
-            if address_from_url:
-                print(f"  Found address: {address_from_url}")
-            time.sleep(0.5)  # Be nice to nicudata.com
+        # Strategy 1: Use the address scraped from the URL
+        address_from_url = nicu.get('street_address') or scraped.get(nicu.get('url'))
+        if address_from_url:
+            print(f"  Found address: {address_from_url}")
 
         # Strategy 2: Use name + county + state as fallback
         fallback_address = f"{nicu['name']}, {nicu.get('county', '')}, {nicu['state']}, USA"
 
+        # A queued row's cached answer is the suspect one, so bypass the cache
+        row_cache = None if args.queue else cache
+
         # Try geocoding with scraped address first, then fallback
         coords = None
         if address_from_url:
-            coords = geocode_address(address_from_url, api_key)
+            coords = geocode_address(address_from_url, api_key, row_cache, gazetteer, args.gazetteer)
             if coords:
                 from_url_count += 1
                 coords['address_source'] = 'scraped'
 
         if not coords:
             print(f"  Using fallback...")
-            coords = geocode_address(fallback_address, api_key)
+            coords = geocode_address(fallback_address, api_key, row_cache, gazetteer, args.gazetteer)
             if coords:
                 from_fallback_count += 1
                 coords['address_source'] = 'fallback'
 
         if coords:
-            nicu['lat'] = coords['lat']
-            nicu['lng'] = coords['lng']
-            nicu['geocode_source'] = coords['source']
-            nicu['address_source'] = coords['address_source']
+            fields = {
+                'lat': coords['lat'],
+                'lng': coords['lng'],
+                'geocode_source': coords['source'],
+                'address_source': coords['address_source'],
+            }
             if coords.get('formatted_address'):
-                nicu['geocoded_address'] = coords['formatted_address']
+                fields['geocoded_address'] = coords['formatted_address']
+                if args.queue:
+                    fields['formatted_address'] = coords['formatted_address']
+            if coords.get('precision'):
+                fields['geocode_precision'] = coords['precision']
+            journal.record(nicu, fields, coords['source'],
+                           location_confidence(coords.get('formatted_address'), coords.get('precision')))
             geocoded_count += 1
             print(f"  ✓ {coords['lat']:.6f}, {coords['lng']:.6f} (via {coords['source']}, from {coords['address_source']})")
-
-            # Save progress every 20 hospitals
-            if geocoded_count % 20 == 0:
-                print(f"\n  💾 Saving progress... ({geocoded_count} geocoded so far)")
-                with open(db_path, 'w', encoding='utf-8') as f:
-                    json.dump(database, f, indent=2, ensure_ascii=False)
         else:
             failed_count += 1
             print(f"  ✗ Failed to geocode")
 
-        # Rate limiting
-        if not api_key:
-            time.sleep(1.5)  # Nominatim requires 1 req/sec
-        else:
-            time.sleep(0.2)  # Be nice even with Google
+    cache.close()
 
     # Final save
     print(f"\n\n💾 Saving final results...")
-    with open(db_path, 'w', encoding='utf-8') as f:
-        json.dump(database, f, indent=2, ensure_ascii=False)
+    journal.compact(database)
 
     print(f"\n✓ Geocoding complete!")
     print(f"  Successfully geocoded: {geocoded_count}")
@@ -202,6 +306,7 @@ def main():
     print(f"  Skipped (already had coords): {skipped_count}")
     print(f"  Failed: {failed_count}")
     print(f"  Total with coordinates: {sum(1 for n in nicus if n.get('lat') and n.get('lng'))}/{len(nicus)}")
+    print(f"  {cache.summary()}")
 
 if __name__ == '__main__':
     main()
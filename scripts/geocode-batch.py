@@ -2,25 +2,40 @@
 """
 Simplified geocoding - batch process all hospitals
 """
-import json
 import time
 import os
 import sys
 import requests
 
-def geocode(name, county, state, api_key):
+from checkpoint_journal import CheckpointJournal
+from enrichment_meta import location_confidence
+from geocode_cache import GeocodeCache
+
+def geocode(name, county, state, api_key, cache=None):
     """Geocode a single hospital"""
     query = f"{name}, {county}, {state}, USA"
     url = "https://maps.googleapis.com/maps/api/geocode/json"
 
+    if cache:
+        hit, cached = cache.get('google', query)
+        if hit:
+            return cached and {'lat': cached['lat'], 'lng': cached['lng'], 'address': cached.get('formatted_address')}
+
     try:
         response = requests.get(url, params={'address': query, 'key': api_key}, timeout=10)
         data = response.json()
 
+        result = None
         if data.get('results'):
             loc = data['results'][0]['geometry']['location']
             addr = data['results'][0].get('formatted_address')
-            return {'lat': loc['lat'], 'lng': loc['lng'], 'address': addr}
+            result = {'lat': loc['lat'], 'lng': loc['lng'], 'address': addr}
+
+        # Cache entries use the same shape as the other geocoders
+        if cache and data.get('status') in ('OK', 'ZERO_RESULTS'):
+            cache.put('google', query, result and {'lat': result['lat'], 'lng': result['lng'], 'formatted_address': addr})
+
+        return result
     except:
         pass
 
@@ -35,8 +50,8 @@ def main():
     print("Loading database...")
     sys.stdout.flush()
 
-    with open('data/nicu-database.json', 'r') as f:
-        db = json.load(f)
+    journal = CheckpointJournal('data/nicu-database.json')
+    db = journal.load()
 
     total = len(db['nicus'])
     need_geocoding = sum(1 for n in db['nicus'] if not n.get('lat'))
@@ -46,29 +61,24 @@ def main():
 
     done = 0
     failed = 0
+    cache = GeocodeCache()
 
     for i, nicu in enumerate(db['nicus']):
         if nicu.get('lat'):
             continue
 
-        coords = geocode(nicu['name'], nicu.get('county', ''), nicu['state'], api_key)
+        coords = geocode(nicu['name'], nicu.get('county', ''), nicu['state'], api_key, cache)
 
         if coords:
-            nicu['lat'] = coords['lat']
-            nicu['lng'] = coords['lng']
+            fields = {'lat': coords['lat'], 'lng': coords['lng']}
             if coords.get('address'):
-                nicu['formatted_address'] = coords['address']
+                fields['formatted_address'] = coords['address']
+            journal.record(nicu, fields, 'google-geocode', location_confidence(coords.get('address')))
             done += 1
 
             if done % 10 == 0:
                 print(f"[{done}/{need_geocoding}] {nicu['name'][:40]} -> {coords['lat']:.4f},{coords['lng']:.4f}")
                 sys.stdout.flush()
-
-            if done % 50 == 0:
-                print(f"Saving progress...")
-                sys.stdout.flush()
-                with open('data/nicu-database.json', 'w') as f:
-                    json.dump(db, f, indent=2)
         else:
             failed += 1
             print(f"FAILED: {nicu['name']}")
@@ -78,10 +88,11 @@ def main():
 
     print(f"\nSaving final...")
     sys.stdout.flush()
-    with open('data/nicu-database.json', 'w') as f:
-        json.dump(db, f, indent=2)
+    journal.compact(db)
 
+    cache.close()
     print(f"\nDONE! Geocoded: {done}, Failed: {failed}")
+    print(cache.summary())
     sys.stdout.flush()
 
 if __name__ == '__main__':
@@ -2,39 +2,66 @@
 """
 Simple geocoding script - geocode all hospitals using name+county+state.
 Fast, reliable, and costs about $8 for all 1,597 hospitals.
+
+Requests run concurrently (see --concurrency) behind a shared token bucket,
+so a full run is bound by Google's quota rather than round-trip latency.
 """
 
-import json
-import time
+import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import requests
 
-def geocode_hospital(name, county, state, api_key):
+from checkpoint_journal import CheckpointJournal
+from enrichment_meta import location_confidence
+from geocode_cache import GeocodeCache
+from rate_limit import get_limiter
+
+def geocode_hospital(name, county, state, api_key, cache=None):
     """Geocode using Google Maps Geocoding API"""
+    query = f"{name}, {county}, {state}, USA"
+
+    if cache:
+        hit, cached = cache.get('google', query)
+        if hit:
+            return cached
+
     try:
-        query = f"{name}, {county}, {state}, USA"
         url = "https://maps.googleapis.com/maps/api/geocode/json"
         params = {
             'address': query,
             'key': api_key
         }
+        get_limiter('google').acquire()
         response = requests.get(url, params=params, timeout=10)
         data = response.json()
 
+        result = None
         if data.get('results'):
             location = data['results'][0]['geometry']['location']
-            return {
+            result = {
                 'lat': location['lat'],
                 'lng': location['lng'],
                 'formatted_address': data['results'][0].get('formatted_address')
             }
+
+        # Only remember definitive answers, not quota or transport errors
+        if cache and data.get('status') in ('OK', 'ZERO_RESULTS'):
+            cache.put('google', query, result)
+
+        return result
     except Exception as e:
         print(f"    Error: {e}")
 
     return None
 
 def main():
+    parser = argparse.ArgumentParser(description='Geocode hospitals using name+county+state')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='number of requests in flight at once (default: 8)')
+    args = parser.parse_args()
+
     base_dir = Path(__file__).parent.parent
     db_path = base_dir / 'data' / 'nicu-database.json'
 
@@ -51,8 +78,8 @@ def main():
 
     # Load database
     print(f"Loading database from {db_path}")
-    with open(db_path, 'r', encoding='utf-8') as f:
-        database = json.load(f)
+    journal = CheckpointJournal(db_path)
+    database = journal.load()
 
     nicus = database.get('nicus', [])
     print(f"Found {len(nicus)} hospitals\n")
@@ -64,6 +91,8 @@ def main():
 
     if already_geocoded == len(nicus):
         print("✓ All hospitals already have coordinates!")
+        if journal.replayed:
+            journal.compact(database)
         return
 
     # Geocode
@@ -71,49 +100,58 @@ def main():
     failed = 0
     skipped = 0
 
-    for i, nicu in enumerate(nicus):
+    todo = []
+    for nicu in nicus:
         if nicu.get('lat') and nicu.get('lng'):
             skipped += 1
-            continue
+        else:
+            todo.append(nicu)
 
-        if geocoded % 50 == 0 and geocoded > 0:
-            print(f"\n[{i+1}/{len(nicus)}] Progress: {geocoded} geocoded, {failed} failed")
+    print(f"Running with concurrency {args.concurrency}\n")
+    cache = GeocodeCache()
 
-        coords = geocode_hospital(nicu['name'], nicu.get('county', ''), nicu['state'], api_key)
+    # Workers only do the HTTP call; all writes to `database` happen here on
+    # the main thread, so progress saves never see a half-updated record.
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {
+            pool.submit(geocode_hospital, nicu['name'], nicu.get('county', ''), nicu['state'], api_key, cache): nicu
+            for nicu in todo
+        }
 
-        if coords:
-            nicu['lat'] = coords['lat']
-            nicu['lng'] = coords['lng']
-            if coords.get('formatted_address'):
-                nicu['formatted_address'] = coords['formatted_address']
-            geocoded += 1
+        for done, future in enumerate(as_completed(futures), 1):
+            nicu = futures[future]
+            coords = future.result()
 
-            # Print occasional updates
-            if geocoded % 10 == 0:
-                print(f"  [{geocoded}] {nicu['name'][:40]} -> {coords['lat']:.4f}, {coords['lng']:.4f}")
+            if coords:
+                fields = {'lat': coords['lat'], 'lng': coords['lng']}
+                if coords.get('formatted_address'):
+                    fields['formatted_address'] = coords['formatted_address']
+                journal.record(nicu, fields, 'google-geocode',
+                               location_confidence(coords.get('formatted_address')))
+                geocoded += 1
 
-            # Save progress every 100
-            if geocoded % 100 == 0:
-                print(f"\n💾 Saving progress...")
-                with open(db_path, 'w', encoding='utf-8') as f:
-                    json.dump(database, f, indent=2, ensure_ascii=False)
-        else:
-            failed += 1
-            print(f"  ✗ Failed: {nicu['name']}")
+                # Print occasional updates
+                if geocoded % 10 == 0:
+                    print(f"  [{geocoded}] {nicu['name'][:40]} -> {coords['lat']:.4f}, {coords['lng']:.4f}")
+            else:
+                failed += 1
+                print(f"  ✗ Failed: {nicu['name']}")
+
+            if done % 50 == 0:
+                print(f"\n[{done}/{len(todo)}] Progress: {geocoded} geocoded, {failed} failed")
 
-        # Small delay to be respectful
-        time.sleep(0.05)
+    cache.close()
 
     # Final save
     print(f"\n\n💾 Saving final results...")
-    with open(db_path, 'w', encoding='utf-8') as f:
-        json.dump(database, f, indent=2, ensure_ascii=False)
+    journal.compact(database)
 
     print(f"\n✓ Geocoding complete!")
     print(f"  Successfully geocoded: {geocoded}")
     print(f"  Skipped (already had coords): {skipped}")
     print(f"  Failed: {failed}")
     print(f"  Total with coordinates: {sum(1 for n in nicus if n.get('lat') and n.get('lng'))}/{len(nicus)}")
+    print(f"  {cache.summary()}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Persistent geocode cache shared by all geocoding scripts.
+
+Answers are stored in SQLite keyed by (provider, normalized query), including
+failed lookups (negative caching), so re-runs only hit the network for
+hospitals we have never resolved. Entries expire after a TTL and the table is
+trimmed back to `max_entries` by least-recent use.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_PATH = Path(__file__).parent.parent / 'data' / 'geocode-cache.sqlite'
+
+# Successful answers rarely change; failures are retried sooner in case the
+# provider's data (or our query) improves.
+POSITIVE_TTL = 180 * 24 * 3600
+NEGATIVE_TTL = 14 * 24 * 3600
+MAX_ENTRIES = 50000
+
+_whitespace_re = re.compile(r'\s+')
+_comma_re = re.compile(r'\s*,\s*')
+
+
+def normalize_query(query):
+    """Lowercase and collapse whitespace/comma spacing so trivial variations share an entry"""
+    query = _whitespace_re.sub(' ', query.strip().lower())
+    query = _comma_re.sub(', ', query)
+    return query.strip(', ')
+
+
+class GeocodeCache:
+    """SQLite-backed cache of provider answers; safe to share between threads"""
+
+    def __init__(self, path=DEFAULT_PATH, positive_ttl=POSITIVE_TTL,
+                 negative_ttl=NEGATIVE_TTL, max_entries=MAX_ENTRIES):
+        self.path = Path(path)
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                provider   TEXT NOT NULL,
+                query      TEXT NOT NULL,
+                result     TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used  REAL NOT NULL,
+                PRIMARY KEY (provider, query)
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_geocode_cache_last_used ON geocode_cache (last_used)')
+        self.conn.commit()
+
+    def get(self, provider, query):
+        """Return (hit, result). A hit with result None is a cached failure."""
+        key = normalize_query(query)
+        now = time.time()
+
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT result, expires_at FROM geocode_cache WHERE provider = ? AND query = ?',
+                (provider, key)
+            ).fetchone()
+
+            if not row or row[1] < now:
+                self.misses += 1
+                return False, None
+
+            self.conn.execute(
+                'UPDATE geocode_cache SET last_used = ? WHERE provider = ? AND query = ?',
+                (now, provider, key)
+            )
+
+            if row[0] is None:
+                self.negative_hits += 1
+                return True, None
+
+            self.hits += 1
+            return True, json.loads(row[0])
+
+    def put(self, provider, query, result):
+        """Store an answer. Pass result=None to remember a definitive "not found"."""
+        key = normalize_query(query)
+        now = time.time()
+        ttl = self.positive_ttl if result is not None else self.negative_ttl
+        payload = json.dumps(result, ensure_ascii=False) if result is not None else None
+
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO geocode_cache (provider, query, result, created_at, expires_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (provider, key, payload, now, now + ttl, now)
+            )
+            self.writes += 1
+
+            # Commit in small batches; evict at the same cadence
+            if self.writes % 50 == 0:
+                self._evict()
+                self.conn.commit()
+
+    def _evict(self):
+        """Drop expired rows, then the least recently used ones above max_entries"""
+        self.conn.execute('DELETE FROM geocode_cache WHERE expires_at < ?', (time.time(),))
+        count = self.conn.execute('SELECT COUNT(*) FROM geocode_cache').fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                'DELETE FROM geocode_cache WHERE rowid IN '
+                '(SELECT rowid FROM geocode_cache ORDER BY last_used ASC LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+    def close(self):
+        with self.lock:
+            self._evict()
+            self.conn.commit()
+            self.conn.close()
+
+    def summary(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        rate = (self.hits + self.negative_hits) / lookups * 100 if lookups else 0.0
+        return (f"Geocode cache: {self.hits} hits, {self.negative_hits} cached failures, "
+                f"{self.misses} misses ({rate:.0f}% served from cache)")
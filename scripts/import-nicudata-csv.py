@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Import NICU data from nicudata.com CSV exports into nicu-database.json
+
+Replaces import-csv-to-database.py (newnicucsv.csv) and import-final-nicus.py
+(FINALNicus.csv): takes any number of files or globs and streams their records
+through nicudata_csv.iter_records(), so large exports are never held in memory.
+
+Records are upserted on their nicudata URL slug (see nicu_upsert.py): a row
+whose level changed upstream updates the existing record in place and keeps
+its geocode, phone and place_id. Cleaned names and counties are never
+replaced by the raw export text, only filled in when missing.
+
+A manifest of per-row content hashes (data/csv-import-manifest.json) is kept
+from the previous import. Rows whose hash is unchanged are not parsed at all,
+and if nothing changed the database isn't rewritten, so re-importing a mostly
+unchanged monthly export is near-instant and triggers no enrichment work.
+
+Usage:
+    python scripts/import-nicudata-csv.py                       # all bundled exports
+    python scripts/import-nicudata-csv.py data/FINALNicus.csv "exports/*.csv"
+    python scripts/import-nicudata-csv.py --prune               # also drop rows gone upstream
+    python scripts/import-nicudata-csv.py --full                # ignore the manifest, re-parse every row
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+from nicu_store import load_database, write_database
+from nicu_upsert import UpsertIndex, match_key
+from nicudata_csv import expand_paths, iter_segments_in, parse_segment, row_hash
+
+DEFAULT_INPUTS = ['data/FINALNicus.csv', 'data/newnicucsv.csv', 'data/final2ndhalfNICUs.csv']
+MANIFEST_PATH = 'data/csv-import-manifest.json'
+
+# Bump when nicudata_csv parsing changes so old hashes stop matching
+MANIFEST_VERSION = 2
+
+
+def load_existing_database(db_path):
+    """Load existing NICU database"""
+    try:
+        return load_database(db_path)
+    except FileNotFoundError:
+        return {'nicus': [], 'total': 0}
+
+
+def load_manifest(path):
+    """Load {row hash: match key} from the previous import"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('rows', {})
+
+
+def save_manifest(path, rows):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'rows': rows}, f)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import nicudata.com CSV exports')
+    parser.add_argument('inputs', nargs='*', help='CSV files or globs (default: the bundled exports)')
+    parser.add_argument('--prune', action='store_true',
+                        help='remove nicudata records missing from these exports (only use with a full export)')
+    parser.add_argument('--full', action='store_true',
+                        help='ignore the row-hash manifest and re-parse every row')
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+    manifest_path = base_dir / MANIFEST_PATH
+    inputs = args.inputs or [str(base_dir / p) for p in DEFAULT_INPUTS]
+
+    paths = list(expand_paths(inputs))
+    print("Reading CSV from:")
+    for path in paths:
+        print(f"  {path}")
+    print(f"Database path: {db_path}")
+
+    # Load existing database
+    database = load_existing_database(db_path)
+    all_nicus = database.get('nicus', [])
+    existing_count = len(all_nicus)
+
+    print(f"Existing database has {existing_count} entries")
+
+    # Slug / name+state index for O(1) matching
+    index = UpsertIndex(all_nicus)
+
+    previous = {} if args.full else load_manifest(manifest_path)
+    manifest = {}
+
+    # Stream every record straight into the database, skipping rows seen last time
+    rows = 0
+    parsed = 0
+    errors = 0
+    samples = []
+    start = time.perf_counter()
+
+    for path, line_num, text in iter_segments_in(paths):
+        rows += 1
+        digest = row_hash(text)
+
+        # Unchanged row whose record is still in the database: nothing to parse
+        key = previous.get(digest)
+        if key and index.touch(key):
+            manifest[digest] = key
+            continue
+
+        entry = parse_segment(text)
+        if not entry:
+            print(f"Warning: Could not parse {os.path.basename(path)}:{line_num}: {text[:80]}...")
+            errors += 1
+            continue
+
+        parsed += 1
+        if index.upsert(entry) == 'inserted':
+            # New records get the display placeholder; updates never see it
+            if not entry['county']:
+                entry['county'] = 'Unknown'
+            if len(samples) < 5:
+                samples.append(entry)
+        manifest[digest] = match_key(entry)
+
+    elapsed = time.perf_counter() - start
+    input_bytes = sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+    removed = index.unseen()
+
+    print(f"\nRead {rows} rows from {len(paths)} files, parsed {parsed}")
+    print(f"Upsert: {index.summary()}")
+    print(f"Errors: {errors}")
+    index.print_conflicts()
+    if elapsed > 0:
+        print(f"Throughput: {rows / elapsed:,.0f} rows/s ({input_bytes / elapsed / 1e6:.1f} MB/s)")
+
+    if removed:
+        print(f"\n{len(removed)} nicudata records were not in these exports:")
+        for entry in removed[:10]:
+            print(f"  - {entry['name']} ({entry['state']})")
+        if args.prune:
+            gone = {id(entry) for entry in removed}
+            all_nicus[:] = [n for n in all_nicus if id(n) not in gone]
+            print(f"Pruned {len(removed)} records")
+        else:
+            print("Kept them (pass --prune to remove)")
+
+    if not index.changed and not (removed and args.prune):
+        save_manifest(manifest_path, manifest)
+        print(f"\nNo changes - database left as is ({len(all_nicus)} entries)")
+        return
+
+    # Sort and save
+    all_nicus.sort(key=lambda x: (x['state'], x['name']))
+    database['nicus'] = all_nicus
+    database['total'] = len(all_nicus)
+    write_database(db_path, database)
+    save_manifest(manifest_path, manifest)
+
+    print(f"\nDatabase updated successfully!")
+    print(f"Total entries: {database['total']}")
+
+    # Show sample of new entries
+    if samples:
+        print("\nSample of new entries:")
+        for entry in samples:
+            print(f"  - {entry['name']} ({entry['state']}) - {entry['nicuLevel']}")
+
+
+if __name__ == '__main__':
+    main()
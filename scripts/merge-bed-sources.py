@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Merge neonatologysolutions bed counts into the nicudata records.
+
+Bed counts come from scrape-nicu-data-v3.py, add-major-states.py and
+add-ny-data.py, which produce records without a nicudata URL; county, URL and
+level come from the nicudata imports. This resolves each bed record to the
+nicudata record for the same hospital (entity_resolution.py) and merges them:
+
+  - the nicudata record gets the bed count (journaled, source
+    'neonatologysolutions', confidence = match score), plus any location or
+    phone fields it is missing
+  - a bed record from the database itself is then removed, since the
+    nicudata record now carries everything it had (--keep-sources keeps it)
+
+A pair whose street addresses have different ZIP codes is not merged and the
+bed record is kept: the names agree, but the places don't, so it needs a
+person to look at it. (Pairs whose coordinates are far apart never match in
+the first place.)
+
+Bed records are read from the database (records with beds but no URL) and
+from any extra files given, e.g. a v3 scrape written with
+--output data/neonatology-raw.json. Match decisions are stored in
+data/entity-matches.json, so a re-run only scores new or changed records.
+
+Usage:
+    python scripts/merge-bed-sources.py --dry-run
+    python scripts/merge-bed-sources.py data/neonatology-raw.json
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+from checkpoint_journal import CheckpointJournal, record_key
+from entity_resolution import MARGIN, THRESHOLD, MatchTable, StateTokenIndex
+from nicu_upsert import match_key
+
+SOURCE = 'neonatologysolutions'
+
+# Copied onto the nicudata record only when it has none
+FILL_FIELDS = ('lat', 'lng', 'formatted_address', 'phone', 'place_id')
+
+# "..., 330 Brookline Ave, Boston, MA 02215, USA": a street-level address and its ZIP
+_street_re = re.compile(r'(?:^|, )\d[\d-]*[A-Za-z]? \S')
+_zip_re = re.compile(r'\b[A-Z]{2} (\d{5})(?:-\d{4})?(?:, USA)?$')
+
+
+def street_zip(address):
+    """ZIP code of a street-level formatted address, or None"""
+    if not address or not _street_re.search(address):
+        return None
+    match = _zip_re.search(address)
+    return match.group(1) if match else None
+
+
+def addresses_conflict(a, b):
+    """True when both records have street addresses in different ZIP codes"""
+    zip_a, zip_b = street_zip(a.get('formatted_address')), street_zip(b.get('formatted_address'))
+    return zip_a is not None and zip_b is not None and zip_a != zip_b
+
+
+def load_sources(database, paths):
+    """[(origin, record)] for every record with a bed count and no nicudata URL"""
+    sources = [('database', n) for n in database['nicus'] if not n.get('url') and n.get('beds')]
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f).get('nicus', [])
+        sources.extend((str(path), n) for n in records if not n.get('url') and n.get('beds'))
+    return sources
+
+
+def merge_fields(target, source):
+    """The updates merging `source` into `target` calls for"""
+    fields = {}
+    if source['beds'] != target.get('beds'):
+        fields['beds'] = source['beds']
+    for field in FILL_FIELDS:
+        if source.get(field) and not target.get(field):
+            fields[field] = source[field]
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge neonatologysolutions bed counts into nicudata records')
+    parser.add_argument('sources', nargs='*', help='extra JSON files of bed records ({"nicus": [...]})')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'min match score, 0-1 (default: {THRESHOLD})')
+    parser.add_argument('--margin', type=float, default=MARGIN,
+                        help=f'how far the best match must beat the runner-up (default: {MARGIN})')
+    parser.add_argument('--rescore', action='store_true', help='ignore stored match decisions')
+    parser.add_argument('--keep-sources', action='store_true',
+                        help='keep merged bed records in the database')
+    parser.add_argument('--dry-run', action='store_true', help='show matches without saving')
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+
+    journal = CheckpointJournal(db_path)
+    database = journal.load()
+
+    targets = [n for n in database['nicus'] if n.get('url')]
+    by_key = {match_key(n): n for n in targets}
+    index = StateTokenIndex(targets)
+    table = MatchTable()
+    sources = load_sources(database, args.sources)
+
+    print(f"{len(sources)} bed records, {len(targets)} nicudata records\n")
+
+    start = time.perf_counter()
+    counts = {'reused': 0, 'scored': 0, 'matched': 0, 'unmatched': 0}
+    # target key -> (score, source): the best-scoring bed record wins a target
+    winners = {}
+
+    for origin, record in sources:
+        key = f"{origin}:{record_key(record)}"
+        entry = None if args.rescore else table.lookup(key, record, index)
+
+        if entry is not None and (entry['target'] is None or entry['target'] in by_key):
+            counts['reused'] += 1
+            target, score = by_key.get(entry['target']), entry['score']
+        else:
+            counts['scored'] += 1
+            target, score = index.best_match(record, args.threshold, args.margin)
+            table.store(key, record, index, target, score)
+
+        if target is None:
+            counts['unmatched'] += 1
+            continue
+
+        counts['matched'] += 1
+        target_key = match_key(target)
+        if target_key not in winners or score > winners[target_key][0]:
+            winners[target_key] = (score, record)
+
+    elapsed = time.perf_counter() - start
+
+    merged_sources = set()
+    updated = 0
+    conflicts = 0
+    for target_key, (score, record) in winners.items():
+        target = by_key[target_key]
+        if addresses_conflict(record, target):
+            conflicts += 1
+            print(f"⚠ {record['name'][:45]} → {target['name'][:45]} ({target['state']}, {score:.2f}): "
+                  f"kept apart, addresses differ: {record.get('formatted_address')} / {target.get('formatted_address')}")
+            continue
+        merged_sources.add(id(record))
+        fields = merge_fields(target, record)
+        if not fields:
+            continue
+        updated += 1
+        print(f"✓ {record['name'][:45]} → {target['name'][:45]} ({target['state']}, {score:.2f}): "
+              f"{', '.join(sorted(fields))}")
+        if not args.dry_run:
+            journal.record(target, fields, SOURCE, confidence=round(score, 2))
+
+    print(f"\nResolved in {elapsed * 1000:.0f} ms: {counts['scored']} scored, {counts['reused']} reused from "
+          f"the match table; {counts['matched']} matched, {counts['unmatched']} unmatched, "
+          f"{conflicts} kept apart (address conflict)")
+
+    if args.dry_run:
+        print(f"Dry run: {updated} nicudata records would be updated")
+        return
+
+    table.save()
+
+    removed = 0
+    if not args.keep_sources:
+        kept = []
+        for nicu in database['nicus']:
+            if id(nicu) in merged_sources:
+                journal.remove(nicu)
+                removed += 1
+            else:
+                kept.append(nicu)
+        database['nicus'] = kept
+        database['total'] = len(kept)
+
+    if updated or removed:
+        print("\n💾 Saving database...")
+        journal.compact(database)
+
+    print(f"Updated {updated} nicudata records, removed {removed} merged bed records")
+    print(f"With beds: {sum(1 for n in database['nicus'] if n.get('beds'))}/{len(database['nicus'])}")
+
+
+if __name__ == '__main__':
+    main()
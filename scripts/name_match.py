@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Hospital name tokens and a token-set similarity for fuzzy matching.
+
+Names are lowercased, stripped of punctuation and common abbreviations are
+expanded ("St." -> saint, "Med Ctr" -> medical center), then split into a set
+of tokens. Generic words ("hospital", "medical", "center", ...) are dropped so
+two names are compared on what distinguishes them: "Inspira Medical Center
+Vineland" and "Inspira Health Network Vineland" both reduce to
+{inspira, vineland}.
+"""
+
+import re
+
+_punct_re = re.compile(r"[^\w\s]")
+
+ABBREVIATIONS = {
+    'st': 'saint',
+    'ste': 'sainte',
+    'mt': 'mount',
+    'ctr': 'center',
+    'cntr': 'center',
+    'centre': 'center',
+    'med': 'medical',
+    'hosp': 'hospital',
+    'univ': 'university',
+    'u': 'university',
+    'mem': 'memorial',
+    'reg': 'regional',
+    'childrens': 'children',
+    'womens': 'women',
+}
+
+GENERIC_TOKENS = frozenset([
+    'the', 'of', 'and', 'at', 'for', 'a', 'in',
+    'hospital', 'hospitals', 'medical', 'center', 'centers', 'health', 'healthcare',
+    'system', 'network', 'campus', 'regional', 'general', 'nicu', 'inc', 'llc',
+])
+
+# Words that make a hospital a different unit from its parent ("Mission
+# Hospital" vs "Mission Children's Hospital")
+QUALIFIER_TOKENS = frozenset(['children', 'women', 'newborns', 'infants', 'pediatric'])
+
+# Score multiplier for a match on a parenthetical alias rather than the name
+ALIAS_FACTOR = 0.9
+
+_parenthetical_re = re.compile(r'\(([^)]*)\)?')
+
+
+def name_tokens(name):
+    """Distinguishing tokens of a hospital name, as a frozenset"""
+    text = (name or '').lower().replace('\u2019', "'").replace("'s", 's').replace('&', ' and ')
+    text = _punct_re.sub(' ', text)
+    tokens = (ABBREVIATIONS.get(token, token) for token in text.split())
+    distinct = frozenset(token for token in tokens if token not in GENERIC_TOKENS)
+    if distinct:
+        return distinct
+    # A name made only of generic words ("Medical Center") is compared as-is
+    return frozenset(ABBREVIATIONS.get(token, token) for token in text.split())
+
+
+def name_variants(name):
+    """
+    The name without its parentheticals, plus each parenthetical on its own:
+    "Grace Hospital (Sinai Grace Hospital)" -> ["Grace Hospital", "Sinai Grace Hospital"]
+    """
+    name = name or ''
+    variants = [_parenthetical_re.sub(' ', name).strip()]
+    variants.extend(alias.strip() for alias in _parenthetical_re.findall(name) if alias.strip())
+    return [v for v in variants if v] or [name]
+
+
+def qualifier_mismatch(a, b):
+    """True when only one of two token sets names a children's / women's unit"""
+    return bool(a & QUALIFIER_TOKENS) != bool(b & QUALIFIER_TOKENS)
+
+
+def token_set_similarity(a, b):
+    """
+    Similarity of two token sets, 0.0-1.0: the mean of their overlap (shared
+    tokens over the smaller set) and Jaccard (shared over all), so a name that
+    is a subset of the other still pays for the words it lacks: "Methodist"
+    vs "Methodist Henderson" scores 0.75, not 1.0. Only equal sets score 1.0.
+    """
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return 0.5 * shared / min(len(a), len(b)) + 0.5 * shared / len(a | b)
+
+
+def variant_tokens(name):
+    """name_tokens() of each of name_variants(name), the name itself first"""
+    return [name_tokens(variant) for variant in name_variants(name)]
+
+
+def name_similarity(a, b):
+    """
+    token_set_similarity() of two names given as variant_tokens(): their
+    names, or (discounted by ALIAS_FACTOR) a name and a parenthetical alias,
+    so "Franciscan Health Hammond (St. Margaret Mercy)" still matches
+    "Franciscan Health Hammond"
+    """
+    best = token_set_similarity(a[0], b[0])
+    for x in range(len(a)):
+        for y in range(len(b)):
+            if x or y:
+                best = max(best, ALIAS_FACTOR * token_set_similarity(a[x], b[y]))
+    return best
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+neonatologysolutions.com state pages: URLs and the page parser.
+
+parse_state_page() and parse_snapshot() are plain module-level functions so
+the scraper can run them in a process pool.
+"""
+
+import re
+
+from bs4 import BeautifulSoup
+
+from snapshot_store import read_object
+
+# List of all states with their URLs
+STATES = {
+    'Alabama': 'https://neonatologysolutions.com/alabama-nicus/',
+    'Alaska': 'https://neonatologysolutions.com/alaska-nicus/',
+    'Arizona': 'https://neonatologysolutions.com/arizona-nicus/',
+    'Arkansas': 'https://neonatologysolutions.com/arkansas-nicus/',
+    'California': 'https://neonatologysolutions.com/california-nicus/',
+    'Colorado': 'https://neonatologysolutions.com/colorado-nicus/',
+    'Connecticut': 'https://neonatologysolutions.com/connecticut-nicus/',
+    'Delaware': 'https://neonatologysolutions.com/deleware-nicus/',
+    'District of Columbia': 'https://neonatologysolutions.com/district-of-columbia-nicus/',
+    'Florida': 'https://neonatologysolutions.com/florida-nicus/',
+    'Georgia': 'https://neonatologysolutions.com/georgia-nicus/',
+    'Hawaii': 'https://neonatologysolutions.com/hawaii-nicus/',
+    'Idaho': 'https://neonatologysolutions.com/idaho-nicus/',
+    'Illinois': 'https://neonatologysolutions.com/illinois-nicus/',
+    'Indiana': 'https://neonatologysolutions.com/indiana-nicus/',
+    'Iowa': 'https://neonatologysolutions.com/iowa-nicus/',
+    'Kansas': 'https://neonatologysolutions.com/kansas-nicus/',
+    'Kentucky': 'https://neonatologysolutions.com/kentucky-nicus/',
+    'Louisiana': 'https://neonatologysolutions.com/louisiana-nicus/',
+    'Maine': 'https://neonatologysolutions.com/maine-nicus/',
+    'Maryland': 'https://neonatologysolutions.com/maryland-nicus/',
+    'Massachusetts': 'https://neonatologysolutions.com/massachusetts-nicus/',
+    'Michigan': 'https://neonatologysolutions.com/michigan-nicus/',
+    'Minnesota': 'https://neonatologysolutions.com/minnesota-nicus/',
+    'Mississippi': 'https://neonatologysolutions.com/mississippi-nicus/',
+    'Missouri': 'https://neonatologysolutions.com/missouri-nicus/',
+    'Montana': 'https://neonatologysolutions.com/montana-nicus/',
+    'Nebraska': 'https://neonatologysolutions.com/nebraska/',
+    'Nevada': 'https://neonatologysolutions.com/nevada-nicus/',
+    'New Hampshire': 'https://neonatologysolutions.com/new-hampshire-nicus/',
+    'New Jersey': 'https://neonatologysolutions.com/new-jersey-nicus/',
+    'New Mexico': 'https://neonatologysolutions.com/new-mexico-nicus/',
+    'New York': 'https://neonatologysolutions.com/new-york-nicus/',
+    'North Carolina': 'https://neonatologysolutions.com/north-carolina-nicus/',
+    'North Dakota': 'https://neonatologysolutions.com/north-dakota/',
+    'Ohio': 'https://neonatologysolutions.com/ohio/',
+    'Oklahoma': 'https://neonatologysolutions.com/oklahoma-nicus/',
+    'Oregon': 'https://neonatologysolutions.com/oregon-nicus/',
+    'Pennsylvania': 'https://neonatologysolutions.com/pennsylvania-nicus/',
+    'Rhode Island': 'https://neonatologysolutions.com/rhode-island-nicus/',
+    'South Carolina': 'https://neonatologysolutions.com/south-carolina-nicus/',
+    'South Dakota': 'https://neonatologysolutions.com/south-dakota-nicus/',
+    'Tennessee': 'https://neonatologysolutions.com/tennessee-nicus/',
+    'Texas': 'https://neonatologysolutions.com/texas-nicus/',
+    'Utah': 'https://neonatologysolutions.com/utah-nicus/',
+    'Vermont': 'https://neonatologysolutions.com/vermont-nicus/',
+    'Virginia': 'https://neonatologysolutions.com/virginia-nicus/',
+    'Washington': 'https://neonatologysolutions.com/washington-nicus/',
+    'West Virginia': 'https://neonatologysolutions.com/west-virginia-nicus/',
+    'Wisconsin': 'https://neonatologysolutions.com/wisconsin-nicus/',
+    'Wyoming': 'https://neonatologysolutions.com/wyoming-nicus/',
+}
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    # No br: neither requests nor aiohttp can decode it without the brotli package
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+SKIP_WORDS = ['practice type', 'md contact', 'nicu level iv', 'nicu level iii', 'nicu level ii',
+              'level iv nicus', 'level iii nicus', 'level ii nicus', 'total', 'summary']
+NAME_SKIP_WORDS = ['practice', 'contact', 'type', 'level']
+
+# Line kinds
+SKIP, INLINE, NAME, OTHER = 'skip', 'inline', 'name', 'other'
+
+# Compiled once: metadata lines, words that rule a line out as a hospital name,
+# "Hospital Name Level III | 30 Beds", and a bare "Level III | 30 Beds"
+_skip_re = re.compile('|'.join(re.escape(w) for w in SKIP_WORDS))
+_name_skip_re = re.compile('|'.join(re.escape(w) for w in NAME_SKIP_WORDS))
+_inline_re = re.compile(r'^(.+?)\s+Level\s+(IV|III|II|I)\s*\|?\s*(\d+)\s*Beds?', re.IGNORECASE)
+_level_re = re.compile(r'^Level\s+(IV|III|II|I)\s*\|?\s*(\d+)\s*Beds?', re.IGNORECASE)
+
+
+def classify(line):
+    """
+    Label one line in a single pass: returns (kind, payload, level) where kind is
+    SKIP, INLINE (payload = (name, level, beds)), NAME (a possible hospital name)
+    or OTHER, and level is (level, beds) when the line is a bare "Level III | 30 Beds".
+    A line's level is used when it follows a NAME line, whatever its own kind.
+    """
+    lower = line.lower()
+    has_level = 'level' in lower
+
+    level = None
+    if has_level:
+        match = _level_re.match(line)
+        if match:
+            level = (match.group(1).upper(), int(match.group(2)))
+
+    if _skip_re.search(lower):
+        return SKIP, None, level
+
+    if has_level:
+        match = _inline_re.match(line)
+        if match:
+            return INLINE, (match.group(1).strip(), match.group(2).upper(), int(match.group(3))), level
+
+    if len(line) > 3 and not _name_skip_re.search(lower):
+        return NAME, line, level
+
+    return OTHER, None, level
+
+
+def _record(state_name, name, level, beds):
+    return {
+        'name': name,
+        'state': state_name,
+        'nicuLevel': f'Level {level}',
+        'beds': beds
+    }
+
+
+def parse_lines(state_name, lines):
+    """
+    Pick hospitals out of a state page's text lines with a streaming state
+    machine: each line is classified once, and a NAME line waits for the next
+    line to see whether it carries the level and bed count.
+    """
+    nicus = []
+    seen = set()
+    pending = None
+
+    def emit(name, level, beds):
+        # Remove duplicates based on hospital name
+        if name not in seen:
+            seen.add(name)
+            nicus.append(_record(state_name, name, level, beds))
+
+    for line in lines:
+        kind, payload, level = classify(line)
+
+        if pending is not None:
+            name, pending = pending, None
+            if level:
+                # "Hospital Name" then "Level III | 30 Beds": the level line is consumed
+                emit(name, *level)
+                continue
+
+        if kind == INLINE:
+            emit(*payload)
+        elif kind == NAME:
+            pending = payload
+
+    return nicus
+
+
+def page_lines(html):
+    """Non-empty text lines of the page's main content, or None if it has none"""
+    soup = BeautifulSoup(html, 'html.parser')
+    content = soup.find('div', class_='entry-content') or soup.find('article')
+    if not content:
+        return None
+    return [line.strip() for line in content.get_text().split('\n') if line.strip()]
+
+
+def parse_state_page(state_name, html):
+    """Parse one state page; returns its NICUs, or None if the page has no content area"""
+    lines = page_lines(html)
+    if lines is None:
+        return None
+    return parse_lines(state_name, lines)
+
+
+def parse_snapshot(job):
+    """
+    Process-pool worker: job is (state_name, path of the page in the snapshot
+    store or None). Returns (state_name, nicus or None, problem or None).
+    """
+    state_name, path = job
+    body = read_object(path) if path else None
+    if body is None:
+        return state_name, None, 'not in the snapshot store'
+    nicus = parse_state_page(state_name, body.decode('utf-8', errors='replace'))
+    return state_name, nicus, None if nicus is not None else 'could not find content'
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Manage the SQLite NICU store (data/nicu.sqlite, see nicu_store.py).
+
+    python scripts/nicu-store.py init      # create the store from nicu-database.json
+    python scripts/nicu-store.py export    # regenerate nicu-database.json for the API
+    python scripts/nicu-store.py stats
+    python scripts/nicu-store.py near 40.7128,-74.0060 --miles 25
+
+After `init`, the scripts read and write through the store and re-export the
+JSON when they finish, so `export` is only needed after editing the store by
+hand.
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+
+from nicu_store import NicuStore, store_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the SQLite NICU store')
+    parser.add_argument('command', choices=['init', 'export', 'stats', 'near'])
+    parser.add_argument('location', nargs='?', help='lat,lng for `near`')
+    parser.add_argument('--miles', type=float, default=25.0, help='radius for `near` (default: 25)')
+    parser.add_argument('--force', action='store_true', help='`init` over an existing store')
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+    path = store_path(db_path)
+
+    if args.command == 'init':
+        if path.exists() and not args.force:
+            print(f"✗ {path} already exists (use --force to rebuild it from the JSON)")
+            sys.exit(1)
+        with open(db_path, 'r', encoding='utf-8') as f:
+            database = json.load(f)
+        store = NicuStore(path)
+        store.replace_all(database)
+        print(f"✓ Created {path.name} from {db_path.name}")
+        print(store.summary())
+        store.close()
+        return
+
+    if not path.exists():
+        print("✗ No store yet; run: python scripts/nicu-store.py init")
+        sys.exit(1)
+
+    store = NicuStore(path)
+    try:
+        if args.command == 'export':
+            total = store.export_json(db_path)
+            print(f"💾 Exported {total} records to {db_path.name}")
+
+        elif args.command == 'stats':
+            print(store.summary())
+
+        elif args.command == 'near':
+            if not args.location:
+                parser.error('near needs a location: lat,lng')
+            lat, lng = (float(v) for v in args.location.split(','))
+            # Bounding box of the radius; corners are trimmed by the distance check below
+            d_lat = args.miles / 69.0
+            d_lng = args.miles / (69.0 * max(math.cos(math.radians(lat)), 0.01))
+            hits = []
+            for nicu in store.within(lat - d_lat, lat + d_lat, lng - d_lng, lng + d_lng):
+                miles = 3959 * 2 * math.asin(math.sqrt(
+                    math.sin(math.radians(nicu['lat'] - lat) / 2) ** 2 +
+                    math.cos(math.radians(lat)) * math.cos(math.radians(nicu['lat'])) *
+                    math.sin(math.radians(nicu['lng'] - lng) / 2) ** 2
+                ))
+                if miles <= args.miles:
+                    hits.append((miles, nicu))
+            for miles, nicu in sorted(hits, key=lambda h: h[0]):
+                print(f"  {miles:5.1f} mi  {nicu['name']} ({nicu.get('nicuLevel') or 'N/A'})")
+            print(f"{len(hits)} NICUs within {args.miles:g} miles")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Columnar binary snapshot of the NICU database for the API (data/nicu-snapshot.bin).
+
+The API used to JSON.parse the whole pretty-printed database on every cold
+start and keep ~1,500 full objects around. The snapshot is what it actually
+needs, laid out so lib/nicu-snapshot.js can map it into typed arrays without
+parsing anything per record:
+
+    magic     8 bytes   b'NICUSNP1'
+    length    u32       size of the JSON header
+    header    JSON      record count and where each section is
+    sections  ...       each 4-byte aligned, little-endian; the string bytes last
+
+Sections:
+    lat, lng                float32 (NaN = no coordinates)
+    beds                    uint16  (0xFFFF = none)
+    state, nicuLevel        uint8   code into that column's dictionary (0 = none)
+    county                  uint16  code into that column's dictionary (0 = none)
+    dict.<column>           uint32  string id of each dictionary entry
+    name, formatted_address,
+    phone, url              uint32  string id (0 = none)
+    grid.cells              uint32  occupied cells of a GRID_DEGREES lat/lng grid,
+                                    sorted (row * columns + column)
+    grid.starts             uint32  where each cell's records start in grid.ids
+                                    (cells + 1 entries)
+    grid.ids                uint32  indexes of the located records, cell by cell
+    strings.offsets         uint32  end offset of each string (n + 1 entries)
+    strings.data            UTF-8 bytes of every distinct string, stored once
+
+The loader reads everything but strings.data at start-up and fetches the
+string bytes only when a record is first turned into an object. A radius
+search visits only the grid cells its circle touches (lib/nicu-snapshot.js).
+
+nicu_store.write_database() rebuilds it whenever the JSON is written; run
+scripts/build-snapshot.py after editing the JSON any other way. The header
+records the SHA-256 of the JSON file it was built from, and the API falls back
+to the JSON when that no longer matches, so even an edit that keeps the file
+the same size (one digit of a phone number) isn't served stale.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+
+MAGIC = b'NICUSNP1'
+VERSION = 2
+SNAPSHOT_NAME = 'nicu-snapshot.bin'
+
+NO_BEDS = 0xFFFF
+
+DICT_COLUMNS = {'state': 'B', 'nicuLevel': 'B', 'county': 'H'}
+STRING_COLUMNS = ('name', 'formatted_address', 'phone', 'url')
+
+# Grid cell size: 0.5° is ~35 miles north-south, so the default 60-mile
+# search touches ~5x6 cells out of the ~1,000 occupied ones
+GRID_DEGREES = 0.5
+
+_TYPE_NAMES = {'f': 'f32', 'H': 'u16', 'B': 'u8', 'I': 'u32'}
+
+
+def snapshot_path(db_path):
+    """Where the snapshot for a JSON database lives (next to it)"""
+    return Path(db_path).with_name(SNAPSHOT_NAME)
+
+
+def json_digest(db_path):
+    """Hex SHA-256 of the JSON file's bytes, as lib/nicu-snapshot.js computes it"""
+    with open(db_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class StringTable:
+    """Interns strings; id 0 is reserved for None"""
+
+    def __init__(self):
+        self.ids = {}
+        self.offsets = array('I', [0])
+        self.data = bytearray()
+
+    def add(self, value):
+        if value is None or value == '':
+            return 0
+        value = str(value)
+        string_id = self.ids.get(value)
+        if string_id is None:
+            self.data += value.encode('utf-8')
+            self.offsets.append(len(self.data))
+            string_id = self.ids[value] = len(self.offsets) - 1
+        return string_id
+
+
+def grid_cell(lat, lng, degrees=GRID_DEGREES):
+    """Cell id of a point: row * columns + column, rows from -90°, columns from -180°"""
+    columns = round(360 / degrees)
+    row = min(int((lat + 90) // degrees), round(180 / degrees) - 1)
+    column = int((lng + 180) // degrees) % columns
+    return row * columns + column
+
+
+def build_grid(lats, lngs, degrees=GRID_DEGREES):
+    """(cells, starts, ids) arrays of the grid index over the located records"""
+    by_cell = {}
+    for i, (lat, lng) in enumerate(zip(lats, lngs)):
+        if lat == lat and lng == lng:  # not NaN
+            by_cell.setdefault(grid_cell(lat, lng, degrees), []).append(i)
+
+    cells, starts, ids = array('I'), array('I', [0]), array('I')
+    for cell in sorted(by_cell):
+        cells.append(cell)
+        ids.extend(by_cell[cell])
+        starts.append(len(ids))
+    return cells, starts, ids
+
+
+def _as_number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def build_snapshot(database, json_sha256=None):
+    """The snapshot bytes for a database ({'nicus': [...], ...}) whose JSON file hashes to `json_sha256`"""
+    nicus = database.get('nicus', [])
+    count = len(nicus)
+
+    dictionaries = {name: [] for name in DICT_COLUMNS}
+    dict_codes = {name: {} for name in DICT_COLUMNS}
+    columns = {
+        'lat': array('f'),
+        'lng': array('f'),
+        'beds': array('H'),
+        **{name: array(typecode) for name, typecode in DICT_COLUMNS.items()},
+        **{name: array('I') for name in STRING_COLUMNS},
+    }
+    strings = StringTable()
+
+    for nicu in nicus:
+        lat, lng = _as_number(nicu.get('lat')), _as_number(nicu.get('lng'))
+        located = lat is not None and lng is not None
+        columns['lat'].append(lat if located else float('nan'))
+        columns['lng'].append(lng if located else float('nan'))
+
+        beds = _as_number(nicu.get('beds'))
+        columns['beds'].append(int(beds) if beds is not None and 0 <= beds < NO_BEDS else NO_BEDS)
+
+        for name in DICT_COLUMNS:
+            value = nicu.get(name)
+            code = 0
+            if value:
+                code = dict_codes[name].get(value)
+                if code is None:
+                    dictionaries[name].append(value)
+                    code = dict_codes[name][value] = len(dictionaries[name])
+            columns[name].append(code)
+
+        for name in STRING_COLUMNS:
+            columns[name].append(strings.add(nicu.get(name)))
+
+    for name, values in dictionaries.items():
+        columns[f'dict.{name}'] = array('I', [strings.add(value) for value in values])
+
+    cells, starts, ids = build_grid(columns['lat'], columns['lng'])
+    columns.update({'grid.cells': cells, 'grid.starts': starts, 'grid.ids': ids})
+
+    sections = list(columns.items()) + [('strings.offsets', strings.offsets)]
+    body = bytearray()
+    layout = {}
+    for name, values in sections:
+        if sys.byteorder != 'little':
+            values = array(values.typecode, values)
+            values.byteswap()
+        layout[name] = {'type': _TYPE_NAMES[values.typecode], 'offset': len(body), 'length': len(values)}
+        body += values.tobytes()
+        body += b'\0' * (-len(body) % 4)
+    layout['strings.data'] = {'type': 'utf8', 'offset': len(body), 'length': len(strings.data)}
+    body += strings.data
+
+    header = json.dumps({
+        'version': VERSION,
+        'count': count,
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'json_sha256': json_sha256,
+        'grid': {'degrees': GRID_DEGREES},
+        'sections': layout,
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    # Pad so the body starts 4-byte aligned (8 magic + 4 length + header)
+    header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 4)
+
+    return MAGIC + len(header).to_bytes(4, 'little') + header + bytes(body)
+
+
+def write_snapshot(path, database, json_sha256=None):
+    """Build and atomically write a snapshot; returns its size in bytes"""
+    path = Path(path)
+    payload = build_snapshot(database, json_sha256)
+    fd, tmp_path = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(payload)
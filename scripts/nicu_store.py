@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+SQLite store for the NICU database (data/nicu.sqlite).
+
+Once created (scripts/nicu-store.py init), the store is the system of record
+and data/nicu-database.json is an export of it for the Next.js API:
+
+  - every record is one row of `nicus`, its full JSON in `record` plus the
+    columns that are queried (key, slug, state, level, lat/lng), indexed
+  - `nicus_rtree` is an R*Tree over lat/lng for bounding-box lookups
+  - writes are transactions (BEGIN IMMEDIATE, WAL, busy timeout), so two
+    scripts running at once wait for each other instead of each writing back
+    its own stale copy of the whole file
+
+The helpers at the bottom are what the scripts use. load_database() and
+write_database() go through the store when it exists and fall back to the
+JSON file when it doesn't; CheckpointJournal applies each enrichment result
+to its row in its own transaction (NicuStore.update).
+
+A script that loads the whole database, edits it and writes it back (an
+import, a dedup) doesn't replace the store with its copy: write_database()
+compares the copy with what load_database() handed out and commits only the
+records it added, changed or dropped, in one transaction. A changed record
+gets just the fields that script changed, merged onto the row as it is now,
+so an update another script committed in the meantime survives.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from nicu_snapshot import json_digest, snapshot_path, write_snapshot
+from nicu_tiles import tiles_dir, write_tiles
+from nicu_upsert import url_slug
+
+STORE_NAME = 'nicu.sqlite'
+# The JSON file the store is the system of record for; other files beside it are left alone
+DATABASE_NAME = 'nicu-database.json'
+
+# How long a writer waits for another script's transaction to finish
+BUSY_TIMEOUT = 60
+
+_MISSING = object()
+
+
+def record_key(nicu):
+    """Stable identity for a record: its nicudata URL, else name|state"""
+    if nicu.get('url'):
+        return nicu['url']
+    return f"{nicu.get('name', '')}|{nicu.get('state', '')}"
+
+
+def record_keys(nicus):
+    """
+    Unique keys for a list of records, in order. A handful of nicudata entries
+    share a URL; the second and later copies get #2, #3, ... the way
+    NicuStore._unique_key numbers them when they're stored in this order.
+    """
+    seen = {}
+    keys = []
+    for nicu in nicus:
+        key = record_key(nicu)
+        seen[key] = seen.get(key, 0) + 1
+        keys.append(key if seen[key] == 1 else f"{key}#{seen[key]}")
+    return keys
+
+
+def _write_json(db_path, database):
+    """
+    Write the database to a temp file in the same directory, then rename over
+    the original. For the database itself (DATABASE_NAME) the API's binary
+    snapshot and static tiles are rebuilt alongside; a side file written
+    through here (a scrape's --output, say) leaves them alone.
+    """
+    db_path = Path(db_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=db_path.name + '.', suffix='.tmp', dir=str(db_path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(database, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    if db_path.name == DATABASE_NAME:
+        write_snapshot(snapshot_path(db_path), database, json_digest(db_path))
+        write_tiles(tiles_dir(db_path), database)
+
+
+def _fingerprint(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def _merge_changes(stored, old, new):
+    """
+    Apply to `stored` what changed between `old` and `new` (one record, or its
+    nested enrichment metadata); fields nobody touched keep their stored value
+    """
+    for name in old.keys() - new.keys():
+        stored.pop(name, None)
+    for name, value in new.items():
+        before = old.get(name, _MISSING)
+        if value == before:
+            continue
+        if before is _MISSING and isinstance(value, dict):
+            before = {}
+        if isinstance(value, dict) and isinstance(before, dict) and isinstance(stored.get(name), dict):
+            _merge_changes(stored[name], before, value)
+        else:
+            stored[name] = value
+
+
+class Baseline:
+    """
+    What one loaded copy of the database looked like: (record, row id, key,
+    fingerprint) per row, and the meta
+    """
+
+    def __init__(self, rows, meta):
+        # The record objects are held so their id()s stay unique while the copy is in use
+        self.rows = rows
+        self.meta = meta
+        self.keys = {id(record): key for record, _, key, _ in rows if record is not None}
+
+    @classmethod
+    def of(cls, database, row_ids, keys):
+        rows = [(record, row_id, key, _fingerprint(record))
+                for record, row_id, key in zip(database['nicus'], row_ids, keys)]
+        meta = {name: _fingerprint(value) for name, value in database.items() if name not in ('nicus', 'total')}
+        return cls(rows, meta)
+
+
+class NicuStore:
+    """The NICU records in SQLite, with an R*Tree on lat/lng; safe to share between threads"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT,
+                                    isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS nicus (
+                id         INTEGER PRIMARY KEY,
+                key        TEXT NOT NULL UNIQUE,
+                slug       TEXT,
+                name       TEXT NOT NULL,
+                state      TEXT,
+                nicu_level TEXT,
+                lat        REAL,
+                lng        REAL,
+                position   INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                record     TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_nicus_state ON nicus (state);
+            CREATE INDEX IF NOT EXISTS idx_nicus_level ON nicus (nicu_level);
+            CREATE INDEX IF NOT EXISTS idx_nicus_slug ON nicus (slug);
+            CREATE INDEX IF NOT EXISTS idx_nicus_position ON nicus (position);
+            CREATE VIRTUAL TABLE IF NOT EXISTS nicus_rtree USING rtree (id, min_lat, max_lat, min_lng, max_lng);
+            CREATE TABLE IF NOT EXISTS meta (
+                name  TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+
+    @contextmanager
+    def transaction(self):
+        """One write transaction; other writers block (up to BUSY_TIMEOUT) until it commits"""
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+
+    def _save_row(self, row_id, key, record, position):
+        lat, lng = record.get('lat'), record.get('lng')
+        has_location = isinstance(lat, (int, float)) and isinstance(lng, (int, float))
+        values = (key, url_slug(record.get('url')), record.get('name') or '', record.get('state'),
+                  record.get('nicuLevel'), lat if has_location else None, lng if has_location else None,
+                  position, time.time(), json.dumps(record, ensure_ascii=False))
+
+        if row_id is None:
+            row_id = self.conn.execute(
+                'INSERT INTO nicus (key, slug, name, state, nicu_level, lat, lng, position, updated_at, record) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', values
+            ).lastrowid
+        else:
+            self.conn.execute(
+                'UPDATE nicus SET key = ?, slug = ?, name = ?, state = ?, nicu_level = ?, lat = ?, lng = ?, '
+                'position = ?, updated_at = ?, record = ? WHERE id = ?', values + (row_id,)
+            )
+
+        self.conn.execute('DELETE FROM nicus_rtree WHERE id = ?', (row_id,))
+        if has_location:
+            self.conn.execute('INSERT INTO nicus_rtree VALUES (?, ?, ?, ?, ?)', (row_id, lat, lat, lng, lng))
+        return row_id
+
+    def _rekey(self, key, record):
+        # A changed URL or name changes the key; keep it unique
+        if record_key(record) != key.split('#')[0]:
+            return self._unique_key(record)
+        return key
+
+    def _unique_key(self, record):
+        # A handful of nicudata entries share a URL; later copies get a #n suffix
+        key = record_key(record)
+        candidate, n = key, 1
+        while self.conn.execute('SELECT 1 FROM nicus WHERE key = ?', (candidate,)).fetchone():
+            n += 1
+            candidate = f"{key}#{n}"
+        return candidate
+
+    def replace_all(self, database):
+        """Make the store hold exactly `database` ({'nicus': [...], ...}) in one transaction"""
+        with self.transaction():
+            self.conn.execute('DELETE FROM nicus')
+            self.conn.execute('DELETE FROM nicus_rtree')
+            self.conn.execute('DELETE FROM meta')
+            for position, record in enumerate(database.get('nicus', [])):
+                self._save_row(None, self._unique_key(record), record, position)
+            self.conn.executemany(
+                'INSERT INTO meta (name, value) VALUES (?, ?)',
+                [(name, json.dumps(value)) for name, value in database.items() if name not in ('nicus', 'total')]
+            )
+
+    def load_database(self):
+        """The database in its JSON shape: {'nicus': [...], 'total': n, **meta}"""
+        return self.load_with_baseline()[0]
+
+    def load_with_baseline(self):
+        """The database, and the Baseline apply_changes() diffs an edited copy of it against"""
+        with self.lock:
+            rows = self.conn.execute('SELECT id, key, record FROM nicus ORDER BY position, id').fetchall()
+            meta = {name: json.loads(value) for name, value in self.conn.execute('SELECT name, value FROM meta')}
+        nicus = [json.loads(record) for _, _, record in rows]
+        database = {'nicus': nicus, 'total': len(nicus), **meta}
+        return database, Baseline.of(database, [row[0] for row in rows], [row[1] for row in rows])
+
+    def _baseline_by_key(self, database):
+        # For a database that wasn't loaded from the store: pair its records
+        # with the stored rows of the same key, so only real differences are written
+        stored = {key: (row_id, record)
+                  for row_id, key, record in self.conn.execute('SELECT id, key, record FROM nicus')}
+        rows = []
+        for record, key in zip(database.get('nicus', []), record_keys(database.get('nicus', []))):
+            match = stored.pop(key, None)
+            if match is not None:
+                rows.append((record, match[0], key, _fingerprint(json.loads(match[1]))))
+        # Stored rows the database doesn't have are dropped
+        rows.extend((None, row_id, key, None) for key, (row_id, _) in stored.items())
+        meta = {name: json.loads(value) for name, value in self.conn.execute('SELECT name, value FROM meta')}
+        return Baseline(rows, {name: _fingerprint(value) for name, value in meta.items()})
+
+    def apply_changes(self, database, baseline=None):
+        """
+        Save an edited copy of the database in one transaction, writing only
+        what differs from `baseline` (from load_with_baseline(); without one,
+        from the rows as stored): new records are inserted, records no longer
+        in the copy deleted, and changed records get their changed fields
+        merged onto the current row. Returns (inserted, updated, deleted) and
+        the Baseline for the copy as saved.
+        """
+        nicus = database.get('nicus', [])
+        counts = [0, 0, 0]
+        row_ids, keys = [], []
+
+        with self.transaction():
+            if baseline is None:
+                baseline = self._baseline_by_key(database)
+            present = {id(record) for record in nicus}
+            known = {id(record): (row_id, key, fingerprint)
+                     for record, row_id, key, fingerprint in baseline.rows if id(record) in present}
+
+            # Rows in the baseline that the copy no longer has go first, freeing their keys
+            gone = [(row_id,) for record, row_id, _, _ in baseline.rows if id(record) not in present]
+            for table in ('nicus', 'nicus_rtree'):
+                self.conn.executemany(f'DELETE FROM {table} WHERE id = ?', gone)
+            counts[2] = len(gone)
+
+            for position, record in enumerate(nicus):
+                row_id, key, fingerprint = known.get(id(record), (None, None, None))
+                if row_id is None:
+                    key = self._unique_key(record)
+                    row_ids.append(self._save_row(None, key, record, position))
+                    keys.append(key)
+                    counts[0] += 1
+                    continue
+
+                row_ids.append(row_id)
+                keys.append(key)
+                if _fingerprint(record) == fingerprint:
+                    self.conn.execute('UPDATE nicus SET position = ? WHERE id = ? AND position != ?',
+                                      (position, row_id, position))
+                    continue
+
+                row = self.conn.execute('SELECT key, record FROM nicus WHERE id = ?', (row_id,)).fetchone()
+                if row is None:
+                    # Deleted by another script since this copy was loaded; the delete stands
+                    continue
+                key, stored = row
+                merged = json.loads(stored)
+                _merge_changes(merged, json.loads(fingerprint), record)
+                keys[-1] = self._rekey(key, merged)
+                self._save_row(row_id, keys[-1], merged, position)
+                counts[1] += 1
+
+            meta = {name: value for name, value in database.items() if name not in ('nicus', 'total')}
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)',
+                [(name, json.dumps(value)) for name, value in meta.items()
+                 if baseline.meta.get(name) != _fingerprint(value)]
+            )
+            self.conn.executemany('DELETE FROM meta WHERE name = ?',
+                                  [(name,) for name in baseline.meta if name not in meta])
+
+        return tuple(counts), Baseline.of(database, row_ids, keys)
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute('SELECT record FROM nicus WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, key, fields, meta=None, meta_key=None):
+        """
+        Apply `fields` (and per-field enrichment `meta` under `meta_key`) to the
+        current stored version of one record, in its own transaction. Returns
+        the record's key afterwards (a new URL or name changes it), or None
+        if no record has that key.
+        """
+        with self.transaction():
+            row = self.conn.execute('SELECT id, position, record FROM nicus WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            row_id, position, stored = row
+            record = json.loads(stored)
+            record.update(fields)
+            if meta:
+                record.setdefault(meta_key, {}).update(meta)
+            key = self._rekey(key, record)
+            self._save_row(row_id, key, record, position)
+        return key
+
+    def insert(self, record):
+        """Append a record; returns its key"""
+        with self.transaction():
+            position = self.conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM nicus').fetchone()[0]
+            key = self._unique_key(record)
+            self._save_row(None, key, record, position)
+        return key
+
+    def delete(self, key):
+        """Remove a record; False if it wasn't there"""
+        with self.transaction():
+            row = self.conn.execute('SELECT id FROM nicus WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return False
+            self.conn.execute('DELETE FROM nicus WHERE id = ?', row)
+            self.conn.execute('DELETE FROM nicus_rtree WHERE id = ?', row)
+        return True
+
+    def within(self, min_lat, max_lat, min_lng, max_lng):
+        """Records whose coordinates fall inside a bounding box (R*Tree lookup)"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT n.record FROM nicus_rtree r JOIN nicus n ON n.id = r.id '
+                'WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lng >= ? AND r.max_lng <= ? '
+                'ORDER BY n.position',
+                (min_lat, max_lat, min_lng, max_lng)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def export_json(self, db_path):
+        """Regenerate the JSON file the API reads; returns the record count"""
+        database = self.load_database()
+        _write_json(db_path, database)
+        return database['total']
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def summary(self):
+        with self.lock:
+            total, located = self.conn.execute('SELECT COUNT(*), COUNT(lat) FROM nicus').fetchone()
+            states = self.conn.execute('SELECT COUNT(DISTINCT state) FROM nicus').fetchone()[0]
+        return f"NICU store: {total} records in {states} states, {located} with coordinates"
+
+
+def store_path(db_path):
+    """Where the store for a JSON database lives (next to it)"""
+    return Path(db_path).with_name(STORE_NAME)
+
+
+def open_store(db_path):
+    """The store for `db_path`, or None if it hasn't been created (or db_path isn't the database)"""
+    path = store_path(db_path)
+    return NicuStore(path) if Path(db_path).name == DATABASE_NAME and path.exists() else None
+
+
+# Baselines of the databases load_database() handed out, by id() of the database
+_baselines = {}
+
+
+def load_database(db_path):
+    """The database from the store if there is one, else from the JSON file"""
+    store = open_store(db_path)
+    if store is None:
+        with open(db_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    try:
+        database, baseline = store.load_with_baseline()
+    finally:
+        store.close()
+    _baselines[id(database)] = (database, baseline)
+    return database
+
+
+def database_keys(database):
+    """
+    The key of each record of a database from load_database(), in order: the
+    store's own keys when it came from the store, else record_keys()
+    """
+    _, baseline = _baselines.get(id(database), (None, None))
+    if baseline is None:
+        return record_keys(database.get('nicus', []))
+    return [baseline.keys.get(id(nicu)) or record_key(nicu) for nicu in database.get('nicus', [])]
+
+
+def write_database(db_path, database):
+    """
+    Save a whole database. With a store, only the records this copy added,
+    changed or dropped since load_database() are committed, in one
+    transaction, and the JSON is re-exported from the store; a database built
+    some other way is compared with the stored rows instead. Without a store
+    the JSON is written atomically.
+    """
+    store = open_store(db_path)
+    if store is None:
+        _write_json(db_path, database)
+        return
+    try:
+        _, baseline = _baselines.get(id(database), (None, None))
+        (inserted, updated, deleted), baseline = store.apply_changes(database, baseline)
+        _baselines[id(database)] = (database, baseline)
+        print(f"NICU store: {inserted} inserted, {updated} updated, {deleted} deleted")
+        store.export_json(db_path)
+    finally:
+        store.close()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Static geo-tiles of the NICU database for edge deployments (public/tiles/).
+
+On Cloudflare Workers the API can't read data/ from a filesystem, and
+bundling the national database slows every cold start. Instead the located
+records are sharded by geohash prefix into small static JSON files that the
+CDN serves, and lib/nicu-tiles.js fetches only the tiles a search circle
+touches:
+
+    public/tiles/manifest.json            precision, every tile's file and count,
+                                          and per state the tiles holding its NICUs
+    public/tiles/v/<prefix>.<hash>.json   {"prefix": ..., "nicus": [...]}
+
+Tile names carry a hash of their content, so they're cached forever
+(public/_headers, vercel.json) and a rebuild only changes the tiles whose
+NICUs changed; the small manifest is the only file that has to be revalidated.
+
+nicu_store.write_database() rebuilds the tiles with the snapshot; run
+scripts/build-tiles.py after editing the JSON any other way.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# 3 characters = 1.4° x 1.4° cells (~100 x 70 miles in the US): a 60-mile
+# search fetches 2-6 tiles of a few dozen NICUs each
+PRECISION = 3
+
+MANIFEST_NAME = 'manifest.json'
+TILE_DIR = 'v'
+
+# The fields the search handler returns
+TILE_FIELDS = ('name', 'state', 'county', 'nicuLevel', 'url', 'beds', 'lat', 'lng', 'formatted_address', 'phone')
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def tiles_dir(db_path):
+    """Where the tiles for a JSON database go: public/tiles/ of the same checkout"""
+    return Path(db_path).resolve().parent.parent / 'public' / 'tiles'
+
+
+def geohash(lat, lng, precision=PRECISION):
+    """Standard geohash of a point (bits alternate lng, lat; 5 per character)"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def _located(nicu):
+    lat, lng = nicu.get('lat'), nicu.get('lng')
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (lat, lng))
+
+
+def build_tiles(database, precision=PRECISION):
+    """(manifest, {relative file name: bytes}) for a database ({'nicus': [...], ...})"""
+    nicus = database.get('nicus', [])
+    by_prefix = {}
+    states = {}
+    for nicu in nicus:
+        state = states.setdefault(nicu.get('state') or 'Unknown', {'count': 0, 'located': 0, 'tiles': set()})
+        state['count'] += 1
+        if not _located(nicu):
+            continue
+        prefix = geohash(nicu['lat'], nicu['lng'], precision)
+        by_prefix.setdefault(prefix, []).append({field: nicu.get(field) for field in TILE_FIELDS})
+        state['located'] += 1
+        state['tiles'].add(prefix)
+
+    files = {}
+    tiles = {}
+    for prefix in sorted(by_prefix):
+        payload = json.dumps({'prefix': prefix, 'nicus': by_prefix[prefix]},
+                             ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        name = f"{TILE_DIR}/{prefix}.{hashlib.sha256(payload).hexdigest()[:12]}.json"
+        files[name] = payload
+        tiles[prefix] = {'file': name, 'count': len(by_prefix[prefix])}
+
+    manifest = {
+        'version': 1,
+        'precision': precision,
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'total': len(nicus),
+        'tiles': tiles,
+        'states': {name: {**state, 'tiles': sorted(state['tiles'])} for name, state in sorted(states.items())},
+    }
+    return manifest, files
+
+
+def _write_atomic(path, payload):
+    fd, tmp_path = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_tiles(directory, database):
+    """
+    Write the tiles and then the manifest, and remove tiles the new manifest
+    no longer lists. Returns (tiles written, tiles kept, tiles removed).
+    """
+    directory = Path(directory)
+    (directory / TILE_DIR).mkdir(parents=True, exist_ok=True)
+    manifest, files = build_tiles(database)
+
+    written = kept = 0
+    for name, payload in files.items():
+        path = directory / name
+        if path.exists():
+            kept += 1  # same name, same content
+            continue
+        _write_atomic(path, payload)
+        written += 1
+
+    # The manifest goes last, so it never points at a tile that isn't there yet
+    _write_atomic(directory / MANIFEST_NAME,
+                  json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    removed = 0
+    for path in (directory / TILE_DIR).glob('*.json'):
+        if f"{TILE_DIR}/{path.name}" not in files:
+            path.unlink()
+            removed += 1
+    return written, kept, removed
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Upsert engine for merging source records into the NICU database.
+
+Records are matched on the stable nicudata URL slug
+(https://nicudata.com/entry/<slug>/) and fall back to (name, state) for
+records without one. A slug match updates the level, state and URL in place
+and keeps every enrichment field (lat/lng, phone, formatted_address,
+place_id, ...), so a re-import never costs another round of API calls.
+
+What an import must not do is undo curated data:
+  - name and county are only filled in when the record has none; the raw
+    export text is noisier than what clean-nicu-data.py left behind
+  - parser placeholders ('Unknown', '') count as no value
+  - a record without a nicudata URL (e.g. a neonatologysolutions bed record)
+    that only matches on name+state is left exactly as it is; it came from a
+    different source and merge-bed-sources.py decides how the two relate
+  - a row with exactly the name and state of a record under a different slug
+    (nicudata re-listing st-rose-siena as st-rose-dominican-hospital-siena-
+    campus, or a "-2" copy of an entry) is a conflict: it is neither inserted
+    as a duplicate nor allowed to move the record to the other slug, and is
+    listed in `conflicts` for a person to resolve
+"""
+
+import re
+from collections import Counter
+
+# Fields owned by the upstream export; everything else on a record is enrichment
+SOURCE_FIELDS = ('name', 'state', 'county', 'nicuLevel', 'url')
+
+# Source fields an import only fills in, never replaces
+FILL_ONLY_FIELDS = ('name', 'county')
+
+# What parsers emit for "no value"
+PLACEHOLDERS = ('Unknown', '')
+
+
+def has_value(value):
+    return value is not None and value not in PLACEHOLDERS
+
+_slug_re = re.compile(r'/entry/([^/?#]+)')
+
+
+def url_slug(url):
+    """The <slug> of a nicudata entry URL, or None"""
+    if not url:
+        return None
+    match = _slug_re.search(url)
+    return match.group(1).lower() if match else None
+
+
+def name_state_key(record):
+    return (record.get('name', '').lower().strip(), record.get('state', '').lower().strip())
+
+
+def match_key(record):
+    """Stable string key for a record: its slug, or "name|state" without one"""
+    return url_slug(record.get('url')) or '|'.join(name_state_key(record))
+
+
+class UpsertIndex:
+    """O(1) slug and name+state index over a list of database records"""
+
+    def __init__(self, records):
+        self.records = records
+        self.by_slug = {}
+        self.by_name_state = {}
+        self.seen = set()
+        self.counts = Counter()
+        # (incoming, existing) pairs: same name and state, different slugs
+        self.conflicts = []
+
+        for record in records:
+            self._index(record)
+
+    def _index(self, record):
+        slug = url_slug(record.get('url'))
+        if slug:
+            self.by_slug.setdefault(slug, record)
+        self.by_name_state.setdefault(name_state_key(record), record)
+
+    def find(self, record):
+        slug = url_slug(record.get('url'))
+        if slug and slug in self.by_slug:
+            return self.by_slug[slug]
+        return self.by_name_state.get(name_state_key(record))
+
+    def touch(self, key):
+        """Mark the record with this match_key() as seen; False if it's no longer in the database"""
+        record = self.by_slug.get(key)
+        if record is None and '|' in key:
+            record = self.by_name_state.get(tuple(key.split('|', 1)))
+        if record is None:
+            return False
+        self.seen.add(id(record))
+        self.counts['skipped'] += 1
+        return True
+
+    def upsert(self, incoming):
+        """Insert or update one source record; returns 'inserted', 'updated', 'unchanged' or 'conflict'"""
+        existing = self.find(incoming)
+
+        if existing is None:
+            self.records.append(incoming)
+            self._index(incoming)
+            self.seen.add(id(incoming))
+            self.counts['inserted'] += 1
+            return 'inserted'
+
+        self.seen.add(id(existing))
+
+        # Matched on name+state alone to another nicudata entry: report, don't guess
+        slug = url_slug(incoming.get('url'))
+        if slug and url_slug(existing.get('url')) not in (None, slug):
+            self.conflicts.append((incoming, existing))
+            self.counts['conflict'] += 1
+            return 'conflict'
+
+        # Matched on name+state alone to a record from another source: leave it be
+        if not url_slug(existing.get('url')):
+            self.counts['unchanged'] += 1
+            return 'unchanged'
+
+        changes = {}
+        for field in SOURCE_FIELDS:
+            value = incoming.get(field)
+            if not has_value(value) or existing.get(field) == value:
+                continue
+            if field in FILL_ONLY_FIELDS and has_value(existing.get(field)):
+                continue
+            changes[field] = value
+        # Upstream CSVs have no bed counts; never let their null erase a scraped one
+        if incoming.get('beds') is not None and existing.get('beds') != incoming['beds']:
+            changes['beds'] = incoming['beds']
+
+        if not changes:
+            self.counts['unchanged'] += 1
+            return 'unchanged'
+
+        old_key = name_state_key(existing)
+        existing.update(changes)
+
+        # Keep the name+state index pointing at the renamed record
+        if self.by_name_state.get(old_key) is existing and name_state_key(existing) != old_key:
+            del self.by_name_state[old_key]
+        self._index(existing)
+
+        self.counts['updated'] += 1
+        return 'updated'
+
+    def unseen(self, only_with_url=True):
+        """
+        Records this import didn't touch. With only_with_url, just the ones that
+        came from nicudata (records from other sources are never "removed").
+        """
+        return [
+            r for r in self.records
+            if id(r) not in self.seen and (r.get('url') or not only_with_url)
+        ]
+
+    def print_conflicts(self, limit=10):
+        """List the rows that matched another entry's name and state"""
+        if not self.conflicts:
+            return
+        print(f"\n{len(self.conflicts)} rows share a name and state with a record under another slug "
+              f"(not imported; merge or rename them by hand):")
+        for incoming, existing in self.conflicts[:limit]:
+            print(f"  - {incoming['name']} ({incoming['state']}): "
+                  f"{url_slug(incoming.get('url'))} vs {url_slug(existing.get('url'))}")
+
+    @property
+    def changed(self):
+        return bool(self.counts['inserted'] or self.counts['updated'])
+
+    def summary(self):
+        return (f"inserted {self.counts['inserted']}, updated {self.counts['updated']}, "
+                f"unchanged {self.counts['unchanged']}, conflicts {self.counts['conflict']}, "
+                f"skipped (hash match) {self.counts['skipped']}, removed upstream {len(self.unseen())}")
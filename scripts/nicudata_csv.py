@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Streaming parser for the nicudata.com CSV exports.
+
+Each export row looks like
+    Hospital Name ST County 3 View (https://nicudata.com/entry/<slug>/)
+but the exports are inconsistent: some quote the name (or the name + state +
+county), and some put many rows on one physical line. Records are therefore
+split on the trailing "View (URL)" rather than on newlines, and yielded one at
+a time so arbitrarily large exports never need to be held in memory.
+All patterns are compiled once at import.
+"""
+
+import glob
+import hashlib
+import re
+
+from us_states import STATE_ABBREVIATIONS
+
+VALID_STATES = frozenset(STATE_ABBREVIATIONS)
+
+LEVEL_NAMES = {
+    '1': 'Level I',
+    '2': 'Level II',
+    '3': 'Level III',
+    '4': 'Level IV'
+}
+
+# "View (URL)" ends every record
+_record_end_re = re.compile(r'View\s+\((https?://[^\)]+)\)')
+# NICU level: a single digit right before "View"
+_level_re = re.compile(r'\s+(\d)\s*$')
+# Pattern 1: "Hospital Name" STATE County
+_quoted_name_re = re.compile(r'"([^"]+)"\s+([A-Z]{2})\s+(.+)$')
+# Pattern 2: "Hospital Name STATE County" (state is inside quotes)
+_quoted_all_re = re.compile(r'"(.+)"$')
+# Separators and stray CSV commas between records on one line
+_leading_junk_re = re.compile(r'^[\s,\ufeff]+')
+# What's left after the last record on a line, e.g. the closing quote of a fully quoted row
+_trailing_junk_re = re.compile(r'^[\s,"]*$')
+
+HEADER_PREFIX = 'Hospital Name,'
+
+
+def parse_nicu_level(level_str):
+    """Convert numeric level (1-4) to Level I-IV format"""
+    return LEVEL_NAMES.get(str(level_str).strip(), None)
+
+
+def get_state_full_name(abbrev):
+    """Convert state abbreviation to full name"""
+    return STATE_ABBREVIATIONS.get(abbrev.upper().strip(), abbrev)
+
+
+def _split_name_state_county(parts):
+    """
+    Find the LAST valid state abbreviation that still leaves a county after it
+    (hospital names can contain state-like words, and counties can end in one:
+    "... DC Washington DC"); a state in the last position is the fallback.
+    """
+    candidates = [i for i in range(len(parts)) if parts[i] in VALID_STATES]
+    if not candidates:
+        return None, None, None
+    with_county = [i for i in candidates if i < len(parts) - 1]
+    i = with_county[-1] if with_county else candidates[-1]
+    return ' '.join(parts[:i]).strip(), parts[i], ' '.join(parts[i + 1:]).strip()
+
+
+def _record(name, state, county, level, url):
+    return {
+        'name': name,
+        'state': get_state_full_name(state),
+        # None, not a placeholder, so an upsert never blanks out a real county
+        'county': county or None,
+        'nicuLevel': parse_nicu_level(level),
+        'url': url,
+        'beds': None
+    }
+
+
+def parse_record(body, url):
+    """Parse the text before "View (URL)" into a record, or None if it doesn't fit"""
+    level_match = _level_re.search(body)
+    if not level_match:
+        return None
+
+    level = level_match.group(1)
+    body = body[:level_match.start()].strip()
+
+    # A fully quoted row ("Name ST County 3 View (URL)") leaves an unbalanced opening quote
+    if body.count('"') % 2 == 1 and body.startswith('"'):
+        body = body[1:]
+
+    # If line starts with quotes, extract the name from quotes
+    if body.startswith('"'):
+        quote_match = _quoted_name_re.match(body)
+        if quote_match and quote_match.group(2) in VALID_STATES:
+            return _record(quote_match.group(1).strip(), quote_match.group(2),
+                           quote_match.group(3).strip(), level, url)
+
+        quote_match2 = _quoted_all_re.match(body)
+        if quote_match2:
+            name, state, county = _split_name_state_county(quote_match2.group(1).split())
+            if name:
+                return _record(name, state, county, level, url)
+
+    name, state, county = _split_name_state_county(body.split())
+    if not name:
+        return None
+
+    return _record(name, state, county, level, url)
+
+
+def parse_csv_line(line):
+    """Parse a single-record line from the CSV file"""
+    line = _leading_junk_re.sub('', line.strip())
+    match = _record_end_re.search(line)
+    if not line or not match:
+        return None
+    return parse_record(line[:match.start()].strip(), match.group(1))
+
+
+def iter_segments(f):
+    """
+    Yield (line_num, text) for each record in an open export, where text is
+    everything up to and including "View (URL)". Handles several records per
+    line and records that don't end in a URL (yielded on their own so the
+    caller can report them).
+    """
+    for line_num, line in enumerate(f, 1):
+        if line_num == 1:
+            line = line.lstrip('\ufeff')
+            if line.startswith(HEADER_PREFIX):
+                continue
+
+        pos = 0
+        for match in _record_end_re.finditer(line):
+            segment = _leading_junk_re.sub('', line[pos:match.end()])
+            pos = match.end()
+            if segment:
+                yield line_num, segment
+
+        rest = line[pos:]
+        if not _trailing_junk_re.match(rest):
+            yield line_num, _leading_junk_re.sub('', rest).strip()
+
+
+def expand_paths(patterns):
+    """Expand files and globs, keeping order and dropping repeats"""
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def row_hash(text):
+    """Content hash of one record's raw text, used to skip unchanged rows on re-import"""
+    return hashlib.blake2b(text.strip().encode('utf-8'), digest_size=16).hexdigest()
+
+
+def parse_segment(text):
+    """Parse one segment from iter_segments() into a record, or None"""
+    match = _record_end_re.search(text)
+    return parse_record(text[:match.start()].strip(), match.group(1)) if match else None
+
+
+def iter_segments_in(patterns):
+    """Stream (path, line_num, text) over every record segment in every export"""
+    for path in expand_paths(patterns):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_num, text in iter_segments(f):
+                yield path, line_num, text
+
+
+def iter_records(patterns):
+    """
+    Stream (path, line_num, text, record) over every record in every export.
+    `record` is None when the text couldn't be parsed.
+    """
+    for path, line_num, text in iter_segments_in(patterns):
+        yield path, line_num, text, parse_segment(text)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+nicudata.com entry pages (https://nicudata.com/entry/<slug>/): HTTP session
+setup and a one-pass parser that pulls the bed count, street address and
+phone number out of a page together.
+"""
+
+import re
+from html.parser import HTMLParser
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SCRAPE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+}
+
+# Requests per second to nicudata.com across all scraping threads
+NICUDATA_RATE = 4.0
+
+# Pattern: Street address with number
+ADDRESS_RE = re.compile(
+    r'\d+\s+[\w\s]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Way|Court|Ct|Circle|Cir|Parkway|Pkwy)[,\s]+[\w\s]+,\s*[A-Z]{2}\s+\d{5}',
+    re.IGNORECASE
+)
+PHONE_RE = re.compile(r'\(?\b(\d{3})\)?[\s.-]*(\d{3})[\s.-]+(\d{4})\b')
+# "Beds: 42", "NICU Beds 42", "Number of Beds - 42" or "42 NICU beds"
+BEDS_RE = re.compile(
+    r'\b(?:(?:NICU\s+)?Beds|Bed\s+Count|Number\s+of\s+Beds)\s*[:\-]?\s*(\d{1,3})\b'
+    r'|\b(\d{1,3})\s+(?:NICU\s+)?beds\b',
+    re.IGNORECASE
+)
+
+_SKIP_TAGS = frozenset(['script', 'style', 'noscript', 'template'])
+
+
+def make_session(pool_size):
+    """A requests.Session whose connection pool can serve `pool_size` threads at once"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=2)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(SCRAPE_HEADERS)
+    return session
+
+
+class EntryPageParser(HTMLParser):
+    """Collects a page's visible text and its tel: links in one pass"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text = []
+        self.tel_links = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == 'a':
+            href = dict(attrs).get('href') or ''
+            if href.startswith('tel:'):
+                self.tel_links.append(href[4:])
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.text.append(data)
+
+
+def format_phone(digits):
+    """'(205) 759-7111' from any 10 or 11 digit US number, else None"""
+    digits = re.sub(r'\D', '', digits or '')
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    if len(digits) != 10:
+        return None
+    return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+
+
+def parse_entry_page(html):
+    """Returns {'street_address', 'phone', 'beds'} from an entry page; missing values are None"""
+    parser = EntryPageParser()
+    parser.feed(html)
+    parser.close()
+    text = ' '.join(' '.join(parser.text).split())
+
+    match = ADDRESS_RE.search(text)
+    street_address = match.group(0).strip() if match else None
+
+    phone = None
+    for link in parser.tel_links:
+        phone = format_phone(link)
+        if phone:
+            break
+    if not phone:
+        match = PHONE_RE.search(text)
+        phone = format_phone(''.join(match.groups())) if match else None
+
+    beds = None
+    match = BEDS_RE.search(text)
+    if match:
+        beds = int(match.group(1) or match.group(2))
+        if beds == 0:
+            beds = None
+
+    return {'street_address': street_address, 'phone': phone, 'beds': beds}
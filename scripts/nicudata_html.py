@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Streaming extractor for the saved nicudata.com "Database – NICU Data" page.
+
+The listing is a JetEngine grid: every hospital is a div.jet-listing-grid__item
+card holding four h2.elementor-heading-title headings (name, state, county,
+level) and a "View" link to https://nicudata.com/entry/<slug>/.
+
+ListingParser is an event-based html.parser.HTMLParser fed in fixed-size
+chunks, so only the current card is ever held in memory and each record is
+yielded as soon as its card closes. (lxml's iterparse would do the same, but
+lxml isn't a dependency here and the stdlib parser is fast enough.)
+
+listing_navigation() reads a live listing page's pagination settings, which
+scrape-nicudata.py uses to fetch the remaining pages.
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+
+CARD_CLASS = 'jet-listing-grid__item'
+HEADING_CLASS = 'elementor-heading-title'
+
+LEVEL_NAMES = {'1': 'Level I', '2': 'Level II', '3': 'Level III', '4': 'Level IV'}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _has_class(attrs, name):
+    for key, value in attrs:
+        if key == 'class' and value and name in value.split():
+            return True
+    return False
+
+
+def card_record(headings, url=None):
+    """Turn a card's heading texts into a record, or None if it has no name and state"""
+    if not headings:
+        return None
+
+    name = headings[0]
+    state = county = level = None
+
+    for text in headings[1:]:
+        if not state and len(text) == 2 and text.isupper() and text.isalpha():
+            state = text
+        elif not level and text in LEVEL_NAMES:
+            level = LEVEL_NAMES[text]
+        elif state and not county and not level and 3 < len(text) < 50 and not text.isdigit():
+            county = text
+
+    if not name or not state:
+        return None
+
+    record = {
+        'name': name,
+        'state': state,
+        'county': county or '',
+        'nicuLevel': level or '',
+        'beds': None
+    }
+    if url:
+        record['url'] = url
+    return record
+
+
+class ListingParser(HTMLParser):
+    """Collects one listing card at a time; finished records pile up in .records"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.records = []
+        self._card_depth = 0      # open <div>s inside the current card, 0 = not in a card
+        self._headings = []
+        self._heading = None      # text parts of the open heading
+        self._url = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'div':
+            if self._card_depth:
+                self._card_depth += 1
+            elif _has_class(attrs, CARD_CLASS):
+                self._card_depth = 1
+                self._headings = []
+                self._url = None
+            return
+
+        if not self._card_depth:
+            return
+
+        if tag == 'h2' and _has_class(attrs, HEADING_CLASS):
+            self._heading = []
+        elif tag == 'a' and not self._url:
+            href = dict(attrs).get('href') or ''
+            if '/entry/' in href:
+                self._url = href
+
+    def handle_endtag(self, tag):
+        if not self._card_depth:
+            return
+
+        if tag == 'h2' and self._heading is not None:
+            text = ' '.join(''.join(self._heading).split())
+            if text:
+                self._headings.append(text)
+            self._heading = None
+        elif tag == 'div':
+            self._card_depth -= 1
+            if not self._card_depth:
+                record = card_record(self._headings, self._url)
+                if record:
+                    self.records.append(record)
+                self._headings = []
+
+    def handle_data(self, data):
+        if self._heading is not None:
+            self._heading.append(data)
+
+
+def iter_listing(path, chunk_size=CHUNK_SIZE):
+    """Stream records from a saved listing page, one card at a time"""
+    parser = ListingParser()
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            if parser.records:
+                yield from parser.records
+                parser.records.clear()
+    parser.close()
+    yield from parser.records
+
+
+def listing_records(html):
+    """All records in one chunk of listing HTML (a page, or the html of an AJAX response)"""
+    parser = ListingParser()
+    parser.feed(html)
+    parser.close()
+    return parser.records
+
+
+_ajax_url_re = re.compile(r'"ajaxlisting"\s*:\s*"([^"]+)"')
+
+
+class NavigationParser(HTMLParser):
+    """Finds how a listing page paginates: JetEngine load-more settings and JetSmartFilters pages"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.items = None           # attributes of the first .jet-listing-grid__items
+        self.element_id = None      # data-id of the listing grid widget
+        self.filter_pages = 0       # highest page in a .jet-filters-pagination
+        self.ajax_url = None
+        self._in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'script':
+            self._in_script = True
+            return
+
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+
+        if 'elementor-widget-jet-listing-grid' in classes and self.items is None:
+            self.element_id = attrs.get('data-id')
+        if 'jet-listing-grid__items' in classes and self.items is None:
+            self.items = attrs
+        if any(c.startswith('jet-filters-pagination__') for c in classes):
+            value = attrs.get('data-value') or ''
+            if value.isdigit():
+                self.filter_pages = max(self.filter_pages, int(value))
+
+    def handle_endtag(self, tag):
+        if tag == 'script':
+            self._in_script = False
+
+    def handle_data(self, data):
+        if self._in_script and not self.ajax_url:
+            match = _ajax_url_re.search(data)
+            if match:
+                self.ajax_url = match.group(1).replace('\\/', '/')
+
+
+def listing_navigation(html):
+    """
+    How to reach the rest of a listing, from its first page:
+        {'pages', 'nav' (JetEngine data-nav settings or None), 'element_id',
+         'queried_id', 'ajax_url', 'filter_pages'}
+    """
+    parser = NavigationParser()
+    parser.feed(html)
+    parser.close()
+
+    items = parser.items or {}
+    try:
+        nav = json.loads(items.get('data-nav') or 'null')
+    except ValueError:
+        nav = None
+    pages = items.get('data-pages') or ''
+
+    return {
+        'pages': int(pages) if pages.isdigit() else 0,
+        'nav': nav,
+        'element_id': parser.element_id,
+        'queried_id': items.get('data-queried-id'),
+        'ajax_url': parser.ajax_url,
+        'filter_pages': parser.filter_pages,
+    }
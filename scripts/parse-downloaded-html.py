@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 """
 Parse the downloaded HTML file to extract all 1432 NICU hospitals
+
+Usage:
+    python scripts/parse-downloaded-html.py "Database – NICU Data.html"
 """
 
 from bs4 import BeautifulSoup
 import json
-import re
+import sys
+
+if len(sys.argv) != 2:
+    print(f"Usage: {sys.argv[0]} <saved page.html>")
+    sys.exit(1)
 
-html_file = '/Users/ruthellis/Downloads/00. ALCEA/NICUNEARBY/Database – NICU Data.html'
+html_file = sys.argv[1]
 
 print("Reading HTML file...")
 with open(html_file, 'r', encoding='utf-8') as f:
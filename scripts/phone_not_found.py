@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+The list of hospitals Google has no phone number for (data/phone-not-found.json).
+
+fetch-phone-numbers.py adds a hospital each time a lookup comes back without
+a phone, keyed by its journal key, with a retry-after time that backs off
+(enrichment_meta.retry_delay); refresh-stale.py doesn't count a missing phone
+as stale until then.
+"""
+
+import json
+import os
+from pathlib import Path
+
+NOT_FOUND_PATH = Path(__file__).parent.parent / 'data' / 'phone-not-found.json'
+
+
+def load_not_found(path=NOT_FOUND_PATH):
+    """{key: {'name', 'attempts', 'retry_after'}}"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_not_found(not_found, path=NOT_FOUND_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(not_found, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_deferred(not_found, key, now):
+    """True while a hospital's phone is known to be missing and not due for another look"""
+    entry = not_found.get(key)
+    return bool(entry) and entry['retry_after'] > now
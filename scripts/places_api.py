@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Google Places API (New) helpers shared by the enrichment scripts.
+
+One Text Search call returns geometry, formatted address, phone and place_id
+together; once a record has a place_id, refreshes go straight to Place Details.
+Both return the same normalized dict:
+    {'place_id', 'lat', 'lng', 'formatted_address', 'phone'}
+"""
+
+import requests
+
+from rate_limit import get_limiter
+
+SEARCH_URL = 'https://places.googleapis.com/v1/places:searchText'
+DETAILS_URL = 'https://places.googleapis.com/v1/places/{place_id}'
+
+# Only ask for what we store - the field mask also decides the billing SKU
+FIELDS = ['id', 'location', 'formattedAddress', 'nationalPhoneNumber']
+
+# Record fields a lookup fills in
+ENRICHED_FIELDS = ('lat', 'lng', 'formatted_address', 'phone', 'place_id')
+
+
+class PlacesError(Exception):
+    """
+    A failed Places call. `retryable` is True for transient failures (quota,
+    network, 5xx) that should be retried later, False for requests Google
+    rejected (400 bad request, 403 key or billing problem) that won't succeed
+    as they are.
+    """
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _normalize(place):
+    location = place.get('location') or {}
+    return {
+        'place_id': place.get('id'),
+        'lat': location.get('latitude'),
+        'lng': location.get('longitude'),
+        'formatted_address': place.get('formattedAddress'),
+        'phone': place.get('nationalPhoneNumber'),
+    }
+
+
+def _request(method, url, api_key, field_mask, **kwargs):
+    headers = {
+        'X-Goog-Api-Key': api_key,
+        'X-Goog-FieldMask': field_mask,
+    }
+    get_limiter('google').acquire()
+    try:
+        response = requests.request(method, url, headers=headers, timeout=10, **kwargs)
+    except requests.RequestException as e:
+        raise PlacesError(str(e))
+
+    if response.status_code == 404:
+        return None
+    if response.status_code == 429 or response.status_code >= 500:
+        raise PlacesError(f"HTTP {response.status_code}")
+    if not 200 <= response.status_code < 300:
+        raise PlacesError(f"HTTP {response.status_code}: {response.text[:200]}", retryable=False)
+    try:
+        return response.json()
+    except ValueError as e:
+        raise PlacesError(f"invalid JSON: {e}")
+
+
+def search_place(query, api_key):
+    """Text Search for the best match; returns the normalized dict or None if nothing matched"""
+    data = _request(
+        'POST', SEARCH_URL, api_key,
+        ','.join(f'places.{f}' for f in FIELDS),
+        json={'textQuery': query, 'regionCode': 'us', 'maxResultCount': 1},
+    )
+    places = (data or {}).get('places') or []
+    return _normalize(places[0]) if places else None
+
+
+def place_details(place_id, api_key):
+    """Place Details for a known place_id; returns the normalized dict or None if it no longer exists"""
+    data = _request('GET', DETAILS_URL.format(place_id=place_id), api_key, ','.join(FIELDS))
+    return _normalize(data) if data else None
+
+
+def max_calls(nicu):
+    """Most Places calls lookup_hospital() can make for a record: a stale place_id costs a search too"""
+    return 2 if nicu.get('place_id') else 1
+
+
+def lookup_hospital(nicu, api_key):
+    """
+    Look up one hospital record: Place Details if it has a place_id, else Text Search.
+    Returns (place or None, PlacesError or None, Places calls made); a place
+    of None with no error means not found.
+    """
+    calls = 0
+    try:
+        if nicu.get('place_id'):
+            calls += 1
+            place = place_details(nicu['place_id'], api_key)
+            if place:
+                return place, None, calls
+            # Stale place_id (place merged or removed): fall back to a search
+
+        query = f"{nicu['name']}, {nicu.get('county', '')}, {nicu['state']}, USA"
+        calls += 1
+        return search_place(query, api_key), None, calls
+    except PlacesError as e:
+        return None, e, calls
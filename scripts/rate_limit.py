@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiters shared by the geocoding scripts.
+One bucket per provider, safe to use from multiple worker threads.
+"""
+
+import threading
+import time
+
+# Requests per second allowed for each provider
+# Google allows 50 QPS for Geocoding; stay a little under it.
+# Nominatim's usage policy is an absolute maximum of 1 request per second.
+PROVIDER_RATES = {
+    'google': 40.0,
+    'nominatim': 1.0,
+}
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `capacity` banked"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider, rate=None):
+    """Return the process-wide bucket for a provider (created on first use)"""
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = TokenBucket(rate or PROVIDER_RATES.get(provider, 1.0))
+        return _limiters[provider]
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Refresh the stalest / least trusted enrichment fields within an API budget.
+
+Each record is scored from its per-field `enriched` metadata (see
+enrichment_meta.py): fields that were never stamped, are missing, are older
+than --max-age-days or have low confidence score highest. Records are
+refreshed in that order until --budget Places calls are spent (a record
+with a stale place_id costs two: Details, then a search), so a weekly job
+runs in bounded time no matter how big the database gets.
+
+A record whose lookup found nothing or failed is stamped with the attempt
+and skipped until its backoff (enrichment_meta.retry_delay) has passed, and
+a phone on fetch-phone-numbers.py's not-found list isn't counted as
+missing, so the same unfindable hospitals don't take the budget every run.
+A request Google rejects outright (400/403) stops the run unstamped.
+
+Usage:
+    python scripts/refresh-stale.py --budget 200
+    python scripts/refresh-stale.py --budget 200 --dry-run
+"""
+
+import argparse
+import heapq
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+
+from checkpoint_journal import CheckpointJournal
+from enrichment_meta import attempt_meta, field_age_days, field_confidence, location_confidence, retry_after
+from phone_not_found import is_deferred, load_not_found
+from places_api import ENRICHED_FIELDS, lookup_hospital, max_calls
+
+# Fields that decide whether a record needs a refresh
+TRACKED_FIELDS = ('lat', 'phone')
+
+
+def staleness(nicu, max_age_days, min_confidence, now, phone_deferred=False):
+    """
+    Priority score for refreshing a record; 0 means it's fresh enough to leave
+    alone, or its last lookup failed and it's still backing off
+    """
+    backoff = retry_after(nicu)
+    if backoff is not None and backoff > now.timestamp():
+        return 0.0
+
+    score = 0.0
+
+    for field in TRACKED_FIELDS:
+        if not nicu.get(field):
+            # Google is known to have no phone for it; don't ask again yet
+            if not (field == 'phone' and phone_deferred):
+                score += 3.0
+            continue
+
+        age = field_age_days(nicu, field, now)
+        if age is None:
+            # Predates enrichment metadata: we don't know when or how it was found
+            score += 2.0
+        elif age > max_age_days:
+            score += 1.0 + (age - max_age_days) / max_age_days
+
+    confidence = field_confidence(nicu, 'lat')
+    if confidence is None and nicu.get('lat'):
+        confidence = location_confidence(nicu.get('formatted_address'))
+    if confidence is not None and confidence < min_confidence:
+        score += 1.0 + (min_confidence - confidence)
+
+    return score
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh the stalest enrichment fields within an API budget')
+    parser.add_argument('--budget', type=int, default=100,
+                        help='maximum number of Places calls to make (default: 100)')
+    parser.add_argument('--max-age-days', type=float, default=90,
+                        help='fields older than this are stale (default: 90)')
+    parser.add_argument('--min-confidence', type=float, default=0.5,
+                        help='locations below this confidence are refreshed (default: 0.5)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='number of requests in flight at once (default: 8)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='show what would be refreshed without calling the API')
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+
+    api_key = os.environ.get('GoogleMaps') or os.environ.get('GOOGLE_MAPS_API_KEY')
+    if not api_key and not args.dry_run:
+        print("ERROR: GoogleMaps API key not found!")
+        print("Please set the GoogleMaps environment variable")
+        return
+
+    journal = CheckpointJournal(db_path)
+    database = journal.load()
+    nicus = database.get('nicus', [])
+
+    now = datetime.now(timezone.utc)
+    not_found = load_not_found()
+    scored = [
+        (staleness(nicu, args.max_age_days, args.min_confidence, now,
+                   is_deferred(not_found, journal.key(nicu), now.timestamp())), i)
+        for i, nicu in enumerate(nicus)
+    ]
+    candidates = sum(1 for score, _ in scored if score > 0)
+    # Every lookup costs at least one call, so no more than --budget records can be refreshed
+    queue = deque((score, nicus[i]) for score, i in heapq.nlargest(args.budget, scored) if score > 0)
+
+    print(f"Loaded {len(nicus)} hospitals")
+    print(f"Stale, low-confidence and not backing off: {candidates}")
+    print(f"Refreshing this run: up to {len(queue)} (budget {args.budget} Places calls)\n")
+
+    if args.dry_run:
+        reserved = 0
+        for score, nicu in queue:
+            reserved += max_calls(nicu)
+            if reserved > args.budget:
+                break
+            print(f"  {score:5.2f}  {nicu['name'][:50]} ({nicu['state']})")
+        return
+
+    refreshed = 0
+    failed = 0
+    spent = 0
+    reserved = 0
+    rejected = None
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        running = {}
+
+        def submit_more():
+            # Start lookups while their worst-case cost still fits in the budget
+            nonlocal reserved
+            while (queue and rejected is None and len(running) < max(1, args.concurrency)
+                   and spent + reserved + max_calls(queue[0][1]) <= args.budget):
+                _, nicu = queue.popleft()
+                reserved += max_calls(nicu)
+                running[pool.submit(lookup_hospital, nicu, api_key)] = nicu
+
+        submit_more()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                nicu = running.pop(future)
+                reserved -= max_calls(nicu)
+                place, error, calls = future.result()
+                spent += calls
+
+                if place:
+                    fields = {k: v for k, v in place.items() if k in ENRICHED_FIELDS and v is not None}
+                    journal.record(nicu, fields, 'google-places', location_confidence(place.get('formatted_address')))
+                    refreshed += 1
+                elif error is not None and not error.retryable:
+                    # A bad key or request fails every lookup alike; nothing to back off from
+                    rejected = error
+                    print(f"  ✗ {nicu['name'][:50]}: {error} - stopping")
+                else:
+                    failed += 1
+                    journal.record(nicu, {}, meta=attempt_meta(nicu, 'error' if error else 'not_found'))
+                    print(f"  ✗ {nicu['name'][:50]}: {error or 'not found'} (backing off)")
+            submit_more()
+
+    print("\n💾 Saving final results...")
+    journal.compact(database)
+
+    print(f"\n✓ Refresh complete!")
+    print(f"  Refreshed: {refreshed}")
+    print(f"  Failed (backing off): {failed}")
+    print(f"  Places calls: {spent} of {args.budget}")
+    print(f"  Still stale: {max(0, candidates - refreshed - failed)}")
+    if rejected is not None:
+        print(f"⚠ Stopped early, Google rejected the request: {rejected}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,189 +2,203 @@
 """
 Scrape NICU data from neonatologysolutions.com for all US states - Version 3
 This version uses multiple parsing strategies to handle different page formats
+
+Pages are fetched concurrently with asyncio/aiohttp over one shared connection
+pool, limited per host (--per-host requests in flight, at least --delay seconds
+between request starts), so a full re-scrape is bound by politeness limits
+rather than serial latency.
+
+Fetching and parsing are separate stages. The fetch stage writes raw pages
+into the snapshot store (data/snapshots, see snapshot_store.py), revalidating
+stored pages with ETag / Last-Modified so unchanged ones come back as a cheap
+304. The parse stage reads only from the store, in a process pool, so a
+parser change can be re-run over every state offline in seconds:
+
+    python scripts/scrape-nicu-data-v3.py                  # fetch, then parse
+    python scripts/scrape-nicu-data-v3.py --stage fetch    # refresh the snapshots only
+    python scripts/scrape-nicu-data-v3.py --stage parse    # offline re-parse
+
+The fetch stage (and so the default, --stage all) requires aiohttp, which
+the other scripts don't use: pip install aiohttp (see README.md). A parse that
+finds no NICUs at all (e.g. an empty snapshot store) exits without writing,
+rather than saving an empty database.
 """
 
-import requests
-from bs4 import BeautifulSoup
-import json
-import re
+import argparse
+import asyncio
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from neonatology_pages import HEADERS, STATES, parse_snapshot
+from nicu_store import write_database
+from snapshot_store import SnapshotStore
+
+MAX_RETRIES = 3
+
+
+class HostLimiter:
+    """Per-host concurrency cap plus a minimum delay between request starts"""
+
+    def __init__(self, concurrency, delay):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._hosts = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = (asyncio.Semaphore(self.concurrency), asyncio.Lock(), [0.0])
+        semaphore, lock, last_start = self._hosts[host]
+
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            async with lock:
+                wait = last_start[0] + self.delay - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                last_start[0] = loop.time()
+            yield
+
+
+async def fetch_page(session, limiter, store, url):
+    """GET a page into the store, conditionally if it's already there; returns 'fetched' or 'not-modified'"""
+    headers = store.conditional_headers(url)
+
+    for attempt in range(MAX_RETRIES):
+        async with limiter.slot(url):
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    store.touch(url)
+                    return 'not-modified'
+
+                if response.status == 429 or response.status >= 500:
+                    retry_after = response.headers.get('Retry-After', '')
+                    delay = float(retry_after) if retry_after.isdigit() else 2 ** attempt * limiter.delay
+                else:
+                    response.raise_for_status()
+                    body = await response.read()
+                    store.put(url, body, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                    return 'fetched'
+
+        await asyncio.sleep(delay)
+
+    raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                      status=response.status, message='retries exhausted')
+
+
+async def fetch_state(session, limiter, store, state_name, url):
+    """Fetch one state page into the store"""
+    try:
+        status = await fetch_page(session, limiter, store, url)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"  Error fetching {state_name}: {e}")
+        return 'error'
+    print(f"  {state_name}: {status}")
+    return status
+
 
-# List of all states with their URLs
-STATES = {
-    'Alabama': 'https://neonatologysolutions.com/alabama-nicus/',
-    'Alaska': 'https://neonatologysolutions.com/alaska-nicus/',
-    'Arizona': 'https://neonatologysolutions.com/arizona-nicus/',
-    'Arkansas': 'https://neonatologysolutions.com/arkansas-nicus/',
-    'California': 'https://neonatologysolutions.com/california-nicus/',
-    'Colorado': 'https://neonatologysolutions.com/colorado-nicus/',
-    'Connecticut': 'https://neonatologysolutions.com/connecticut-nicus/',
-    'Delaware': 'https://neonatologysolutions.com/deleware-nicus/',
-    'District of Columbia': 'https://neonatologysolutions.com/district-of-columbia-nicus/',
-    'Florida': 'https://neonatologysolutions.com/florida-nicus/',
-    'Georgia': 'https://neonatologysolutions.com/georgia-nicus/',
-    'Hawaii': 'https://neonatologysolutions.com/hawaii-nicus/',
-    'Idaho': 'https://neonatologysolutions.com/idaho-nicus/',
-    'Illinois': 'https://neonatologysolutions.com/illinois-nicus/',
-    'Indiana': 'https://neonatologysolutions.com/indiana-nicus/',
-    'Iowa': 'https://neonatologysolutions.com/iowa-nicus/',
-    'Kansas': 'https://neonatologysolutions.com/kansas-nicus/',
-    'Kentucky': 'https://neonatologysolutions.com/kentucky-nicus/',
-    'Louisiana': 'https://neonatologysolutions.com/louisiana-nicus/',
-    'Maine': 'https://neonatologysolutions.com/maine-nicus/',
-    'Maryland': 'https://neonatologysolutions.com/maryland-nicus/',
-    'Massachusetts': 'https://neonatologysolutions.com/massachusetts-nicus/',
-    'Michigan': 'https://neonatologysolutions.com/michigan-nicus/',
-    'Minnesota': 'https://neonatologysolutions.com/minnesota-nicus/',
-    'Mississippi': 'https://neonatologysolutions.com/mississippi-nicus/',
-    'Missouri': 'https://neonatologysolutions.com/missouri-nicus/',
-    'Montana': 'https://neonatologysolutions.com/montana-nicus/',
-    'Nebraska': 'https://neonatologysolutions.com/nebraska/',
-    'Nevada': 'https://neonatologysolutions.com/nevada-nicus/',
-    'New Hampshire': 'https://neonatologysolutions.com/new-hampshire-nicus/',
-    'New Jersey': 'https://neonatologysolutions.com/new-jersey-nicus/',
-    'New Mexico': 'https://neonatologysolutions.com/new-mexico-nicus/',
-    'New York': 'https://neonatologysolutions.com/new-york-nicus/',
-    'North Carolina': 'https://neonatologysolutions.com/north-carolina-nicus/',
-    'North Dakota': 'https://neonatologysolutions.com/north-dakota/',
-    'Ohio': 'https://neonatologysolutions.com/ohio/',
-    'Oklahoma': 'https://neonatologysolutions.com/oklahoma-nicus/',
-    'Oregon': 'https://neonatologysolutions.com/oregon-nicus/',
-    'Pennsylvania': 'https://neonatologysolutions.com/pennsylvania-nicus/',
-    'Rhode Island': 'https://neonatologysolutions.com/rhode-island-nicus/',
-    'South Carolina': 'https://neonatologysolutions.com/south-carolina-nicus/',
-    'South Dakota': 'https://neonatologysolutions.com/south-dakota-nicus/',
-    'Tennessee': 'https://neonatologysolutions.com/tennessee-nicus/',
-    'Texas': 'https://neonatologysolutions.com/texas-nicus/',
-    'Utah': 'https://neonatologysolutions.com/utah-nicus/',
-    'Vermont': 'https://neonatologysolutions.com/vermont-nicus/',
-    'Virginia': 'https://neonatologysolutions.com/virginia-nicus/',
-    'Washington': 'https://neonatologysolutions.com/washington-nicus/',
-    'West Virginia': 'https://neonatologysolutions.com/west-virginia-nicus/',
-    'Wisconsin': 'https://neonatologysolutions.com/wisconsin-nicus/',
-    'Wyoming': 'https://neonatologysolutions.com/wyoming-nicus/',
-}
-
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-    'Accept-Encoding': 'gzip, deflate, br',
-    'DNT': '1',
-    'Connection': 'keep-alive',
-    'Upgrade-Insecure-Requests': '1'
-}
-
-def scrape_state_nicus(state_name, url):
-    """Scrape NICU data for a single state using multiple parsing strategies"""
-    print(f"Scraping {state_name}...")
+async def fetch_all(states, store, args):
+    """Fetch every state page concurrently; returns per-status counts"""
+    limiter = HostLimiter(args.per_host, args.delay)
+    connector = aiohttp.TCPConnector(limit=args.max_connections, limit_per_host=args.per_host)
+    timeout = aiohttp.ClientTimeout(total=30)
 
+    counts = {}
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        nicus = []
-
-        # Find the main content area
-        content = soup.find('div', class_='entry-content') or soup.find('article')
-
-        if not content:
-            print(f"  Warning: Could not find content for {state_name}")
-            return nicus
-
-        # Get all text content
-        text = content.get_text()
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-
-            # Skip metadata lines
-            if any(skip in line.lower() for skip in ['practice type', 'md contact', 'nicu level iv', 'nicu level iii', 'nicu level ii', 'level iv nicus', 'level iii nicus', 'level ii nicus', 'total', 'summary']):
-                i += 1
-                continue
-
-            # Look for hospital names followed by level and beds on same or next line
-            # Pattern 1: "Hospital Name Level III | 30 Beds"
-            match1 = re.match(r'^(.+?)\s+Level\s+(IV|III|II|I)\s*\|?\s*(\d+)\s*Beds?', line, re.IGNORECASE)
-            if match1:
-                hospital_name = match1.group(1).strip()
-                level = match1.group(2).upper()
-                beds = int(match1.group(3))
-
-                nicus.append({
-                    'name': hospital_name,
-                    'state': state_name,
-                    'nicuLevel': f'Level {level}',
-                    'beds': beds
-                })
-                i += 1
-                continue
-
-            # Pattern 2: Hospital name on one line, "Level III | 30 Beds" on next line
-            if i + 1 < len(lines):
-                next_line = lines[i + 1]
-                match2 = re.match(r'^Level\s+(IV|III|II|I)\s*\|?\s*(\d+)\s*Beds?', next_line, re.IGNORECASE)
-
-                if match2 and len(line) > 3 and not any(skip in line.lower() for skip in ['practice', 'contact', 'type', 'level']):
-                    hospital_name = line.strip()
-                    level = match2.group(1).upper()
-                    beds = int(match2.group(2))
-
-                    nicus.append({
-                        'name': hospital_name,
-                        'state': state_name,
-                        'nicuLevel': f'Level {level}',
-                        'beds': beds
-                    })
-                    i += 2
-                    continue
-
-            i += 1
-
-        # Remove duplicates based on hospital name
-        seen = set()
-        unique_nicus = []
-        for nicu in nicus:
-            if nicu['name'] not in seen:
-                seen.add(nicu['name'])
-                unique_nicus.append(nicu)
-
-        print(f"  Found {len(unique_nicus)} NICUs in {state_name}")
-        return unique_nicus
-
-    except requests.RequestException as e:
-        print(f"  Error scraping {state_name}: {e}")
-        return []
-    except Exception as e:
-        print(f"  Unexpected error for {state_name}: {e}")
-        return []
+        async with aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=timeout) as session:
+            tasks = [fetch_state(session, limiter, store, state_name, url) for state_name, url in states.items()]
+            for status in await asyncio.gather(*tasks):
+                counts[status] = counts.get(status, 0) + 1
+    finally:
+        store.save()
+
+    return counts
+
+
+def parse_all(states, store, workers=None):
+    """Parse every stored state page in a process pool; returns {state: nicus}"""
+    results = {}
+    jobs = [(state_name, store.object_path(url)) for state_name, url in states.items()]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for state_name, nicus, problem in pool.map(parse_snapshot, jobs):
+            if problem:
+                print(f"  Warning: {state_name}: {problem}")
+            else:
+                print(f"  Found {len(nicus)} NICUs in {state_name}")
+            results[state_name] = nicus or []
+    return results
+
 
 def main():
     """Main scraping function"""
-    all_nicus = []
-
-    for state_name, url in STATES.items():
-        nicus = scrape_state_nicus(state_name, url)
-        all_nicus.extend(nicus)
-
-        # Be polite - wait between requests
-        time.sleep(1)
+    parser = argparse.ArgumentParser(description='Scrape neonatologysolutions.com state pages')
+    parser.add_argument('--stage', choices=['all', 'fetch', 'parse'], default='all',
+                        help='fetch into the snapshot store, parse from it, or both (default: all)')
+    parser.add_argument('--per-host', type=int, default=2,
+                        help='requests in flight per host (default: 2)')
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help='minimum seconds between request starts per host (default: 1.0)')
+    parser.add_argument('--max-connections', type=int, default=20,
+                        help='size of the shared connection pool (default: 20)')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='parser processes (default: one per CPU)')
+    parser.add_argument('--output', default='data/nicu-database.json',
+                        help='where to write the results (default: data/nicu-database.json)')
+    args = parser.parse_args()
+
+    store = SnapshotStore()
+
+    if args.stage in ('all', 'fetch'):
+        if aiohttp is None:
+            print("Error: aiohttp is required for fetching (pip install aiohttp); "
+                  "--stage parse re-parses the stored snapshots without it")
+            sys.exit(1)
+
+        print(f"Fetching {len(STATES)} states ({args.per_host} at a time per host, {args.delay}s apart)...")
+        start = time.perf_counter()
+        counts = asyncio.run(fetch_all(STATES, store, args))
+        print(f"Fetched in {time.perf_counter() - start:.1f}s: {counts.get('fetched', 0)} fetched, "
+              f"{counts.get('not-modified', 0)} not modified, {counts.get('error', 0)} errors")
+        print(f"Snapshot store: {store.summary()}")
+
+        if args.stage == 'fetch':
+            return
+
+    print(f"\nParsing {len(STATES)} states from the snapshot store...")
+    start = time.perf_counter()
+    results = parse_all(STATES, store, args.parse_workers)
+    elapsed = time.perf_counter() - start
+
+    # Keep the STATES order regardless of completion order
+    all_nicus = [nicu for state_name in STATES for nicu in results.get(state_name, [])]
+
+    if not all_nicus:
+        # Nothing stored yet (or every page failed to parse); don't replace the database with nothing
+        print(f"\nError: no NICUs parsed from {len(STATES)} states, {args.output} left unchanged "
+              f"(run --stage fetch first?)")
+        sys.exit(1)
 
     # Save to JSON file
-    output_file = 'data/nicu-database.json'
+    output_file = args.output
 
-    with open(output_file, 'w') as f:
-        json.dump({
-            'nicus': all_nicus,
-            'total': len(all_nicus),
-            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
-        }, f, indent=2)
+    # Through the store when there is one; records whose key matches keep their row
+    write_database(output_file, {
+        'nicus': all_nicus,
+        'total': len(all_nicus),
+        'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
+    })
 
     print(f"\n{'='*50}")
-    print(f"Scraping complete!")
+    print(f"Parsing complete in {elapsed:.1f}s!")
     print(f"Total NICUs found: {len(all_nicus)}")
     print(f"Data saved to: {output_file}")
 
@@ -5,10 +5,11 @@ Scrape NICU data from neonatologysolutions.com for all US states
 
 import requests
 from bs4 import BeautifulSoup
-import json
 import re
 import time
 
+from nicu_store import write_database
+
 # List of all states with their URLs
 STATES = {
     'Alabama': 'https://neonatologysolutions.com/alabama-nicus/',
@@ -152,12 +153,12 @@ def main():
     # Save to JSON file
     output_file = 'data/nicu-database.json'
 
-    with open(output_file, 'w') as f:
-        json.dump({
-            'nicus': all_nicus,
-            'total': len(all_nicus),
-            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
-        }, f, indent=2)
+    # Through the store when there is one; records whose key matches keep their row
+    write_database(output_file, {
+        'nicus': all_nicus,
+        'total': len(all_nicus),
+        'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
+    })
 
     print(f"\n{'='*50}")
     print(f"Scraping complete!")
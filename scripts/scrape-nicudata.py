@@ -2,81 +2,216 @@
 """
 Scrape NICU data from nicudata.com
 This site has 1432+ NICU entries with levels and bed counts
+
+The listing is a paginated JetEngine grid. The first page is fetched, its
+pagination is discovered (nicudata_html.listing_navigation), and the remaining
+pages are fetched concurrently on a bounded pool:
+
+  - JetEngine load-more settings (data-nav on the grid) -> POST the listing
+    AJAX endpoint with handler=listing_load_more for each page
+  - otherwise JetSmartFilters pagination -> GET ?jsf=jet-engine&pagenum=N
+
+Every response goes into the snapshot store. With --import, each page's
+records are upserted into nicu-database.json as soon as the page arrives (see
+nicu_upsert.py), so the national list is rebuilt in one command:
+
+    python scripts/scrape-nicudata.py --import
 """
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import json
-import re
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import urljoin
 
-def scrape_nicudata():
-    """Scrape NICU data from nicudata.com"""
-    print("Scraping nicudata.com...")
+import requests
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-    }
+from nicu_store import load_database, write_database
+from nicu_upsert import UpsertIndex
+from nicudata_csv import get_state_full_name
+from nicudata_entry import NICUDATA_RATE, make_session
+from nicudata_html import listing_navigation, listing_records
+from rate_limit import get_limiter
+from snapshot_store import SnapshotStore
+
+LISTING_URL = 'https://nicudata.com/entry/'
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+
+def php_form(data, prefix=None):
+    """Flatten nested dicts/lists into PHP-style form fields (query[posts_per_page]=...), like jQuery.ajax does"""
+    fields = []
+    items = data.items() if isinstance(data, dict) else enumerate(data)
+    for key, value in items:
+        name = f"{prefix}[{key}]" if prefix else str(key)
+        if isinstance(value, (dict, list)):
+            fields.extend(php_form(value, name))
+        elif isinstance(value, bool):
+            fields.append((name, 'true' if value else 'false'))
+        elif value is not None:
+            fields.append((name, str(value)))
+    return fields
+
+
+def get_page(session, store, url, rate):
+    """GET a listing page through the snapshot store; returns its HTML"""
+    get_limiter('nicudata', rate).acquire()
+    response = session.get(url, headers=store.conditional_headers(url), timeout=30)
+    if response.status_code == 304:
+        store.touch(url)
+        return store.get(url)
+    response.raise_for_status()
+    store.put(url, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return response.text
+
+
+def post_listing_page(session, store, ajax_url, listing_url, nav_info, page, rate):
+    """Fetch one page of the grid from the JetEngine listing endpoint; returns its HTML"""
+    nav = nav_info['nav']
+    form = php_form({
+        'action': 'jet_engine_ajax',
+        'handler': 'listing_load_more',
+        'query': nav.get('query') or {},
+        'widget_settings': nav.get('widget_settings') or {},
+        'page_settings': {
+            'queried_id': nav_info['queried_id'] or '',
+            'element_id': nav_info['element_id'] or '',
+            'page': page,
+        },
+        'page': page,
+    })
+
+    get_limiter('nicudata', rate).acquire()
+    response = session.post(ajax_url, data=form, headers={'Referer': listing_url}, timeout=30)
+    response.raise_for_status()
+    html = ((response.json() or {}).get('data') or {}).get('html') or ''
+
+    store.put(f"{ajax_url}#listing_load_more&page={page}", html)
+    return html
+
+
+def page_fetchers(url, first_html, session, store, rate):
+    """[(page, fetch())] for every page after the first, and a description of the method"""
+    nav_info = listing_navigation(first_html)
+
+    if nav_info['nav'] and nav_info['pages'] > 1:
+        ajax_url = nav_info['ajax_url'] or urljoin(url, '/wp-admin/admin-ajax.php')
+        fetchers = [
+            (page, lambda page=page: post_listing_page(session, store, ajax_url, url, nav_info, page, rate))
+            for page in range(2, nav_info['pages'] + 1)
+        ]
+        return fetchers, f"JetEngine AJAX ({nav_info['pages']} pages)"
+
+    if nav_info['filter_pages'] > 1:
+        separator = '&' if '?' in url else '?'
+        fetchers = [
+            (page, lambda page=page: get_page(session, store, f"{url}{separator}jsf=jet-engine&pagenum={page}", rate))
+            for page in range(2, nav_info['filter_pages'] + 1)
+        ]
+        return fetchers, f"JetSmartFilters pagination ({nav_info['filter_pages']} pages)"
+
+    return [], 'single page'
+
+
+def to_record(card):
+    """A listing card in the database's record shape"""
+    record = dict(card)
+    record['state'] = get_state_full_name(card['state'])
+    # A card without a county mustn't blank out one already in the database
+    record['county'] = card.get('county') or None
+    record['nicuLevel'] = card.get('nicuLevel') or None
+    return record
+
+
+def scrape_nicudata(url, concurrency=4, rate=NICUDATA_RATE):
+    """Scrape NICU data from nicudata.com, yielding (page, records) as each page arrives"""
+    print("Scraping nicudata.com...")
 
-    url = 'https://nicudata.com/entry/'
+    store = SnapshotStore()
+    session = make_session(concurrency)
+    session.headers.update(HEADERS)
 
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        nicus = []
-
-        # Look for table rows or data entries
-        # Try to find the data table
-        tables = soup.find_all('table')
-        print(f"Found {len(tables)} tables")
-
-        for table in tables:
-            rows = table.find_all('tr')
-            print(f"  Found {len(rows)} rows in table")
-
-            for row in rows[1:]:  # Skip header row
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 4:
-                    hospital_name = cells[0].get_text().strip()
-                    state = cells[1].get_text().strip()
-                    county = cells[2].get_text().strip() if len(cells) > 2 else ''
-                    nicu_level = cells[3].get_text().strip() if len(cells) > 3 else ''
-
-                    # Convert numeric level to "Level X" format
-                    if nicu_level.isdigit():
-                        level_map = {'1': 'I', '2': 'II', '3': 'III', '4': 'IV'}
-                        nicu_level = f"Level {level_map.get(nicu_level, nicu_level)}"
-
-                    if hospital_name and state:
-                        nicus.append({
-                            'name': hospital_name,
-                            'state': state,
-                            'county': county,
-                            'nicuLevel': nicu_level,
-                            'beds': None  # May need to fetch individual pages for bed count
-                        })
-
-        # Alternative: Look for divs/lists with hospital data
-        if not nicus:
-            print("  No table found, trying alternative parsing...")
-            # Try to find data in divs or other structures
-            entries = soup.find_all(['div', 'li'], class_=re.compile(r'(hospital|entry|row|item)', re.I))
-            print(f"  Found {len(entries)} potential entries")
-
-        print(f"\nTotal NICUs scraped: {len(nicus)}")
-        return nicus
-
-    except Exception as e:
-        print(f"Error scraping nicudata.com: {e}")
-        return []
+        first_html = get_page(session, store, url, rate)
+        yield 1, [to_record(card) for card in listing_records(first_html)]
+
+        fetchers, method = page_fetchers(url, first_html, session, store, rate)
+        print(f"  Pagination: {method}")
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {pool.submit(fetch): page for page, fetch in fetchers}
+            for future in as_completed(futures):
+                page = futures[future]
+                try:
+                    html = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    print(f"  ✗ Page {page}: {e}")
+                    continue
+                yield page, [to_record(card) for card in listing_records(html)]
+    finally:
+        session.close()
+        store.save()
+
 
 def main():
     """Main function"""
-    nicus = scrape_nicudata()
+    parser = argparse.ArgumentParser(description='Scrape the nicudata.com listing')
+    parser.add_argument('--url', default=LISTING_URL, help=f'listing page (default: {LISTING_URL})')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='listing pages fetched at once (default: 4)')
+    parser.add_argument('--rate', type=float, default=NICUDATA_RATE,
+                        help=f'requests per second to nicudata.com (default: {NICUDATA_RATE})')
+    parser.add_argument('--import', dest='import_db', action='store_true',
+                        help='upsert records straight into nicu-database.json instead of writing data/nicudata-raw.json')
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+
+    index = None
+    if args.import_db:
+        database = load_database(db_path)
+        index = UpsertIndex(database['nicus'])
+
+    nicus = []
+    seen_urls = set()
+    total = 0
+    start = time.perf_counter()
+
+    try:
+        for page, records in scrape_nicudata(args.url, args.concurrency, args.rate):
+            new = [r for r in records if not r.get('url') or r['url'] not in seen_urls]
+            seen_urls.update(r['url'] for r in new if r.get('url'))
+            total += len(new)
+
+            if index is not None:
+                for record in new:
+                    if index.upsert(record) == 'inserted' and not record['county']:
+                        record['county'] = 'Unknown'
+            else:
+                nicus.extend(new)
+            print(f"  Page {page}: {len(records)} entries")
+    except requests.RequestException as e:
+        print(f"Error scraping nicudata.com: {e}")
+        return
+
+    print(f"\nTotal NICUs scraped: {total} in {time.perf_counter() - start:.1f}s")
+
+    if index is not None:
+        print(f"Upsert: {index.summary()}")
+        index.print_conflicts()
+        if index.changed:
+            database['nicus'].sort(key=lambda x: (x['state'], x['name']))
+            database['total'] = len(database['nicus'])
+            write_database(db_path, database)
+            print(f"💾 Database updated: {database['total']} entries")
+        return
 
     if nicus:
         # Save to temporary file
@@ -93,13 +228,11 @@ def main():
         print(f"\nData saved to: {output_file}")
 
         # Show sample
-        if nicus:
-            print("\nSample entries:")
-            for nicu in nicus[:10]:
-                print(f"  - {nicu['name']} ({nicu['state']}): {nicu['nicuLevel']}")
+        print("\nSample entries:")
+        for nicu in nicus[:10]:
+            print(f"  - {nicu['name']} ({nicu['state']}): {nicu['nicuLevel']}")
     else:
-        print("\nNo data scraped. The website may use JavaScript to load data dynamically.")
-        print("Consider using Selenium or checking the page's API endpoints.")
+        print("\nNo data scraped. The listing markup may have changed.")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store of raw fetched pages.
+
+Scrapers fetch into the store and parse out of it, so a parser can be re-run
+over every archived page offline. Bodies are gzipped and named by the SHA-256
+of their content (data/snapshots/objects/ab/cdef....gz), so a page that hasn't
+changed is stored once no matter how often it's fetched. index.json maps each
+URL to its current hash and the ETag / Last-Modified it was served with, which
+the fetchers send back as conditional request headers.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_DIR = Path(__file__).parent.parent / 'data' / 'snapshots'
+
+
+def _now():
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+def read_object(path):
+    """Raw bytes of a stored object, or None if it's missing"""
+    try:
+        with gzip.open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class SnapshotStore:
+    """url -> {'hash', 'etag', 'last_modified', 'changed_at', 'checked_at'} index over gzipped objects"""
+
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = Path(directory)
+        self.objects = self.directory / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / 'index.json'
+        self._lock = threading.Lock()
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {}
+
+    def _object_path(self, digest):
+        return self.objects / digest[:2] / f"{digest[2:]}.gz"
+
+    def object_path(self, url):
+        """Path of the stored object for url (None if not stored), for reading in another process"""
+        entry = self.index.get(url)
+        return str(self._object_path(entry['hash'])) if entry else None
+
+    def __contains__(self, url):
+        entry = self.index.get(url)
+        return bool(entry) and self._object_path(entry['hash']).exists()
+
+    def urls(self):
+        return list(self.index)
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since for a stored page (empty if not stored)"""
+        if url not in self:
+            return {}
+        entry = self.index[url]
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get_bytes(self, url):
+        path = self.object_path(url)
+        return read_object(path) if path else None
+
+    def get(self, url):
+        """Stored body for url as text, or None"""
+        body = self.get_bytes(url)
+        return body.decode('utf-8', errors='replace') if body is not None else None
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """Store a fetched body (str or bytes); returns True if its content changed"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+
+        now = _now()
+        with self._lock:
+            previous = self.index.get(url, {})
+            self.index[url] = {
+                'hash': digest,
+                'etag': etag,
+                'last_modified': last_modified,
+                'changed_at': now if previous.get('hash') != digest else previous.get('changed_at', now),
+                'checked_at': now,
+            }
+        return previous.get('hash') != digest
+
+    def touch(self, url):
+        """Record that url was revalidated (304) without changing its content"""
+        with self._lock:
+            if url in self.index:
+                self.index[url]['checked_at'] = _now()
+
+    def save(self):
+        with self._lock:
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+    def summary(self):
+        objects = list(self.objects.glob('*/*.gz'))
+        size = sum(p.stat().st_size for p in objects)
+        return f"{len(self.index)} URLs, {len(objects)} objects, {size / 1e6:.1f} MB"
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Sanity-check every geocode in the NICU database in one vectorized pass and
+write a re-geocode queue of the suspect rows.
+
+Checks (all computed with NumPy over the whole database at once):
+  - missing:        no lat/lng at all
+  - out_of_state:   point falls outside the state's bounding box
+  - state_centroid: point sits on a state centroid (a "State, USA" answer)
+  - no_street:      formatted_address is only city/county/state level
+  - unknown_county: the record's county doesn't exist in its state
+
+State bounding boxes and county names come from the bundled gazetteer.
+geocode-all-hospitals.py --queue then re-geocodes only the queued rows.
+"""
+
+import json
+import re
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from gazetteer import Gazetteer, normalize_name
+from nicu_store import database_keys, load_database
+from us_states import state_abbrev
+
+# Degrees of slack around each state's box (ZIP centroids sit inside the border)
+BBOX_MARGIN = 0.3
+# Within ~1 km of a state centroid counts as "on" it
+CENTROID_TOLERANCE = 0.01
+
+_street_number_re = re.compile(r'\d')
+_state_only_re = re.compile(r'^[A-Za-z .]+, USA$')
+
+
+def state_bounding_boxes(gazetteer, states):
+    """(n_states, 4) array of lat_min, lat_max, lng_min, lng_max from ZIP centroids"""
+    zips = list(gazetteer.zips.values())
+    lat = np.array([z[0] for z in zips])
+    lng = np.array([z[1] for z in zips])
+    zip_state = np.array([z[3] for z in zips])
+
+    boxes = np.full((len(states), 4), np.nan)
+    for i, state in enumerate(states):
+        mask = zip_state == state
+        if mask.any():
+            boxes[i] = (lat[mask].min(), lat[mask].max(), lng[mask].min(), lng[mask].max())
+    return boxes
+
+
+def main():
+    base_dir = Path(__file__).parent.parent
+    db_path = base_dir / 'data' / 'nicu-database.json'
+    queue_path = base_dir / 'data' / 'regeocode-queue.json'
+
+    database = load_database(db_path)
+    nicus = database.get('nicus', [])
+    # The keys geocode-all-hospitals.py --queue finds the records by
+    keys = database_keys(database)
+    print(f"Validating {len(nicus)} hospitals")
+
+    gazetteer = Gazetteer()
+    states = sorted(gazetteer.states)
+    state_index = {s: i for i, s in enumerate(states)}
+
+    # Columnar view of the records
+    n = len(nicus)
+    lat = np.array([nicu.get('lat') or np.nan for nicu in nicus], dtype=float)
+    lng = np.array([nicu.get('lng') or np.nan for nicu in nicus], dtype=float)
+    codes = [state_abbrev(nicu.get('state')) for nicu in nicus]
+    sidx = np.array([state_index.get(c, -1) for c in codes])
+    known_state = sidx >= 0
+
+    boxes = state_bounding_boxes(gazetteer, states)
+    box = boxes[np.where(known_state, sidx, 0)]
+
+    missing = np.isnan(lat) | np.isnan(lng)
+    out_of_state = known_state & ~missing & (
+        (lat < box[:, 0] - BBOX_MARGIN) | (lat > box[:, 1] + BBOX_MARGIN) |
+        (lng < box[:, 2] - BBOX_MARGIN) | (lng > box[:, 3] + BBOX_MARGIN)
+    )
+
+    # State centroids: the gazetteer's own, plus whatever points the providers
+    # returned for bare "State, USA" answers already in the database
+    addresses = [nicu.get('formatted_address') or nicu.get('geocoded_address') or '' for nicu in nicus]
+    centroid_lat = [p[0] for p in gazetteer.states.values()]
+    centroid_lng = [p[1] for p in gazetteer.states.values()]
+    for i, address in enumerate(addresses):
+        if _state_only_re.match(address) and not missing[i]:
+            centroid_lat.append(lat[i])
+            centroid_lng.append(lng[i])
+    centroids = np.unique(np.round(np.column_stack([centroid_lat, centroid_lng]), 4), axis=0)
+
+    # (n_records, n_centroids) distance matrix in degrees - small enough to do at once
+    dlat = lat[:, None] - centroids[None, :, 0]
+    dlng = lng[:, None] - centroids[None, :, 1]
+    state_centroid = ~missing & (np.nanmin(np.maximum(np.abs(dlat), np.abs(dlng)), axis=1) < CENTROID_TOLERANCE)
+
+    # "City, ST 12345, USA" / "County, ST, USA" / "State, USA": three or fewer
+    # parts and no house number in the first one
+    parts = np.array([address.count(',') + 1 if address else 0 for address in addresses])
+    has_number = np.array([bool(_street_number_re.search(address.split(',')[0])) for address in addresses])
+    no_street = ~missing & (parts <= 3) & ~has_number
+
+    counties = defaultdict(set)
+    for state, name in gazetteer.counties:
+        counties[state].add(name)
+    unknown_county = np.array([
+        bool(nicu.get('county')) and code in counties and not any(
+            normalize_name(part) in counties[code]
+            for part in re.split(r'[,/]', nicu['county']) if part.strip()
+        )
+        for nicu, code in zip(nicus, codes)
+    ], dtype=bool)
+
+    checks = {
+        'missing': missing,
+        'out_of_state': out_of_state,
+        'state_centroid': state_centroid,
+        'no_street': no_street,
+        'unknown_county': unknown_county,
+    }
+    suspect = np.zeros(n, dtype=bool)
+    for mask in checks.values():
+        suspect |= mask
+
+    queue = []
+    for i in np.flatnonzero(suspect):
+        nicu = nicus[i]
+        queue.append({
+            'key': keys[i],
+            'name': nicu.get('name'),
+            'state': nicu.get('state'),
+            'county': nicu.get('county'),
+            'formatted_address': addresses[i] or None,
+            'reasons': [name for name, mask in checks.items() if mask[i]],
+        })
+
+    with open(queue_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'queue': queue,
+            'total': len(queue),
+            'validated_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"\nSuspect geocodes: {len(queue)}/{n}")
+    for name, mask in checks.items():
+        print(f"  {name}: {int(mask.sum())}")
+
+    reasons = Counter(tuple(item['reasons']) for item in queue)
+    print("\nMost common combinations:")
+    for combo, count in reasons.most_common(5):
+        print(f"  {count:4d}  {', '.join(combo)}")
+
+    print(f"\nQueue written to {queue_path}")
+    print("Re-geocode with: python scripts/geocode-all-hospitals.py --queue")
+
+
+if __name__ == '__main__':
+    main()
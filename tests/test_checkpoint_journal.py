@@ -0,0 +1,50 @@
+"""Enrichment of one of two records that share a nicudata URL must land on that record"""
+
+import json
+
+from checkpoint_journal import CheckpointJournal
+from nicu_store import NicuStore, store_path
+
+URL = 'https://nicudata.com/entry/medstar-georgetown/'
+
+DATABASE = {
+    'nicus': [
+        {'name': 'MedStar Georgetown', 'state': 'District of Columbia', 'url': URL, 'lat': 38.9121, 'lng': -77.0757},
+        {'name': 'MedStar Georgetown', 'state': 'DC', 'url': URL, 'lat': 38.9097, 'lng': -77.0745},
+    ],
+    'total': 2,
+}
+
+
+def write_json(tmp_path):
+    db_path = tmp_path / 'nicu-database.json'
+    db_path.write_text(json.dumps(DATABASE), encoding='utf-8')
+    return db_path
+
+
+def test_journal_replay_applies_to_the_right_duplicate(tmp_path):
+    db_path = write_json(tmp_path)
+    journal = CheckpointJournal(db_path)
+    database = journal.load()
+    journal.record(database['nicus'][1], {'phone': '(202) 444-2000'}, 'test')
+    journal.record(database['nicus'][0], {'beds': 16}, 'test')
+    assert journal.key(database['nicus'][1]) == f'{URL}#2'
+
+    # An interrupted run: the next one replays the journal over the file
+    replayed = CheckpointJournal(db_path).load()['nicus']
+    assert replayed[0].get('beds') == 16 and 'phone' not in replayed[0]
+    assert replayed[1].get('phone') == '(202) 444-2000' and 'beds' not in replayed[1]
+
+
+def test_store_update_applies_to_the_right_duplicate(tmp_path):
+    db_path = write_json(tmp_path)
+    NicuStore(store_path(db_path)).replace_all(DATABASE)
+
+    journal = CheckpointJournal(db_path)
+    database = journal.load()
+    journal.record(database['nicus'][1], {'phone': '(202) 444-2000'}, 'test')
+    journal.record(database['nicus'][0], {'beds': 16}, 'test')
+
+    stored = journal.store.load_database()['nicus']
+    assert stored[0].get('beds') == 16 and 'phone' not in stored[0]
+    assert stored[1].get('phone') == '(202) 444-2000' and 'beds' not in stored[1]
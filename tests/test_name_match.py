@@ -0,0 +1,29 @@
+"""Fuzzy duplicate names: a subset name or a children's unit is not the same hospital"""
+
+from name_match import name_similarity, qualifier_mismatch, variant_tokens
+
+THRESHOLD = 0.8   # deduplicate-by-address.py --threshold default
+
+
+def duplicate(a, b):
+    a, b = variant_tokens(a), variant_tokens(b)
+    return not qualifier_mismatch(a[0], b[0]) and name_similarity(a, b) >= THRESHOLD
+
+
+def test_childrens_unit_is_not_its_parent():
+    assert not duplicate("Norton Hospital", "Norton Children's Hospital")
+    assert not duplicate("Mount Sinai Hospital", "Mount Sinai Kravis Children's Hospital")
+
+
+def test_extra_campus_name_is_not_a_duplicate():
+    assert not duplicate("Methodist Hospital - Henderson", "Methodist Hospital")
+
+
+def test_spelling_variants_are_duplicates():
+    assert duplicate("Saint Peter's University Hospital", "St. Peters University Hospital")
+    assert duplicate("East Tennessee Children’s Hospital", "East Tennessee Children's Hospital")
+
+
+def test_parenthetical_alias_is_a_duplicate():
+    assert duplicate("Franciscan Health Hammond (St. Margaret Mercy Health Care Center)",
+                     "Franciscan Health Hammond")
@@ -0,0 +1,83 @@
+"""Whole-database writes must commit only their own changes, not a stale copy"""
+
+from nicu_store import NicuStore, record_key, write_database
+
+NICUS = [
+    {'name': 'Albany Medical Center', 'state': 'New York', 'nicuLevel': 'Level IV',
+     'url': 'https://nicudata.com/entry/albany-medical-center/', 'beds': 60, 'lat': 42.65, 'lng': -73.77},
+    {'name': 'Crouse Hospital', 'state': 'New York', 'nicuLevel': 'Level IV',
+     'url': 'https://nicudata.com/entry/crouse-hospital/', 'beds': 57, 'lat': 43.04, 'lng': -76.14},
+    {'name': 'Woodhull Medical Center', 'state': 'New York', 'nicuLevel': 'Level II',
+     'url': None, 'beds': 20, 'lat': 40.70, 'lng': -73.94},
+]
+
+
+def make_store(tmp_path):
+    store = NicuStore(tmp_path / 'nicu.sqlite')
+    store.replace_all({'nicus': NICUS, 'total': len(NICUS), 'scraped_at': '2025-10-12'})
+    return store
+
+
+def test_bulk_write_keeps_concurrent_update(tmp_path):
+    store = make_store(tmp_path)
+    database, baseline = store.load_with_baseline()
+
+    # Another script enriches Albany after this copy was loaded
+    albany = record_key(NICUS[0])
+    store.update(albany, {'phone': '(518) 262-3125'}, {'phone': {'source': 'places'}}, '_enrichment')
+
+    database['nicus'][0]['beds'] = 62
+    database['nicus'][0]['_enrichment'] = {'beds': {'source': 'csv'}}
+    counts, _ = store.apply_changes(database, baseline)
+
+    assert counts == (0, 1, 0)
+    record = store.get(albany)
+    assert record['beds'] == 62
+    assert record['phone'] == '(518) 262-3125'
+    assert record['_enrichment'] == {'phone': {'source': 'places'}, 'beds': {'source': 'csv'}}
+
+
+def test_bulk_write_applies_inserts_and_deletes_only(tmp_path):
+    store = make_store(tmp_path)
+    database, baseline = store.load_with_baseline()
+
+    crouse = record_key(NICUS[1])
+    store.update(crouse, {'phone': '(315) 470-7111'})
+
+    woodhull = database['nicus'].pop(2)
+    database['nicus'].append({'name': 'Oishei Children\'s Hospital', 'state': 'New York',
+                              'nicuLevel': 'Level IV', 'beds': 64})
+    counts, baseline = store.apply_changes(database, baseline)
+
+    assert counts == (1, 0, 1)
+    assert store.get(record_key(woodhull)) is None
+    assert store.get("Oishei Children's Hospital|New York")['beds'] == 64
+    assert store.get(crouse)['phone'] == '(315) 470-7111'
+
+    # Saving the same copy again writes nothing
+    assert store.apply_changes(database, baseline)[0] == (0, 0, 0)
+
+
+def test_database_not_loaded_from_store_is_matched_by_key(tmp_path):
+    store = make_store(tmp_path)
+    rescraped = {'nicus': [dict(NICUS[0]), dict(NICUS[1], nicuLevel='Level III')], 'total': 2}
+
+    counts, _ = store.apply_changes(rescraped)
+
+    assert counts == (0, 1, 1)
+    assert store.get(record_key(NICUS[1]))['nicuLevel'] == 'Level III'
+    assert store.load_database()['total'] == 2
+
+
+def test_side_file_leaves_the_snapshot_and_tiles_alone(tmp_path):
+    data = tmp_path / 'data'
+    tiles = tmp_path / 'public' / 'tiles'
+    data.mkdir()
+    write_database(data / 'nicu-database.json', {'nicus': NICUS, 'total': len(NICUS)})
+    snapshot = (data / 'nicu-snapshot.bin').read_bytes()
+    manifest = (tiles / 'manifest.json').read_bytes()
+
+    write_database(data / 'neonatology-raw.json', {'nicus': NICUS[:1], 'total': 1})
+
+    assert (data / 'nicu-snapshot.bin').read_bytes() == snapshot
+    assert (tiles / 'manifest.json').read_bytes() == manifest
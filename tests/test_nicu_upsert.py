@@ -0,0 +1,99 @@
+"""Re-importing nicudata rows must not undo cleaned or other-source data"""
+
+import copy
+
+from nicu_upsert import UpsertIndex
+from nicudata_csv import parse_segment
+
+# Rows as they appear in data/FINALNicus.csv
+CHILDRENS_NATIONAL_ROW = ("Children's National Medical Center DC Washington DC 4 "
+                          "View (https://nicudata.com/entry/childrens-national-medical-center/)")
+BRONSON_ROW = "Bronson Methodist Hospital MI Kalamazoo 3 View (https://nicudata.com/entry/bronson-methodist-hospital/)"
+ST_ROSE_ROW = "St. Rose Dominican Hospital, Siena Campus NV Clark 3 View (https://nicudata.com/entry/st-rose-siena/)"
+
+CHILDRENS_NATIONAL = {
+    'name': "Children's National Medical Center",
+    'state': 'District of Columbia',
+    'county': 'Washington DC',
+    'nicuLevel': 'Level IV',
+    'url': 'https://nicudata.com/entry/childrens-national-medical-center/',
+    'beds': None,
+    'lat': 38.9271,
+    'lng': -77.0146,
+}
+
+# A neonatologysolutions bed record: no nicudata URL
+BRONSON = {
+    'name': 'Bronson Methodist Hospital',
+    'state': 'Michigan',
+    'county': None,
+    'nicuLevel': 'Level IV',
+    'url': None,
+    'beds': 40,
+}
+
+
+# The same hospital stored under nicudata's other slug for it
+ST_ROSE = {
+    'name': 'St. Rose Dominican Hospital, Siena Campus',
+    'state': 'Nevada',
+    'county': 'Clark',
+    'nicuLevel': 'Level III',
+    'url': 'https://nicudata.com/entry/st-rose-dominican-hospital-siena-campus/',
+    'beds': None,
+    'lat': 36.0042484,
+    'lng': -115.1150318,
+}
+
+
+def reimport(records, *rows):
+    records = copy.deepcopy(records)
+    index = UpsertIndex(records)
+    results = [index.upsert(parse_segment(row)) for row in rows]
+    return records, results
+
+
+def test_parser_leaves_no_county_placeholder():
+    record = parse_segment(CHILDRENS_NATIONAL_ROW)
+    assert record['name'] == "Children's National Medical Center"
+    assert record['state'] == 'District of Columbia'
+    assert record['county'] != 'Unknown'
+
+
+def test_reimport_keeps_cleaned_name_and_real_county():
+    records, results = reimport([CHILDRENS_NATIONAL], CHILDRENS_NATIONAL_ROW)
+    assert results == ['unchanged']
+    assert records == [CHILDRENS_NATIONAL]
+
+
+def test_reimport_never_writes_a_placeholder_county():
+    record = parse_segment(CHILDRENS_NATIONAL_ROW)
+    record['name'], record['county'] = 'Childrens national medical center', 'Unknown'
+    records = copy.deepcopy([CHILDRENS_NATIONAL])
+    UpsertIndex(records).upsert(record)
+    assert records[0]['name'] == "Children's National Medical Center"
+    assert records[0]['county'] == 'Washington DC'
+
+
+def test_reimport_fills_missing_county_and_updates_level():
+    stored = dict(CHILDRENS_NATIONAL, county=None, nicuLevel='Level III')
+    records, results = reimport([stored], CHILDRENS_NATIONAL_ROW)
+    assert results == ['updated']
+    assert records[0]['county'] == 'Washington DC'
+    assert records[0]['nicuLevel'] == 'Level IV'
+    assert records[0]['lat'] == CHILDRENS_NATIONAL['lat']
+
+
+def test_name_state_match_leaves_record_without_url_alone():
+    records, results = reimport([BRONSON], BRONSON_ROW)
+    assert results == ['unchanged']
+    assert records == [BRONSON]
+
+
+def test_same_name_under_another_slug_is_a_conflict():
+    records = copy.deepcopy([ST_ROSE])
+    index = UpsertIndex(records)
+    assert index.upsert(parse_segment(ST_ROSE_ROW)) == 'conflict'
+    assert records == [ST_ROSE]
+    assert [existing['url'] for _, existing in index.conflicts] == [ST_ROSE['url']]
+    assert index.unseen() == [] and not index.changed
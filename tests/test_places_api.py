@@ -0,0 +1,66 @@
+"""Every failed Places call surfaces as a PlacesError, never a raw requests exception"""
+
+import pytest
+import requests
+
+import places_api
+from places_api import PlacesError, lookup_hospital
+
+NICU = {'name': 'Bronson Methodist Hospital', 'county': 'Kalamazoo', 'state': 'Michigan'}
+
+
+class NoLimit:
+    def acquire(self):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+        self.text = str(body)
+
+    def json(self):
+        if self.body is None:
+            raise ValueError('no JSON')
+        return self.body
+
+
+@pytest.fixture
+def respond(monkeypatch):
+    monkeypatch.setattr(places_api, 'get_limiter', lambda name: NoLimit())
+
+    def set_response(response):
+        def request(method, url, **kwargs):
+            if isinstance(response, Exception):
+                raise response
+            return response
+        monkeypatch.setattr(requests, 'request', request)
+    return set_response
+
+
+@pytest.mark.parametrize('status', [400, 401, 403])
+def test_rejected_request_is_not_retryable(respond, status):
+    respond(FakeResponse(status, {'error': {'status': 'PERMISSION_DENIED'}}))
+    place, error, calls = lookup_hospital(NICU, 'key')
+    assert place is None and calls == 1
+    assert isinstance(error, PlacesError) and not error.retryable
+
+
+@pytest.mark.parametrize('response', [FakeResponse(429, {}), FakeResponse(503, {}), FakeResponse(200),
+                                      requests.ConnectionError('reset')])
+def test_transient_failure_is_retryable(respond, response):
+    respond(response)
+    place, error, calls = lookup_hospital(NICU, 'key')
+    assert place is None and calls == 1
+    assert isinstance(error, PlacesError) and error.retryable
+
+
+def test_no_match_is_not_an_error(respond):
+    respond(FakeResponse(200, {}))
+    assert lookup_hospital(NICU, 'key') == (None, None, 1)
+
+
+def test_stale_place_id_costs_two_calls(respond):
+    respond(FakeResponse(404))
+    assert lookup_hospital(dict(NICU, place_id='ChIJgone'), 'key') == (None, None, 2)